@@ -1,8 +1,14 @@
-import simpy
-import random
+import os
 import statistics
-import matplotlib.pyplot as plt
-from scipy import stats
+import sys
+
+from replikacje import seedy_replikacji, uruchom_replikacje, uruchom_replikacje_rownolegle
+from wykresy import renderuj_w_tle, zapisz_wyniki
+
+# Model (klasy ZasobProdukcyjny, StatystykiSymulacji, procesy) pochodzi z Projekt.py
+# przez moduł replikacje - procesy robocze importują tylko simpy i rdzeń modelu.
+# numpy/scipy (moduł porownania) są importowane leniwie, dopiero na etapie analizy; wykresy rysuje
+# osobny proces (moduł wykresy, backend Agg) na podstawie zapisanego pliku wyników.
 
 # --- 1. PARAMETRY SYSTEMU (Z Etapu I) ---
 
@@ -13,129 +19,67 @@ ZAKRES_MTTR = (3, 10)  # min - średni czas naprawy
 CZAS_SYMULACJI = 10000  # min (krótszy czas dla pojedynczej replikacji w pętli)
 
 
-# --- 2. KLASY I LOGIKA SYMULACJI (Z Etapu II) ---
-
-class StatystykiSymulacji:
-    def __init__(self):
-        self.czasy_realizacji = []
-        self.czasy_oczekiwania_a_b = []
-        self.elementy_ukonczone = 0
-
-
-class ZasobProdukcyjny:
-    def __init__(self, srodowisko, nazwa, zakres_czasu, zakres_naprawy, zakres_mtbf):
-        self.srodowisko = srodowisko
-        self.nazwa = nazwa
-        self.zasob = simpy.Resource(srodowisko, capacity=1)
-        self.zakres_czasu = zakres_czasu
-        self.zakres_naprawy = zakres_naprawy
-        self.zakres_mtbf = zakres_mtbf
-        self.zepsuta = False
-        self.srodowisko.process(self._proces_awarii())
-
-    def _proces_awarii(self):
-        while True:
-            try:
-                mtbf = random.uniform(*self.zakres_mtbf)
-                yield self.srodowisko.timeout(random.expovariate(1.0 / mtbf))
-
-                self.zepsuta = True
-
-                mttr = random.uniform(*self.zakres_naprawy)
-                yield self.srodowisko.timeout(random.expovariate(1.0 / mttr))
-
-                self.zepsuta = False
-            except simpy.Interrupt:
-                break
-
-    def uzyj_zasobu(self, id_elem, czas_przetwarzania):
-        with self.zasob.request() as req:
-            yield req
-
-            while self.zepsuta:
-                yield self.srodowisko.timeout(1)
-
-            yield self.srodowisko.timeout(czas_przetwarzania)
-
-
-def proces_elementu(env, id_el, res_a, res_b, czas_start, stats):
-    czas_a = random.uniform(*ZAKRES_CZASU_A)
-    zasob_a = res_a[id_el % len(res_a)]
-    yield env.process(zasob_a.uzyj_zasobu(id_el, czas_a))
-
-    czas_b = random.uniform(*ZAKRES_CZASU_B)
-    zasob_b = res_b[id_el % len(res_b)]
-
-    start_oczekiwania = env.now
-    yield env.process(zasob_b.uzyj_zasobu(id_el, czas_b))
+# --- 2-3. FUNKCJE POMOCNICZE DO EKSPERYMENTÓW ---
 
-    czas_w_kolejce = env.now - start_oczekiwania - czas_b
-    if czas_w_kolejce > 0:
-        stats.czasy_oczekiwania_a_b.append(czas_w_kolejce)
+def konfiguracja_scenariusza(liczba_a, liczba_b, lambda_range):
+    return {
+        'czas_symulacji': CZAS_SYMULACJI,
+        'liczba_maszyn_a': liczba_a,
+        'liczba_maszyn_b': liczba_b,
+        'zakres_lambda': lambda_range,
+        'zakres_czasu_a': ZAKRES_CZASU_A,
+        'zakres_czasu_b': ZAKRES_CZASU_B,
+        'zakres_mtbf': ZAKRES_MTBF,
+        'zakres_mttr': ZAKRES_MTTR,
+        # Osobne strumienie (przybycia, obsługa A i B, awarie każdej maszyny) - te same
+        # liczby losowe trafiają do tych samych zdarzeń w obu scenariuszach
+        'strumienie_losowe': True
+    }
 
-    stats.czasy_realizacji.append(env.now - czas_start)
-    stats.elementy_ukonczone += 1
-
-
-def zrodlo_elementow(env, res_a, res_b, lam_range, stats):
-    i = 0
-    while True:
-        lam = random.uniform(*lam_range)
-        yield env.timeout(random.expovariate(1.0 / lam))
-        i += 1
-        env.process(proces_elementu(env, i, res_a, res_b, env.now, stats))
-
-
-# --- 3. FUNKCJE POMOCNICZE DO EKSPERYMENTÓW ---
 
 def uruchom_pojedyncza_symulacje(liczba_a, liczba_b, lambda_range, seed=None):
-    if seed is not None:
-        random.seed(seed)
-
-    env = simpy.Environment()
-    stats = StatystykiSymulacji()
-
-    res_a = [ZasobProdukcyjny(env, f'A{i}', ZAKRES_CZASU_A, ZAKRES_MTTR, ZAKRES_MTBF)
-             for i in range(liczba_a)]
-    res_b = [ZasobProdukcyjny(env, f'B{i}', ZAKRES_CZASU_B, ZAKRES_MTTR, ZAKRES_MTBF)
-             for i in range(liczba_b)]
-
-    env.process(zrodlo_elementow(env, res_a, res_b, lambda_range, stats))
-    env.run(until=CZAS_SYMULACJI)
-
-    sredni_czas = statistics.mean(stats.czasy_realizacji) if stats.czasy_realizacji else 0
-    return sredni_czas
+    wyniki = uruchom_replikacje(konfiguracja_scenariusza(liczba_a, liczba_b, lambda_range), seed)
+    return wyniki['Średni Czas Realizacji (min)']
 
 
 # --- 4. ETAP III: BADANIA I ANALIZA WYNIKÓW ---
 
-def przeprowadz_badania_statystyczne():
+def przeprowadz_badania_statystyczne(liczba_procesow=None, katalog_wynikow='.'):
     print("=" * 60)
     print("ETAP III: Badania symulacyjne z wykorzystaniem Common Random Numbers")
     print("=" * 60)
 
     N = 30
     MASTER_SEED = 424242
-    random.seed(MASTER_SEED)
 
-    lista_seedow = [random.randint(1, 1000000) for _ in range(N)]
+    # Hierarchia seedów: główny -> replikacja -> strumień; każdą replikację można
+    # odtworzyć osobno (seed_replikacji(MASTER_SEED, j)), seedy serii nie kolidują
+    lista_seedow = seedy_replikacji(MASTER_SEED, N)
     TEST_LAMBDA = (8, 12)
 
-    wyniki_s1 = []
-    wyniki_s2 = []
-
     print(f"Rozpoczynam symulację {N} par scenariuszy...")
 
-    for i, seed_iteracji in enumerate(lista_seedow):
-
-        t1 = uruchom_pojedyncza_symulacje(3, 2, TEST_LAMBDA, seed=seed_iteracji)
-        wyniki_s1.append(t1)
-
-        t2 = uruchom_pojedyncza_symulacje(3, 3, TEST_LAMBDA, seed=seed_iteracji)
-        wyniki_s2.append(t2)
-
-        if (i + 1) % 5 == 0:
-            print(f"  -> Ukończono replikację {i + 1}/{N}")
+    # Pary scenariuszy z tym samym seedem (CRN), liczone w puli procesów
+    s1 = konfiguracja_scenariusza(3, 2, TEST_LAMBDA)
+    s2 = konfiguracja_scenariusza(3, 3, TEST_LAMBDA)
+    zadania = []
+    for seed_iteracji in lista_seedow:
+        zadania.append((s1, seed_iteracji))
+        zadania.append((s2, seed_iteracji))
+
+    wyniki = uruchom_replikacje_rownolegle(zadania, liczba_procesow)
+    czasy = [w['Średni Czas Realizacji (min)'] for w in wyniki]
+    wyniki_s1 = czasy[0::2]
+    wyniki_s2 = czasy[1::2]
+    print(f"  -> Ukończono {N}/{N} replikacji")
+
+    # Zapis wyników i renderowanie wykresów w osobnym procesie (równolegle z analizą)
+    sciezka_wynikow = os.path.join(katalog_wynikow, 'wyniki_etap3.json')
+    zapisz_wyniki(sciezka_wynikow, {
+        'wyniki_s1': wyniki_s1, 'wyniki_s2': wyniki_s2,
+        'etykiety': ['3A + 2B', '3A + 3B'], 'seedy': lista_seedow
+    })
+    renderowanie = renderuj_w_tle(sciezka_wynikow, katalog_wynikow)
 
     avg1 = statistics.mean(wyniki_s1)
     avg2 = statistics.mean(wyniki_s2)
@@ -146,44 +90,39 @@ def przeprowadz_badania_statystyczne():
     print(f"Średni czas realizacji (3A+3B): {avg2:.2f} min")
     print(f"Średnia redukcja czasu: {diff:.2f} min")
 
-    t_stat, p_val = stats.ttest_rel(wyniki_s1, wyniki_s2)
+    # Test dla par zależnych dla wszystkich głównych metryk naraz (poprawka Holma)
+    import porownania
+    alpha = 0.05
+    porownanie = porownania.porownaj(
+        {'3A + 2B': dict(zip(lista_seedow, wyniki[0::2])),
+         '3A + 3B': dict(zip(lista_seedow, wyniki[1::2]))},
+        metryki=porownania.METRYKI, poprawka='holm', alfa=alpha)
 
     print("\n--- WERYFIKACJA STATYSTYCZNA ---")
-    print("Hipoteza H0: Średnie czasy realizacji w obu konfiguracjach są równe.")
-    print("Hipoteza H1: Dodanie maszyny skraca czas realizacji (średnie są różne).")
-    print(f"Test: t-Studenta dla par zależnych (Paired T-Test)")
-    print(f"Wartość p (p-value): {p_val:.10f}")
-
-    alpha = 0.05
+    print("Hipoteza H0: Średnie w obu konfiguracjach są równe.")
+    print("Hipoteza H1: Dodanie maszyny zmienia wyniki (średnie są różne).")
+    print(f"Test: t-Studenta dla par zależnych (Paired T-Test), poprawka Holma")
+    for wiersz in porownanie:
+        print(f"  {wiersz['metryka']}: różnica {wiersz['srednia_roznicy']:.4f} "
+              f"± {wiersz['polowa_przedzialu']:.4f}, d_z = {wiersz['d_z']:.2f}, "
+              f"p = {wiersz['p']:.10f} (skorygowane {wiersz['p_skorygowane']:.10f})")
+
+    p_val = next(w['p_skorygowane'] for w in porownanie
+                 if w['metryka'] == 'Średni Czas Realizacji (min)')
     if p_val < alpha:
-        print("WNIOSEK: Odrzucamy H0. Różnica jest ISTOTNA STATYSTYCZNIE.")
+        print("WNIOSEK: Odrzucamy H0 dla czasu realizacji. Różnica jest ISTOTNA STATYSTYCZNIE.")
     else:
-        print("WNIOSEK: Brak podstaw do odrzucenia H0.")
+        print("WNIOSEK: Brak podstaw do odrzucenia H0 dla czasu realizacji.")
 
     # --- WYKRESY ---
+    # Renderowanie uruchomione wcześniej w tle - tu tylko oczekiwanie na zapis plików
     try:
-        plt.figure(figsize=(10, 6))
-        plt.boxplot([wyniki_s1, wyniki_s2], tick_labels=['3A + 2B', '3A + 3B'])
-        plt.title(f'Porównanie czasu realizacji (Metoda CRN, N={N})')
-        plt.ylabel('Średni czas realizacji zlecenia [min]')
-        #plt.grid(True, alpha=0.3)
-        print("\nWykres zapisano jako 'wykres_pudelkowy.png'")
-
-        roznice = [s1 - s2 for s1, s2 in zip(wyniki_s1, wyniki_s2)]
-        plt.figure(figsize=(10, 6))
-        plt.bar(range(N), roznice, color='green', alpha=0.7)
-        plt.title('Zysk czasowy w każdej replikacji (S1 - S2)')
-        plt.xlabel('Numer replikacji (Seed)')
-        #plt.ylabel('Skrócenie czasu realizacji [min]')
-        plt.axhline(y=statistics.mean(roznice), color='r', linestyle='--', label='Średnia redukcja')
-        plt.legend()
-
-        print("Wykres różnic zapisano jako 'wykres_roznic.png'")
-        plt.show()
-
+        for sciezka in renderowanie.result():
+            print(f"Wykres zapisano jako '{sciezka}'")
     except Exception as e:
         print(f"Błąd generowania wykresu: {e}")
 
 
 if __name__ == "__main__":
-    przeprowadz_badania_statystyczne()
+    # Opcjonalnie: liczba procesów roboczych jako argument
+    przeprowadz_badania_statystyczne(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -1,9 +1,19 @@
 #projekt
 
 import simpy
+import hashlib
+import json
+import math
 import random
 import statistics
-from typing import Dict, List, Tuple
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right
+from collections import deque
+from heapq import heappop, heappush
+from itertools import count
+from statistics import NormalDist
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 # PARAMETRY SYSTEMU
 
@@ -21,20 +31,678 @@ LICZBA_MASZYN_B = 2
 # Czas trwania symulacji
 CZAS_SYMULACJI = 50000  # min
 
+# Percentyle raportowane dla czasów realizacji
+PERCENTYLE = (50, 90, 95, 99)
+
+# Rozdzielczość histogramu logarytmicznego (względny błąd percentyli ~1%)
+_SKALA_HISTOGRAMU = 1.0 / math.log1p(0.01)
+_KOSZ_ZERA = -(10 ** 9)
+
 
 # KLASY DO ZBIERANIA STATYSTYK
 
+class AkumulatorStrumieniowy:
+    """Średnia, wariancja (Welford) i percentyle (histogram logarytmiczny) w O(1) na obserwację."""
+
+    __slots__ = ('n', 'srednia', 'm2', 'minimum', 'maksimum', 'histogram')
+
+    def __init__(self):
+        self.n = 0
+        self.srednia = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maksimum = -math.inf
+        self.histogram = {}
+
+    def dodaj(self, x: float):
+        self.n += 1
+        delta = x - self.srednia
+        self.srednia += delta / self.n
+        self.m2 += delta * (x - self.srednia)
+        if x < self.minimum:
+            self.minimum = x
+        if x > self.maksimum:
+            self.maksimum = x
+
+        kosz = math.floor(math.log(x) * _SKALA_HISTOGRAMU) if x > 0 else _KOSZ_ZERA
+        histogram = self.histogram
+        histogram[kosz] = histogram.get(kosz, 0) + 1
+
+    def wariancja(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def percentyl(self, p: float) -> float:
+        if self.n == 0:
+            return 0.0
+
+        # Pierwszy kosz, w którym skumulowana liczność osiąga rangę p
+        ranga = p / 100.0 * self.n
+        skumulowane = 0
+        for kosz in sorted(self.histogram):
+            skumulowane += self.histogram[kosz]
+            if skumulowane >= ranga:
+                break
+
+        if kosz == _KOSZ_ZERA:
+            return 0.0
+        wartosc = math.exp((kosz + 0.5) / _SKALA_HISTOGRAMU)
+        return min(max(wartosc, self.minimum), self.maksimum)
+
+    def percentyle(self, lista_p: Sequence[float] = PERCENTYLE) -> Dict[float, float]:
+        return {p: self.percentyl(p) for p in lista_p}
+
+
+def kwantyl_t(p: float, stopnie_swobody: float) -> float:
+    """Kwantyl rozkładu t-Studenta (rozwinięcie Cornisha-Fishera, bez scipy)."""
+    v = stopnie_swobody
+    if v == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if v == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+
+    z = NormalDist().inv_cdf(p)
+    g1 = (z ** 3 + z) / 4
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160
+    return z + g1 / v + g2 / v ** 2 + g3 / v ** 3 + g4 / v ** 4
+
+
+def przedzial_ufnosci(wartosci: Sequence[float], poziom: float = 0.95) -> Tuple[float, float]:
+    """Średnia i połowa szerokości przedziału ufności t-Studenta."""
+    n = len(wartosci)
+    if n == 0:
+        return 0.0, math.inf
+    srednia = statistics.fmean(wartosci)
+    if n == 1:
+        return srednia, math.inf
+    polowa = kwantyl_t(0.5 + poziom / 2, n - 1) * statistics.stdev(wartosci) / math.sqrt(n)
+    return srednia, polowa
+
+
+class CalkaCzasowa:
+    """Całka wielkości po czasie symulacji (średnia ważona czasem), aktualizacja w O(1)."""
+
+    __slots__ = ('wartosc', 'calka', 'ostatnia_zmiana', 'czas_startu', 'maksimum')
+
+    def __init__(self, czas_startu: float = 0.0, wartosc: float = 0.0):
+        self.wartosc = wartosc
+        self.calka = 0.0
+        self.ostatnia_zmiana = czas_startu
+        self.czas_startu = czas_startu
+        self.maksimum = wartosc
+
+    def zmien(self, teraz: float, delta: float):
+        self.calka += self.wartosc * (teraz - self.ostatnia_zmiana)
+        self.ostatnia_zmiana = teraz
+        self.wartosc += delta
+        if self.wartosc > self.maksimum:
+            self.maksimum = self.wartosc
+
+    def calka_do(self, teraz: float) -> float:
+        return self.calka + self.wartosc * (teraz - self.ostatnia_zmiana)
+
+    def srednia(self, teraz: float) -> float:
+        czas = teraz - self.czas_startu
+        if czas <= 0:
+            return self.wartosc
+        return self.calka_do(teraz) / czas
+
+
 class StatystykiSymulacji:
 
     def __init__(self):
-        self.czasy_realizacji = []
-        self.czasy_oczekiwania_a_b = []
+        self.czas_realizacji = AkumulatorStrumieniowy()
+        self.czas_oczekiwania_a_b = AkumulatorStrumieniowy()
         self.elementy_ukonczone = 0
-
-    def resetuj(self):
-        self.czasy_realizacji = []
-        self.czasy_oczekiwania_a_b = []
+        # Czasy realizacji w podziale na typy produktów
+        self.czas_realizacji_typu: Dict[str, AkumulatorStrumieniowy] = {}
+        # Liczba elementów w systemie (WIP) w funkcji czasu
+        self.wip = CalkaCzasowa()
+        # Wylosowane wejścia każdego typu: [liczba przybyć, suma odstępów, suma czasów A, suma czasów B]
+        # (zmienne kontrolne o znanych wartościach oczekiwanych)
+        self.wejscia_typu: Dict[str, List[float]] = {}
+
+    def resetuj(self, teraz: float):
+        """Początek okresu pomiarowego w chwili `teraz` (np. po rozbiegu) w trakcie przebiegu.
+
+        Zarejestrowane typy produktów zostają (z pustymi akumulatorami), a WIP
+        zachowuje bieżący poziom - elementy obecne w systemie nadal go zmniejszą.
+        """
+        self.czas_realizacji = AkumulatorStrumieniowy()
+        self.czas_oczekiwania_a_b = AkumulatorStrumieniowy()
         self.elementy_ukonczone = 0
+        self.czas_realizacji_typu = {nazwa: AkumulatorStrumieniowy()
+                                     for nazwa in self.czas_realizacji_typu}
+        self.wip = CalkaCzasowa(teraz, self.wip.wartosc)
+        # Zerowane w miejscu - źródło przybyć typu trzyma referencję do listy
+        for wejscia in self.wejscia_typu.values():
+            wejscia[:] = [0, 0.0, 0.0, 0.0]
+
+
+# STRUMIENIE LICZB LOSOWYCH
+
+class GeneratorAntytetyczny(random.Random):
+    """Generator zwracający 1 - U w miejsce U - przebieg antytetyczny do przebiegu
+    z random.Random o tym samym seedzie (uniform i expovariate korzystają z random())."""
+
+    def random(self) -> float:
+        return 1.0 - super().random()
+
+
+class SekwencjaSeedow:
+    """Hierarchia seedów: główny -> replikacja -> strumień (wzorem SeedSequence z numpy).
+
+    Węzeł to entropia główna i ścieżka kluczy potomków, a jego stan to skrót BLAKE2b
+    z obu - każdy węzeł (np. replikację j albo strumień awarii maszyny A_2) można
+    odtworzyć samodzielnie, w dowolnej kolejności i na dowolnym procesie, bez
+    generowania poprzednich. Różne ścieżki dają niezależne (kryptograficznie
+    rozproszone) stany generatorów.
+    """
+
+    def __init__(self, entropia: Optional[int] = None, klucz: Sequence = ()):
+        self.entropia = random.SystemRandom().getrandbits(128) if entropia is None else entropia
+        self.klucz = tuple(klucz)
+
+    def potomek(self, klucz) -> 'SekwencjaSeedow':
+        return SekwencjaSeedow(self.entropia, self.klucz + (klucz,))
+
+    def potomkowie(self, liczba: int, start: int = 0) -> List['SekwencjaSeedow']:
+        return [self.potomek(i) for i in range(start, start + liczba)]
+
+    def stan(self, bity: int = 256, *dodatkowe) -> int:
+        tekst = json.dumps([self.entropia, self.klucz, dodatkowe], separators=(',', ':'))
+        skrot = hashlib.blake2b(tekst.encode('utf-8'), digest_size=(bity + 7) // 8,
+                                person=b'SekwencjaSeedow')
+        return int.from_bytes(skrot.digest(), 'little') >> (-bity % 8)
+
+    def generator(self, klasa=random.Random) -> random.Random:
+        return klasa(self.stan())
+
+    def permutacja(self, x: int, bity: int = 52, rundy: int = 4) -> int:
+        """Bijekcja na [0, 2^bity) zależna od węzła (sieć Feistela) - różne x dają
+        zawsze różne wyniki, więc seedy wyprowadzone z kolejnych indeksów nie kolidują."""
+        polowa = bity // 2
+        maska = (1 << polowa) - 1
+        lewa, prawa = x >> polowa, x & maska
+        for runda in range(rundy):
+            lewa, prawa = prawa, lewa ^ self.stan(polowa, runda, prawa)
+        return (lewa << polowa) | prawa
+
+
+class StrumienieLosowe:
+    """Osobny generator dla każdego źródła losowości: przybycia typu, czasy obsługi
+    etapów A i B, awarie każdej maszyny.
+
+    Przy wspólnym generatorze zmiana jednego parametru przesuwa wszystkie kolejne
+    losowania; przy osobnych strumieniach ta sama wartość U trafia do tego samego
+    zdarzenia, co synchronizuje wspólne liczby losowe i pary antytetyczne.
+    Strumień to potomek seeda replikacji w SekwencjaSeedow (seed -> nazwa strumienia).
+    """
+
+    def __init__(self, seed: Optional[int] = None, antytetyczne: bool = False):
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.antytetyczne = antytetyczne
+        self.sekwencja = SekwencjaSeedow(self.seed)
+        self._generatory: Dict[str, random.Random] = {}
+
+    def __call__(self, nazwa: str) -> random.Random:
+        generator = self._generatory.get(nazwa)
+        if generator is None:
+            klasa = GeneratorAntytetyczny if self.antytetyczne else random.Random
+            generator = self._generatory[nazwa] = self.sekwencja.potomek(nazwa).generator(klasa)
+        return generator
+
+
+# ŚLAD PRZEBIEGU (zapis i odtwarzanie liczb losowych oraz zdarzeń, slad.py)
+
+# Rodzaje zdarzeń śladu (kod w zapisie = indeks)
+ZDARZENIA_SLADU = ('przybycie', 'start', 'koniec', 'wyjscie', 'stan')
+PRZYBYCIE, START, KONIEC, WYJSCIE, STAN = range(len(ZDARZENIA_SLADU))
+
+
+class WyczerpanySlad(ValueError):
+    """Odtwarzany przebieg zużywa więcej liczb losowych strumienia, niż zapisano."""
+
+
+class GeneratorRejestrujacy(random.Random):
+    """Przekazuje liczby U generatora źródłowego i zapisuje każdą (wszystkie rozkłady
+    random.Random losują przez random(), więc zapis obejmuje każdą zmienną losową)."""
+
+    def __init__(self, zrodlo, zapis: array):
+        super().__init__()
+        self.zrodlo = zrodlo
+        self.zapis = zapis
+
+    def random(self) -> float:
+        u = self.zrodlo.random()
+        self.zapis.append(u)
+        return u
+
+
+class GeneratorOdtwarzajacy(random.Random):
+    """Zwraca kolejno zapisane liczby U strumienia."""
+
+    def __init__(self, nazwa: str, wartosci: Sequence[float]):
+        super().__init__(0)
+        self.nazwa = nazwa
+        self.wartosci = wartosci
+        self.pozycja = 0
+
+    def random(self) -> float:
+        if self.pozycja >= len(self.wartosci):
+            raise WyczerpanySlad(f"Strumień {self.nazwa!r}: zapisano tylko {len(self.wartosci)} liczb")
+        u = self.wartosci[self.pozycja]
+        self.pozycja += 1
+        return u
+
+
+class DziennikZdarzen:
+    """Ślad przebiegu: liczby U zużyte przez każdy strumień i zdarzenia (kolumny array).
+
+    Bez `odtwarzane` strumienie modelu są opakowane generatorami rejestrującymi
+    (przebieg jak bez dziennika); z `odtwarzane` ({strumień: liczby U}) model losuje
+    wyłącznie zapisane liczby. Przy wspólnym generatorze modułu random (bez
+    StrumienieLosowe) jest jeden strumień 'random'.
+    """
+
+    def __init__(self, odtwarzane: Optional[Dict[str, Sequence[float]]] = None):
+        self.odtwarzane = odtwarzane
+        self.liczby: Dict[str, array] = {}
+        self.generatory: Dict[str, random.Random] = {}
+        self.maszyny: List[str] = []
+        self._indeksy_maszyn: Dict[str, int] = {}
+        self.srodowisko: Optional[simpy.Environment] = None
+        self.czasy = array('d')
+        self.rodzaje = array('b')
+        self.elementy = array('q')
+        self.numery_maszyn = array('h')
+        self.stany = array('b')
+
+    def strumien(self, nazwa: str, zrodlo) -> random.Random:
+        generator = self.generatory.get(nazwa)
+        if generator is None:
+            if self.odtwarzane is None:
+                generator = GeneratorRejestrujacy(zrodlo, self.liczby.setdefault(nazwa, array('d')))
+            else:
+                generator = GeneratorOdtwarzajacy(nazwa, self.odtwarzane.get(nazwa, ()))
+            self.generatory[nazwa] = generator
+        return generator
+
+    def liczba_losowan(self) -> Dict[str, int]:
+        if self.odtwarzane is None:
+            return {nazwa: len(zapis) for nazwa, zapis in self.liczby.items()}
+        return {nazwa: generator.pozycja for nazwa, generator in self.generatory.items()}
+
+    def dodaj_maszyne(self, maszyna: 'ZasobProdukcyjny'):
+        self._indeksy_maszyn[maszyna.nazwa] = len(self.maszyny)
+        self.maszyny.append(maszyna.nazwa)
+        maszyna.dziennik = self
+
+    def zdarzenie(self, rodzaj: int, element: int = -1,
+                  maszyna: Optional['ZasobProdukcyjny'] = None, stan: int = -1):
+        self.czasy.append(self.srodowisko.now)
+        self.rodzaje.append(rodzaj)
+        self.elementy.append(element)
+        self.numery_maszyn.append(-1 if maszyna is None else self._indeksy_maszyn[maszyna.nazwa])
+        self.stany.append(stan)
+
+    def __len__(self) -> int:
+        return len(self.czasy)
+
+
+# PROFILE PRZYBYĆ
+
+class ProfilStacjonarny:
+    """Model z Etapu I: średnia losowana z zakresu dla każdego przybycia, odstęp wykładniczy."""
+
+    def __init__(self, zakres_lambda: Tuple[float, float]):
+        self.zakres_lambda = zakres_lambda
+
+    def odstepy(self, czas_startu: float, losowe=random) -> Iterator[float]:
+        while True:
+            srednia_miedzy_przybyciami = losowe.uniform(*self.zakres_lambda)
+            yield losowe.expovariate(1.0 / srednia_miedzy_przybyciami)
+
+
+class ProfilDeterministyczny:
+    """Przybycia w stałych odstępach, bez losowania (np. przypadki weryfikacyjne)."""
+
+    def __init__(self, odstep: float):
+        self.odstep = odstep
+
+    def odstepy(self, czas_startu: float, losowe=random) -> Iterator[float]:
+        while True:
+            yield self.odstep
+
+
+class ProfilOdcinkowy:
+    """Niestacjonarny proces Poissona generowany metodą przerzedzania (Lewis-Shedler).
+
+    `punkty` to pary (czas [min], średni czas między przybyciami [min]) posortowane
+    po czasie, pierwszy punkt w chwili 0; `math.inf` oznacza brak przybyć (np. weekend).
+    Intensywność jest stała na odcinkach (zmiany) albo interpolowana liniowo
+    między punktami (rampy). Przy podanym `okres` profil się powtarza (np. 10080 min = tydzień).
+    """
+
+    def __init__(self, punkty: Sequence[Tuple[float, float]],
+                 okres: Optional[float] = None, liniowy: bool = False):
+        if not punkty or punkty[0][0] != 0:
+            raise ValueError("Profil musi zaczynać się punktem w chwili 0")
+        self.czasy = [float(czas) for czas, _ in punkty]
+        if any(t2 <= t1 for t1, t2 in zip(self.czasy, self.czasy[1:])):
+            raise ValueError("Czasy punktów profilu muszą być rosnące")
+        if okres is not None and okres <= self.czasy[-1]:
+            raise ValueError("Okres profilu musi być dłuższy niż czas ostatniego punktu")
+
+        self.intensywnosci = [0.0 if srednia == math.inf else 1.0 / srednia
+                              for _, srednia in punkty]
+        self.okres = okres
+        self.liniowy = liniowy
+        self.intensywnosc_max = max(self.intensywnosci)
+
+    def intensywnosc(self, t: float) -> float:
+        if self.okres is not None:
+            t %= self.okres
+        i = bisect_right(self.czasy, t) - 1
+        if not self.liniowy:
+            return self.intensywnosci[i]
+
+        # Rampa do kolejnego punktu (przy profilu okresowym - do początku następnego okresu)
+        if i + 1 < len(self.czasy):
+            t_nast, l_nast = self.czasy[i + 1], self.intensywnosci[i + 1]
+        elif self.okres is not None:
+            t_nast, l_nast = self.okres, self.intensywnosci[0]
+        else:
+            return self.intensywnosci[i]
+        udzial = (t - self.czasy[i]) / (t_nast - self.czasy[i])
+        return self.intensywnosci[i] + udzial * (l_nast - self.intensywnosci[i])
+
+    def _zerowy_odcinek(self, i: int) -> bool:
+        # Czy intensywność jest zerowa na całym odcinku od punktu i do następnego
+        if self.intensywnosci[i] > 0:
+            return False
+        if not self.liniowy:
+            return True
+        if i + 1 < len(self.czasy):
+            return self.intensywnosci[i + 1] <= 0
+        return self.okres is None or self.intensywnosci[0] <= 0
+
+    def poczatek_przybyc(self, t: float) -> Optional[float]:
+        """Najwcześniejsza chwila >= t poza odcinkami bez przybyć; None - przybyć już nie będzie."""
+        przesuniecie = 0.0
+        if self.okres is not None:
+            przesuniecie = t - t % self.okres
+            t -= przesuniecie
+        i = bisect_right(self.czasy, t) - 1
+        while self._zerowy_odcinek(i):
+            if i + 1 < len(self.czasy):
+                i += 1
+            elif self.okres is None:
+                return None
+            else:
+                przesuniecie += self.okres
+                i = 0
+            t = self.czasy[i]
+        return przesuniecie + t
+
+    def odstepy(self, czas_startu: float, losowe=random) -> Iterator[float]:
+        intensywnosc_max = self.intensywnosc_max
+        if intensywnosc_max <= 0:
+            return
+
+        t = ostatnie = czas_startu
+        while True:
+            # Kandydat z procesu o stałej intensywności maksymalnej, akceptacja z p = λ(t)/λmax
+            t += losowe.expovariate(intensywnosc_max)
+            intensywnosc = self.intensywnosc(t)
+            if intensywnosc <= 0:
+                # Odcinek bez przybyć przeskakiwany w całości (proces Poissona jest bez pamięci),
+                # a nie odrzucany kandydat po kandydacie; po ostatnim punkcie - koniec przybyć
+                t = self.poczatek_przybyc(t)
+                if t is None:
+                    return
+                continue
+            if losowe.random() * intensywnosc_max < intensywnosc:
+                yield t - ostatnie
+                ostatnie = t
+
+
+class ProfilZPliku:
+    """Odtworzenie zarejestrowanych chwil przybyć, czytanych z pliku leniwie wiersz po wierszu.
+
+    Plik tekstowy/CSV: znacznik czasu w pierwszej kolumnie, wiersze puste i komentarze (#)
+    są pomijane, podobnie jak nienumeryczny nagłówek. Czas w symulacji to
+    (znacznik - przesuniecie) * skala, np. skala=1/60 dla znaczników w sekundach.
+    """
+
+    def __init__(self, sciezka: str, skala: float = 1.0, przesuniecie: float = 0.0):
+        self.sciezka = sciezka
+        self.skala = skala
+        self.przesuniecie = przesuniecie
+
+    def odstepy(self, czas_startu: float, losowe=random) -> Iterator[float]:
+        poprzedni = czas_startu
+        wczytano = False
+        with open(self.sciezka, encoding='utf-8') as plik:
+            for numer_wiersza, wiersz in enumerate(plik, 1):
+                wiersz = wiersz.split('#', 1)[0].strip()
+                if not wiersz:
+                    continue
+                pola = wiersz.replace(';', ',').split(',', 1)[0].split(None, 1)
+                if not pola:
+                    continue  # pusta pierwsza kolumna
+                pole = pola[0]
+                try:
+                    znacznik = float(pole)
+                except ValueError:
+                    if wczytano:
+                        raise ValueError(f"{self.sciezka}:{numer_wiersza}: niepoprawny znacznik czasu {pole!r}")
+                    continue  # nagłówek
+
+                wczytano = True
+                czas = (znacznik - self.przesuniecie) * self.skala
+                if czas < poprzedni:
+                    raise ValueError(f"{self.sciezka}:{numer_wiersza}: znaczniki czasu muszą być niemalejące")
+                yield czas - poprzedni
+                poprzedni = czas
+
+
+class TypProduktu:
+    """Rodzina produktów z własnym strumieniem przybyć, czasami obsługi, priorytetem i marszrutą.
+
+    Niższa wartość priorytetu oznacza pierwszeństwo w kolejce do maszyny.
+    `maszyny_a` / `maszyny_b` to indeksy maszyn dopuszczonych dla typu (None - wszystkie).
+    `profil` określa przybycia (domyślnie ProfilStacjonarny z `zakres_lambda`).
+    """
+
+    def __init__(self, nazwa: str,
+                 zakres_lambda: Tuple[float, float],
+                 zakres_czasu_a: Tuple[float, float],
+                 zakres_czasu_b: Tuple[float, float],
+                 priorytet: int = 0,
+                 maszyny_a: Optional[Sequence[int]] = None,
+                 maszyny_b: Optional[Sequence[int]] = None,
+                 profil=None):
+        self.nazwa = nazwa
+        self.zakres_lambda = zakres_lambda
+        self.zakres_czasu_a = zakres_czasu_a
+        self.zakres_czasu_b = zakres_czasu_b
+        self.priorytet = priorytet
+        if maszyny_a is not None and not len(maszyny_a):
+            raise ValueError(f"Typ {nazwa!r}: pusta lista maszyn_a (None - wszystkie maszyny)")
+        if maszyny_b is not None and not len(maszyny_b):
+            raise ValueError(f"Typ {nazwa!r}: pusta lista maszyn_b (None - wszystkie maszyny)")
+        self.maszyny_a = maszyny_a
+        self.maszyny_b = maszyny_b
+        self.profil = profil if profil is not None else ProfilStacjonarny(zakres_lambda)
+
+
+def domyslne_typy_produktow() -> List[TypProduktu]:
+    # Jeden typ odpowiadający parametrom globalnym (model z Etapu I)
+    return [TypProduktu('standard', ZAKRES_LAMBDA, ZAKRES_CZASU_A, ZAKRES_CZASU_B)]
+
+
+# MODELE AWARII
+
+class ModelAwarii(ABC):
+    """Rozkład czasu do awarii (po naprawie maszyna jest jak nowa).
+
+    wedlug_czasu_pracy=False - czas odliczany w czasie kalendarzowym, True - tylko
+    w czasie przetwarzania (zużycie zależne od obciążenia). Awaria w czasie pracy
+    jest planowana jednym zdarzeniem na starcie przetwarzania, w którym wyczerpuje się
+    pozostały czas pracy - bez odpytywania, liczba zdarzeń rośnie tylko z liczbą awarii.
+    """
+
+    wedlug_czasu_pracy = False
+
+    @abstractmethod
+    def czas_do_awarii(self, losowe) -> float:
+        ...
+
+    @abstractmethod
+    def srednia_do_awarii(self) -> float:
+        ...
+
+
+class AwarieWykladnicze(ModelAwarii):
+    """Model z Etapu I: MTBF losowany z zakresu, czas do awarii wykładniczy."""
+
+    def __init__(self, zakres_mtbf: Tuple[float, float], wedlug_czasu_pracy: bool = False):
+        self.zakres_mtbf = zakres_mtbf
+        self.wedlug_czasu_pracy = wedlug_czasu_pracy
+
+    def czas_do_awarii(self, losowe) -> float:
+        srednia_mtbf = losowe.uniform(*self.zakres_mtbf)
+        return losowe.expovariate(1.0 / srednia_mtbf)
+
+    def srednia_do_awarii(self) -> float:
+        return (self.zakres_mtbf[0] + self.zakres_mtbf[1]) / 2
+
+
+class AwarieWeibulla(ModelAwarii):
+    """Czas do awarii Weibulla; ksztalt > 1 - zużycie (intensywność awarii rośnie z wiekiem)."""
+
+    def __init__(self, ksztalt: float, skala: float, wedlug_czasu_pracy: bool = False):
+        self.ksztalt = ksztalt
+        self.skala = skala
+        self.wedlug_czasu_pracy = wedlug_czasu_pracy
+
+    def czas_do_awarii(self, losowe) -> float:
+        return losowe.weibullvariate(self.skala, self.ksztalt)
+
+    def srednia_do_awarii(self) -> float:
+        return self.skala * math.gamma(1 + 1 / self.ksztalt)
+
+
+class AwarieLogNormalne(ModelAwarii):
+    """Czas do awarii logarytmicznie normalny (mu, sigma logarytmu czasu)."""
+
+    def __init__(self, mu: float, sigma: float, wedlug_czasu_pracy: bool = False):
+        self.mu = mu
+        self.sigma = sigma
+        self.wedlug_czasu_pracy = wedlug_czasu_pracy
+
+    def czas_do_awarii(self, losowe) -> float:
+        return losowe.lognormvariate(self.mu, self.sigma)
+
+    def srednia_do_awarii(self) -> float:
+        return math.exp(self.mu + self.sigma ** 2 / 2)
+
+
+# Kolejność obsługi zgłoszeń napraw przez ekipę (klucz wyboru: najmniejszy)
+#   fifo          - w kolejności awarii
+#   waskie_gardlo - najpierw maszyna z najdłuższą kolejką elementów (w chwili wyboru)
+#   najkrotsza    - najpierw najkrótsza naprawa (czas losowany w chwili awarii)
+POLITYKI_NAPRAW = ('fifo', 'waskie_gardlo', 'najkrotsza')
+
+
+class EkipaNaprawcza:
+    """Ograniczona liczba techników wspólna dla maszyn; zepsuta maszyna czeka na wolnego
+    technika, a kolejkę porządkuje polityka napraw. Sterowana wywołaniami zwrotnymi."""
+
+    def __init__(self, srodowisko: simpy.Environment, liczba_technikow: int,
+                 polityka: str = 'fifo'):
+        if liczba_technikow < 1:
+            raise ValueError("Ekipa naprawcza wymaga co najmniej jednego technika")
+        if polityka not in POLITYKI_NAPRAW:
+            raise ValueError(f"Nieznana polityka napraw: {polityka!r} "
+                             f"(dostępne: {', '.join(POLITYKI_NAPRAW)})")
+        self.srodowisko = srodowisko
+        self.liczba_technikow = liczba_technikow
+        self.polityka = polityka
+        self.wolni = liczba_technikow
+        # Zgłoszenia: (numer, chwila zgłoszenia, maszyna, zdarzenie końca, czas naprawy)
+        self.oczekujace = []
+        self._numery = count()
+        # Statystyki: zajęci technicy, długość kolejki i czas oczekiwania na technika
+        self.zajeci = CalkaCzasowa(srodowisko.now)
+        self.kolejka = CalkaCzasowa(srodowisko.now)
+        self.czas_oczekiwania = AkumulatorStrumieniowy()
+
+    def napraw(self, maszyna: 'ZasobProdukcyjny', czas_naprawy: float) -> simpy.Event:
+        """Zdarzenie wyzwalane po naprawie (oczekiwanie na technika + czas naprawy)."""
+        koniec = self.srodowisko.event()
+        zgloszenie = (next(self._numery), self.srodowisko.now, maszyna, koniec, czas_naprawy)
+        if self.wolni:
+            self._rozpocznij(zgloszenie)
+        else:
+            self.oczekujace.append(zgloszenie)
+            self.kolejka.zmien(self.srodowisko.now, 1)
+        return koniec
+
+    def _klucz(self, zgloszenie: tuple):
+        numer, _, maszyna, _, czas_naprawy = zgloszenie
+        if self.polityka == 'waskie_gardlo':
+            return -maszyna.kolejka.wartosc, numer
+        if self.polityka == 'najkrotsza':
+            return czas_naprawy, numer
+        return numer
+
+    def _rozpocznij(self, zgloszenie: tuple):
+        teraz = self.srodowisko.now
+        _, zgloszono, _, koniec, czas_naprawy = zgloszenie
+        self.wolni -= 1
+        self.zajeci.zmien(teraz, 1)
+        self.czas_oczekiwania.dodaj(teraz - zgloszono)
+        self.srodowisko.timeout(czas_naprawy).callbacks.append(
+            lambda _zdarzenie: self._zakoncz(koniec))
+
+    def _zakoncz(self, koniec: simpy.Event):
+        teraz = self.srodowisko.now
+        self.wolni += 1
+        self.zajeci.zmien(teraz, -1)
+        koniec.succeed()
+        if self.oczekujace:
+            # Kolejka jest krótka (co najwyżej liczba maszyn) - wybór liniowy
+            wybrane = min(self.oczekujace, key=self._klucz)
+            self.oczekujace.remove(wybrane)
+            self.kolejka.zmien(teraz, -1)
+            self._rozpocznij(wybrane)
+
+    def raport(self, teraz: float) -> Dict:
+        czas = teraz - self.zajeci.czas_startu
+        oczekiwanie = self.czas_oczekiwania
+        return {
+            'liczba_technikow': self.liczba_technikow,
+            'polityka': self.polityka,
+            'wykorzystanie_procent': (self.zajeci.calka_do(teraz) / (czas * self.liczba_technikow)
+                                      * 100 if czas > 0 else 0.0),
+            'liczba_napraw': oczekiwanie.n,
+            'sredni_czas_oczekiwania': oczekiwanie.srednia if oczekiwanie.n else 0.0,
+            'maksymalny_czas_oczekiwania': oczekiwanie.maksimum if oczekiwanie.n else 0.0,
+            'srednia_dlugosc_kolejki': self.kolejka.srednia(teraz),
+            'maksymalna_dlugosc_kolejki': self.kolejka.maksimum
+        }
+
+
+# Stany maszyny (czas w każdym stanie sumowany przy zmianach stanu, suma = czas symulacji)
+#   bezczynna          - sprawna, bez elementu
+#   przetwarzanie      - sprawna, przetwarza element
+#   awaria             - w naprawie, bez elementu
+#   awaria_z_elementem - w naprawie z zajętym elementem
+#   zablokowana        - sprawna, przetworzony element czeka na miejsce w buforze A->B
+STANY_MASZYNY = ('bezczynna', 'przetwarzanie', 'awaria', 'awaria_z_elementem', 'zablokowana')
 
 
 class ZasobProdukcyjny:
@@ -42,76 +710,427 @@ class ZasobProdukcyjny:
     def __init__(self, srodowisko: simpy.Environment, nazwa: str,
                  zakres_czasu_przetwarzania: Tuple[float, float],
                  zakres_czasu_naprawy: Tuple[float, float],
-                 zakres_mtbf: Tuple[float, float]):
+                 zakres_mtbf: Tuple[float, float],
+                 z_priorytetami: bool = False,
+                 losowe=random,
+                 model_awarii: Optional[ModelAwarii] = None,
+                 ekipa: Optional[EkipaNaprawcza] = None):
         self.srodowisko = srodowisko
         self.nazwa = nazwa
-        self.zasob = simpy.Resource(srodowisko, capacity=1)
+        self.losowe = losowe  # generator czasów awarii i napraw
+        self.probkowanie_napraw = None  # próbkowanie ważone czasów napraw (rzadkie.py)
+        # Bez modelu - model z Etapu I (wykładniczy w czasie kalendarzowym)
+        self.model_awarii = AwarieWykladnicze(zakres_mtbf) if model_awarii is None else model_awarii
+        self.ekipa = ekipa  # None - każda maszyna ma własnego technika
+        # Kolejka priorytetowa tylko gdy typy produktów mają różne priorytety
+        # (zwykły Resource jest szybszy)
+        if z_priorytetami:
+            self.zasob = simpy.PriorityResource(srodowisko, capacity=1)
+        else:
+            self.zasob = simpy.Resource(srodowisko, capacity=1)
+        self.z_priorytetami = z_priorytetami
         self.zakres_czasu_przetwarzania = zakres_czasu_przetwarzania
         self.zakres_czasu_naprawy = zakres_czasu_naprawy
         self.zakres_mtbf = zakres_mtbf
 
         # Statystyki
-        self.czas_pracy_sumaryczny = 0.0
-        self.czas_naprawy_sumaryczny = 0.0
         self.liczba_awarii = 0
 
         # Stan maszyny
         self.zepsuta = False
-        self.ostatnia_zmiana_stanu = srodowisko.now
+        self.zajeta = False  # element zajmuje maszynę (od przydziału do zwolnienia)
+        self.zablokowana = False  # przetworzony element nie może opuścić maszyny
+        self.koniec_naprawy = None  # zdarzenie wyzwalane po zakończeniu bieżącej naprawy
+
+        # Zegar czasu pracy (model awarii według czasu pracy)
+        self.zegar_pracy = self.model_awarii.wedlug_czasu_pracy
+        self._praca_od = None  # początek odliczanego odcinka bieżącego przetwarzania
+        self._praca_do = None  # planowany koniec bieżącego przetwarzania
+        self._pozostala_praca = None  # czas pracy do awarii (None - nie jest odliczany)
+        self._awaria_pracy = None  # zdarzenie awarii po wyczerpaniu czasu pracy
+
+        # Czas w poszczególnych stanach i długość kolejki (całki po czasie)
+        self.stan = 'bezczynna'
+        self.poczatek_stanu = srodowisko.now
+        self.czasy_stanow = dict.fromkeys(STANY_MASZYNY, 0.0)
+        self.kolejka = CalkaCzasowa(srodowisko.now)
+        self.detektor_waskiego_gardla = None
+        self.dziennik = None  # ślad przebiegu (DziennikZdarzen)
+
+        # Obsługa zleceń-rekordów (silnik 'rekordy'): własna kolejka zamiast zasob.request()
+        self.oczekujace = [] if z_priorytetami else deque()
+        self.obslugiwane: Optional['Zlecenie'] = None
+        self.po_obsludze = None  # wywoływane (maszyna, rekord) po zakończeniu przetwarzania
+        self.po_zwolnieniu = None  # wywoływane, gdy element opuścił maszynę
+        self._kolejnosc = count()
 
         # Proces awarii w tle
         self.srodowisko.process(self._proces_awarii())
 
+    def _aktualizuj_stan(self):
+        teraz = self.srodowisko.now
+        self.czasy_stanow[self.stan] += teraz - self.poczatek_stanu
+        self.poczatek_stanu = teraz
+        poprzedni = self.stan
+        byla_aktywna = self.stan not in ('bezczynna', 'zablokowana')
+        if self.zepsuta:
+            self.stan = 'awaria_z_elementem' if self.zajeta else 'awaria'
+        elif self.zablokowana:
+            self.stan = 'zablokowana'
+        elif self.zajeta:
+            self.stan = 'przetwarzanie'
+        else:
+            self.stan = 'bezczynna'
+        if self.dziennik is not None and self.stan != poprzedni:
+            self.dziennik.zdarzenie(STAN, -1, self, STANY_MASZYNY.index(self.stan))
+
+        # Początek / koniec okresu aktywności (każdy stan poza bezczynnością i blokadą)
+        aktywna = self.stan not in ('bezczynna', 'zablokowana')
+        if aktywna != byla_aktywna and self.detektor_waskiego_gardla is not None:
+            self.detektor_waskiego_gardla.zmiana_aktywnosci(self, aktywna, teraz)
+
+    def czasy_w_stanach(self) -> Dict[str, float]:
+        # Łącznie z bieżącym, jeszcze niezamkniętym pobytem w stanie
+        czasy = dict(self.czasy_stanow)
+        czasy[self.stan] += self.srodowisko.now - self.poczatek_stanu
+        return czasy
+
+    @property
+    def czas_pracy_sumaryczny(self) -> float:
+        return self.czasy_w_stanach()['przetwarzanie']
+
+    @property
+    def czas_naprawy_sumaryczny(self) -> float:
+        czasy = self.czasy_w_stanach()
+        return czasy['awaria'] + czasy['awaria_z_elementem']
+
+    # Zegar czasu pracy: odcinek przetwarzania jest znany z góry, więc awaria w jego
+    # trakcie jest planowana jednym zdarzeniem na starcie odcinka
+
+    def _start_pracy(self, czas: float):
+        teraz = self.srodowisko.now
+        self._praca_od, self._praca_do = teraz, teraz + czas
+        self._planuj_awarie_pracy()
+
+    def _koniec_pracy(self):
+        if self._pozostala_praca is not None and self._praca_od is not None:
+            self._pozostala_praca -= self.srodowisko.now - self._praca_od
+        self._praca_od = None
+
+    def _planuj_awarie_pracy(self):
+        if self._pozostala_praca is None or self._praca_od is None:
+            return
+        teraz = self.srodowisko.now
+        if self._praca_do - teraz >= self._pozostala_praca:
+            self.srodowisko.timeout(self._pozostala_praca).callbacks.append(self._wyczerpana_praca)
+            self._pozostala_praca = None
+
+    def _wyczerpana_praca(self, _zdarzenie):
+        self._awaria_pracy.succeed()
+
     def _proces_awarii(self):
 
         while True:
             try:
-                # Losowanie czasu do następnej awarii
-                # MTBF jest losowany z rozkładu jednostajnego, a czas awarii z wykładniczego
-
-                srednia_mtbf = random.uniform(*self.zakres_mtbf)
-                czas_do_awarii = random.expovariate(1.0 / srednia_mtbf)
-                yield self.srodowisko.timeout(czas_do_awarii)
+                # Losowanie czasu do następnej awarii (model z Etapu I: MTBF z rozkładu
+                # jednostajnego, czas do awarii z wykładniczego)
+                czas_do_awarii = self.model_awarii.czas_do_awarii(self.losowe)
+                if self.zegar_pracy:
+                    # Odliczanie tylko w czasie przetwarzania (także bieżącego odcinka)
+                    self._awaria_pracy = self.srodowisko.event()
+                    self._pozostala_praca = czas_do_awarii
+                    if self._praca_od is not None:
+                        self._praca_od = self.srodowisko.now
+                        self._planuj_awarie_pracy()
+                    yield self._awaria_pracy
+                else:
+                    yield self.srodowisko.timeout(czas_do_awarii)
 
                 # Awaria - aktualizacja statystyk
                 self.zepsuta = True
+                self.koniec_naprawy = self.srodowisko.event()
+                self._aktualizuj_stan()
                 self.liczba_awarii += 1
-                self.czas_pracy_sumaryczny += self.srodowisko.now - self.ostatnia_zmiana_stanu
-                self.ostatnia_zmiana_stanu = self.srodowisko.now
 
                 # Losowanie czasu naprawy
                 # MTTR jest losowany z rozkładu jednostajnego, a czas naprawy z wykładniczego
 
-                sredni_mttr = random.uniform(*self.zakres_czasu_naprawy)
-                czas_naprawy = random.expovariate(1.0 / sredni_mttr)
-                yield self.srodowisko.timeout(czas_naprawy)
+                if self.probkowanie_napraw is None:
+                    sredni_mttr = self.losowe.uniform(*self.zakres_czasu_naprawy)
+                    czas_naprawy = self.losowe.expovariate(1.0 / sredni_mttr)
+                else:
+                    czas_naprawy = self.probkowanie_napraw.czas_naprawy(self.losowe,
+                                                                        self.zakres_czasu_naprawy)
+                if self.ekipa is None:
+                    yield self.srodowisko.timeout(czas_naprawy)
+                else:
+                    # Wspólna ekipa: oczekiwanie na technika, potem naprawa
+                    yield self.ekipa.napraw(self, czas_naprawy)
 
                 # Koniec naprawy - aktualizacja statystyk
                 self.zepsuta = False
-                self.czas_naprawy_sumaryczny += self.srodowisko.now - self.ostatnia_zmiana_stanu
-                self.ostatnia_zmiana_stanu = self.srodowisko.now
+                self._aktualizuj_stan()
+                self.koniec_naprawy.succeed()
 
             except simpy.Interrupt:
                 # Obsługa przerwania symulacji
                 break
 
-    def uzyj_zasobu(self, id_elementu: int, czas_przetwarzania: float):
+    def uzyj_zasobu(self, id_elementu: int, czas_przetwarzania: float, priorytet: int = 0):
+
+        if self.z_priorytetami:
+            zadanie = self.zasob.request(priority=priorytet)
+        else:
+            zadanie = self.zasob.request()
 
-        with self.zasob.request() as req:
+        self.kolejka.zmien(self.srodowisko.now, 1)
+        with zadanie as req:
             # Oczekiwanie na dostępność maszyny
             yield req
+            self.kolejka.zmien(self.srodowisko.now, -1)
+            self.zajeta = True
+            self._aktualizuj_stan()
 
             # Oczekiwanie na naprawę jeśli maszyna jest zepsuta
-            while self.zepsuta:
-                yield self.srodowisko.timeout(1)  # Czekaj 1 minutę i sprawdź ponownie
-
-            # Rozpoczęcie przetwarzania
-            start = self.srodowisko.now
+            # (wznowienie dokładnie w chwili końca naprawy, bez odpytywania co minutę)
+            if self.zepsuta:
+                yield self.koniec_naprawy
+
+            # Przetwarzanie
+            if self.dziennik is not None:
+                self.dziennik.zdarzenie(START, id_elementu, self)
+            if self.zegar_pracy:
+                self._start_pracy(czas_przetwarzania)
             yield self.srodowisko.timeout(czas_przetwarzania)
-            koniec = self.srodowisko.now
-
-            # Aktualizacja statystyk czasu pracy
-            self.czas_pracy_sumaryczny += koniec - start
+            if self.zegar_pracy:
+                self._koniec_pracy()
+            if self.dziennik is not None:
+                self.dziennik.zdarzenie(KONIEC, id_elementu, self)
+
+            # Zwolnienie maszyny (przy niepustej kolejce następny element przejmuje ją
+            # w tej samej chwili - bez zerowego okresu bezczynności)
+            if not self.zasob.queue:
+                self.zajeta = False
+                self._aktualizuj_stan()
+
+    # Silnik 'rekordy': ten sam przebieg co uzyj_zasobu, sterowany wywołaniami zwrotnymi
+    # maszyny; oczekujący element to tylko wpis w kolejce (bez procesu i zdarzenia request)
+
+    def przyjmij(self, zlecenie: 'Zlecenie'):
+        if not self.zajeta:
+            self._przydziel(zlecenie)
+            return
+        self.kolejka.zmien(self.srodowisko.now, 1)
+        if self.z_priorytetami:
+            # Kolejność jak w PriorityResource: priorytet, potem kolejność zgłoszeń
+            heappush(self.oczekujace, (zlecenie.typ.priorytet, next(self._kolejnosc), zlecenie))
+        else:
+            self.oczekujace.append(zlecenie)
+
+    def _przydziel(self, zlecenie: 'Zlecenie'):
+        self.obslugiwane = zlecenie
+        if not self.zajeta:
+            self.zajeta = True
+            self._aktualizuj_stan()
+        if self.zepsuta:
+            self.koniec_naprawy.callbacks.append(self._rozpocznij_przetwarzanie)
+        else:
+            self._rozpocznij_przetwarzanie(None)
+
+    def _rozpocznij_przetwarzanie(self, _zdarzenie):
+        zlecenie = self.obslugiwane
+        czas = zlecenie.czas_a if zlecenie.etap == 0 else zlecenie.czas_b
+        if self.dziennik is not None:
+            self.dziennik.zdarzenie(START, zlecenie.id, self)
+        if self.zegar_pracy:
+            self._start_pracy(czas)
+        self.srodowisko.timeout(czas).callbacks.append(self._koniec_przetwarzania)
+
+    def _koniec_przetwarzania(self, _zdarzenie):
+        if self.zegar_pracy:
+            self._koniec_pracy()
+        if self.dziennik is not None:
+            self.dziennik.zdarzenie(KONIEC, self.obslugiwane.id, self)
+        # O zwolnieniu maszyny decyduje przepływ (element może ją zablokować)
+        self.po_obsludze(self, self.obslugiwane)
+
+    def zablokuj(self):
+        self.zablokowana = True
+        self._aktualizuj_stan()
+
+    def zwolnij(self):
+        # Element opuścił maszynę: następny z kolejki albo bezczynność
+        byla_zablokowana = self.zablokowana
+        self.zablokowana = False
+        if self.oczekujace:
+            # Maszyna od razu przechodzi do następnego elementu
+            self.kolejka.zmien(self.srodowisko.now, -1)
+            if self.z_priorytetami:
+                nastepne = heappop(self.oczekujace)[2]
+            else:
+                nastepne = self.oczekujace.popleft()
+            self._przydziel(nastepne)
+            if byla_zablokowana:
+                self._aktualizuj_stan()
+        else:
+            self.obslugiwane = None
+            self.zajeta = False
+            self._aktualizuj_stan()
+        if self.po_zwolnieniu is not None:
+            self.po_zwolnieniu()
+
+
+class DetektorWaskiegoGardla:
+    """Wykrywanie przesuwającego się wąskiego gardła metodą okresów aktywności, online.
+
+    W każdej chwili wąskim gardłem jest aktywna maszyna o najdłużej trwającym bieżącym
+    okresie aktywności (praca lub awaria). Gdy jej okres się kończy, gardło przechodzi
+    na kolejną maszynę; część wspólna okresów obu maszyn jest liczona jako gardło
+    wspólne (przesunięcie), reszta jako gardło jedyne. Jeden przebieg, bez zapisu historii.
+    """
+
+    def __init__(self, maszyny: List[ZasobProdukcyjny], czas_startu: float = 0.0):
+        self.maszyny = maszyny
+        self.czas_startu = czas_startu
+        self.poczatek_aktywnosci: Dict[str, Optional[float]] = {m.nazwa: None for m in maszyny}
+        self.czas_jedyny = dict.fromkeys(self.poczatek_aktywnosci, 0.0)
+        self.czas_wspolny = dict.fromkeys(self.poczatek_aktywnosci, 0.0)
+        self.gardlo: Optional[str] = None
+        self.poczatek_gardla = czas_startu
+        for maszyna in maszyny:
+            maszyna.detektor_waskiego_gardla = self
+
+    def zmiana_aktywnosci(self, maszyna: ZasobProdukcyjny, aktywna: bool, teraz: float):
+        nazwa = maszyna.nazwa
+        if aktywna:
+            self.poczatek_aktywnosci[nazwa] = teraz
+            if self.gardlo is None:
+                self.gardlo = nazwa
+                self.poczatek_gardla = teraz
+            return
+
+        self.poczatek_aktywnosci[nazwa] = None
+        if nazwa != self.gardlo:
+            return
+
+        # Koniec okresu bieżącego gardła - następnym jest maszyna aktywna najdłużej
+        self.czas_jedyny[nazwa] += teraz - self.poczatek_gardla
+        nastepna, poczatek_nastepnej = None, math.inf
+        for kandydat, poczatek in self.poczatek_aktywnosci.items():
+            if poczatek is not None and poczatek < poczatek_nastepnej:
+                nastepna, poczatek_nastepnej = kandydat, poczatek
+
+        if nastepna is not None:
+            # Nakładanie się okresów = przesunięcie gardła (gardło wspólne obu maszyn)
+            nakladanie = teraz - max(poczatek_nastepnej, self.poczatek_gardla)
+            if nakladanie > 0:
+                self.czas_jedyny[nazwa] -= nakladanie
+                self.czas_wspolny[nazwa] += nakladanie
+                self.czas_wspolny[nastepna] += nakladanie
+        self.gardlo = nastepna
+        self.poczatek_gardla = teraz
+
+    def raport(self, teraz: float) -> Dict[str, Dict[str, float]]:
+        czas = teraz - self.czas_startu
+        raport = {}
+        for nazwa in self.czas_jedyny:
+            jedyny = self.czas_jedyny[nazwa]
+            if nazwa == self.gardlo:
+                jedyny += teraz - self.poczatek_gardla
+            wspolny = self.czas_wspolny[nazwa]
+            raport[nazwa] = {
+                'jedyne_procent': jedyny / czas * 100 if czas > 0 else 0.0,
+                'wspolne_procent': wspolny / czas * 100 if czas > 0 else 0.0,
+                'laczne_procent': (jedyny + wspolny) / czas * 100 if czas > 0 else 0.0
+            }
+        return raport
+
+
+class DetektorPrzeciazenia:
+    """Wykrywanie niestabilności (WIP rosnący bez ograniczeń) w trakcie przebiegu.
+
+    Średnia WIP jest liczona w oknach (różnica całek po czasie). Gdy okien jest
+    2·liczba_okien, sąsiednie okna są łączone, a długość okna podwajana - okna zawsze
+    pokrywają cały dotychczasowy przebieg. Decyzja zapada, gdy okien jest co najmniej
+    min_okien: przebieg jest niestabilny, gdy średnie z ostatnich `liczba_okien` okien
+    mają istotny trend rosnący (statystyka t nachylenia
+    prostej MNK > prog_t, a w drugiej połowie okien > prog_t_polowy - trend nie wygasa,
+    więc nie jest to rozbieg od pustego systemu) i wzrosły co najmniej `krotnosc_wzrostu`
+    razy. Symulacja jest wtedy przerywana (StopSimulation).
+
+    Progi dobrane na linii z Etapu I (do 100 przebiegów na punkt, 40000 min): fałszywy
+    alarm w ok. 1-2% przebiegów przy ρ≈0.92-0.955, wykrycie w ~2/3 przebiegów przy ρ≈1.04
+    i prawie zawsze przy ρ≥1.09 (mediana ok. 10000 min).
+    """
+
+    def __init__(self, srodowisko: simpy.Environment, statystyki: StatystykiSymulacji,
+                 okno: float = 500.0, liczba_okien: int = 10, min_okien: int = 14,
+                 prog_t: float = 6.0, prog_t_polowy: float = 3.0,
+                 krotnosc_wzrostu: float = 2.0, przerywaj: bool = True):
+        self.srodowisko = srodowisko
+        self.statystyki = statystyki
+        self.okno = okno
+        self.liczba_okien = liczba_okien
+        self.min_okien = min_okien
+        self.prog_t = prog_t
+        self.prog_t_polowy = prog_t_polowy
+        self.krotnosc_wzrostu = krotnosc_wzrostu
+        self.przerywaj = przerywaj
+        self.srednie: List[float] = []
+        self.stabilny = True
+        self.czas_przerwania: Optional[float] = None
+        self._wip = statystyki.wip
+        self._calka = self._wip.calka_do(srodowisko.now)
+        self._zaplanuj()
+
+    def _zaplanuj(self):
+        self.srodowisko.timeout(self.okno).callbacks.append(self._sprawdz)
+
+    def _sprawdz(self, _zdarzenie):
+        teraz = self.srodowisko.now
+        wip = self.statystyki.wip
+        calka = wip.calka_do(teraz)
+        if wip is self._wip:
+            self.srednie.append((calka - self._calka) / self.okno)
+        else:
+            # Statystyki wyzerowane (np. po rozbiegu) - okna liczone od nowa
+            self.srednie.clear()
+        self._wip, self._calka = wip, calka
+
+        if len(self.srednie) == 2 * self.liczba_okien:
+            self.srednie = [(self.srednie[k] + self.srednie[k + 1]) / 2
+                            for k in range(0, len(self.srednie), 2)]
+            self.okno *= 2
+
+        if len(self.srednie) >= self.min_okien and self._trend_rosnacy():
+            self.stabilny = False
+            self.czas_przerwania = teraz
+            if self.przerywaj:
+                raise simpy.core.StopSimulation(None)
+            return
+        self._zaplanuj()
+
+    @staticmethod
+    def _statystyka_t(wartosci: Sequence[float]) -> float:
+        # Statystyka t nachylenia prostej MNK dopasowanej do kolejnych wartości
+        n = len(wartosci)
+        x_srednie = (n - 1) / 2
+        y_srednie = sum(wartosci) / n
+        sxx = sum((x - x_srednie) ** 2 for x in range(n))
+        nachylenie = sum((x - x_srednie) * (y - y_srednie) for x, y in enumerate(wartosci)) / sxx
+        reszty = sum((y - y_srednie - nachylenie * (x - x_srednie)) ** 2
+                     for x, y in enumerate(wartosci))
+        blad = math.sqrt(reszty / (n - 2) / sxx)
+        if blad == 0:
+            return math.copysign(math.inf, nachylenie) if nachylenie else 0.0
+        return nachylenie / blad
+
+    def _trend_rosnacy(self) -> bool:
+        srednie = self.srednie[-self.liczba_okien:]
+        if srednie[-1] < self.krotnosc_wzrostu * max(srednie[0], 1.0):
+            return False
+        return (self._statystyka_t(srednie) > self.prog_t
+                and self._statystyka_t(srednie[len(srednie) // 2:]) > self.prog_t_polowy)
 
 
 # FUNKCJE PROCESÓW SYMULACYJNYCH
@@ -120,118 +1139,453 @@ class ZasobProdukcyjny:
 def proces_elementu(srodowisko: simpy.Environment, id_elementu: int,
                     zasoby_etapu_a: List[ZasobProdukcyjny],
                     zasoby_etapu_b: List[ZasobProdukcyjny],
-                    czas_przybycia: float, statystyki: StatystykiSymulacji):
-
-    # Losowe czasy przetwarzania z rozkładów jednostajnych
-    czas_przetwarzania_a = random.uniform(*ZAKRES_CZASU_A)
-    czas_przetwarzania_b = random.uniform(*ZAKRES_CZASU_B)
+                    czas_przybycia: float, statystyki: StatystykiSymulacji,
+                    typ: TypProduktu, losowe_a=random, losowe_b=random,
+                    numer_w_typie: Optional[int] = None):
+    # numer_w_typie - kolejny numer elementu w obrębie typu (wybór maszyn);
+    # bez niego numer elementu (przy jednym typie to ta sama wartość)
+    numer = id_elementu if numer_w_typie is None else numer_w_typie
+
+    statystyki.wip.zmien(czas_przybycia, 1)
+
+    # Losowe czasy przetwarzania z rozkładów jednostajnych (zależnych od typu)
+    czas_przetwarzania_a = losowe_a.uniform(*typ.zakres_czasu_a)
+    czas_przetwarzania_b = losowe_b.uniform(*typ.zakres_czasu_b)
+    wejscia = statystyki.wejscia_typu[typ.nazwa]
+    wejscia[2] += czas_przetwarzania_a
+    wejscia[3] += czas_przetwarzania_b
 
     # --- ETAP A: OBRÓBKA WSTĘPNA ---
-    # Wybór maszyny w etapie A (strategia round-robin)
-    indeks_a = id_elementu % len(zasoby_etapu_a)
+    # Wybór maszyny w etapie A (strategia round-robin wśród maszyn dopuszczonych dla typu)
+    indeks_a = numer % len(zasoby_etapu_a)
     zasob_a = zasoby_etapu_a[indeks_a]
-    yield srodowisko.process(zasob_a.uzyj_zasobu(id_elementu, czas_przetwarzania_a))
+    yield srodowisko.process(zasob_a.uzyj_zasobu(id_elementu, czas_przetwarzania_a, typ.priorytet))
 
     # --- ETAP B: MONTAŻ ---
-    # Wybór maszyny w etapie B (strategia round-robin)
-    indeks_b = id_elementu % len(zasoby_etapu_b)
+    # Wybór maszyny w etapie B (strategia round-robin wśród maszyn dopuszczonych dla typu)
+    indeks_b = numer % len(zasoby_etapu_b)
     zasob_b = zasoby_etapu_b[indeks_b]
 
     # Pomiar czasu oczekiwania przed etapem B
     czas_przed_etapem_b = srodowisko.now
-    yield srodowisko.process(zasob_b.uzyj_zasobu(id_elementu, czas_przetwarzania_b))
+    yield srodowisko.process(zasob_b.uzyj_zasobu(id_elementu, czas_przetwarzania_b, typ.priorytet))
 
     # Obliczenie czasu oczekiwania między etapami
     czas_po_etapie_b = srodowisko.now
     czas_oczekiwania_b = czas_po_etapie_b - czas_przed_etapem_b - czas_przetwarzania_b
 
     if czas_oczekiwania_b > 0:
-        statystyki.czasy_oczekiwania_a_b.append(czas_oczekiwania_b)
+        statystyki.czas_oczekiwania_a_b.dodaj(czas_oczekiwania_b)
 
     # --- ZAKOŃCZENIE PRZETWARZANIA ---
     czas_zakonczenia = srodowisko.now
     czas_w_systemie = czas_zakonczenia - czas_przybycia
-    statystyki.czasy_realizacji.append(czas_w_systemie)
+    statystyki.czas_realizacji.dodaj(czas_w_systemie)
+    statystyki.czas_realizacji_typu[typ.nazwa].dodaj(czas_w_systemie)
     statystyki.elementy_ukonczone += 1
+    statystyki.wip.zmien(czas_zakonczenia, -1)
+    if zasob_b.dziennik is not None:
+        zasob_b.dziennik.zdarzenie(WYJSCIE, id_elementu)
 
 
-def zrodlo_elementow(srodowisko: simpy.Environment,
-                     zasoby_etapu_a: List[ZasobProdukcyjny],
-                     zasoby_etapu_b: List[ZasobProdukcyjny],
-                     zakres_lambda: Tuple[float, float],
-                     statystyki: StatystykiSymulacji):
-    id_elementu = 0
-    while True:
-        # Losowy czas między przybyciami z rozkładu wykładniczego
-        srednia_miedzy_przybyciami = random.uniform(*zakres_lambda)
-        czas_miedzy_przybyciami = random.expovariate(1.0 / srednia_miedzy_przybyciami)
-        yield srodowisko.timeout(czas_miedzy_przybyciami)
+class Zlecenie:
+    """Element w systemie jako zwarty rekord (silnik 'rekordy')."""
+
+    __slots__ = ('id', 'typ', 'czas_przybycia', 'czas_a', 'czas_b', 'maszyna_b',
+                 'etap', 'czas_przed_etapem_b')
+
+    def __init__(self, id_elementu: int, typ: TypProduktu, czas_przybycia: float,
+                 czas_a: float, czas_b: float, maszyna_b: ZasobProdukcyjny):
+        self.id = id_elementu
+        self.typ = typ
+        self.czas_przybycia = czas_przybycia
+        self.czas_a = czas_a
+        self.czas_b = czas_b
+        self.maszyna_b = maszyna_b
+        self.etap = 0
+        self.czas_przed_etapem_b = 0.0
+
 
-        # Utworzenie nowego elementu
-        id_elementu += 1
-        srodowisko.process(
-            proces_elementu(srodowisko, id_elementu, zasoby_etapu_a,
-                            zasoby_etapu_b, srodowisko.now, statystyki)
+class PrzeplywRekordow:
+    """Przepływ elementów przez linię bez procesu (generatora) na element.
+
+    Element to rekord Zlecenie przekazywany między kolejkami maszyn; przebieg
+    (kolejność losowań, kolejki, stany maszyn, statystyki) jak w proces_elementu.
+
+    Przy skończonej pojemności bufora A->B (łączna liczba elementów czekających
+    w kolejkach etapu B) element po etapie A, który nie może wejść od razu na wolną
+    maszynę B ani do bufora, zostaje na maszynie A (stan 'zablokowana') do zwolnienia
+    miejsca.
+    """
+
+    def __init__(self, srodowisko: simpy.Environment, statystyki: StatystykiSymulacji,
+                 zasoby_etapu_a: List[ZasobProdukcyjny], zasoby_etapu_b: List[ZasobProdukcyjny],
+                 pojemnosc_bufora: Optional[int] = None, losowe_a=random, losowe_b=random):
+        self.srodowisko = srodowisko
+        self.statystyki = statystyki
+        self.losowe_a = losowe_a
+        self.losowe_b = losowe_b
+        self.zasoby_etapu_b = zasoby_etapu_b
+        self.pojemnosc_bufora = pojemnosc_bufora
+        self.zablokowane: List[Tuple[ZasobProdukcyjny, Zlecenie]] = []
+        self.dziennik = None
+        for maszyna in zasoby_etapu_a + zasoby_etapu_b:
+            maszyna.po_obsludze = self._po_obsludze
+        if pojemnosc_bufora is not None:
+            for maszyna in zasoby_etapu_b:
+                maszyna.po_zwolnieniu = self._odblokuj
+
+    def przybycie(self, id_elementu: int, typ: TypProduktu,
+                  zasoby_etapu_a: List[ZasobProdukcyjny], zasoby_etapu_b: List[ZasobProdukcyjny],
+                  numer_w_typie: int):
+        teraz = self.srodowisko.now
+        statystyki = self.statystyki
+        statystyki.wip.zmien(teraz, 1)
+        czas_a = self.losowe_a.uniform(*typ.zakres_czasu_a)
+        czas_b = self.losowe_b.uniform(*typ.zakres_czasu_b)
+        wejscia = statystyki.wejscia_typu[typ.nazwa]
+        wejscia[2] += czas_a
+        wejscia[3] += czas_b
+        zlecenie = Zlecenie(id_elementu, typ, teraz, czas_a, czas_b,
+                            zasoby_etapu_b[numer_w_typie % len(zasoby_etapu_b)])
+        zasoby_etapu_a[numer_w_typie % len(zasoby_etapu_a)].przyjmij(zlecenie)
+
+    def _po_obsludze(self, maszyna: ZasobProdukcyjny, zlecenie: Zlecenie):
+        teraz = self.srodowisko.now
+        if zlecenie.etap == 0:
+            # --- ETAP B: MONTAŻ ---
+            zlecenie.etap = 1
+            zlecenie.czas_przed_etapem_b = teraz
+            if self.pojemnosc_bufora is not None and not self._jest_miejsce(zlecenie):
+                maszyna.zablokuj()
+                self.zablokowane.append((maszyna, zlecenie))
+                return
+            maszyna.zwolnij()
+            zlecenie.maszyna_b.przyjmij(zlecenie)
+            return
+
+        # --- ZAKOŃCZENIE PRZETWARZANIA ---
+        maszyna.zwolnij()
+        statystyki = self.statystyki
+        czas_oczekiwania_b = teraz - zlecenie.czas_przed_etapem_b - zlecenie.czas_b
+        if czas_oczekiwania_b > 0:
+            statystyki.czas_oczekiwania_a_b.dodaj(czas_oczekiwania_b)
+        czas_w_systemie = teraz - zlecenie.czas_przybycia
+        statystyki.czas_realizacji.dodaj(czas_w_systemie)
+        statystyki.czas_realizacji_typu[zlecenie.typ.nazwa].dodaj(czas_w_systemie)
+        statystyki.elementy_ukonczone += 1
+        statystyki.wip.zmien(teraz, -1)
+        if self.dziennik is not None:
+            self.dziennik.zdarzenie(WYJSCIE, zlecenie.id)
+
+    def _jest_miejsce(self, zlecenie: Zlecenie) -> bool:
+        if not zlecenie.maszyna_b.zajeta:
+            return True
+        return sum(len(m.oczekujace) for m in self.zasoby_etapu_b) < self.pojemnosc_bufora
+
+    def _odblokuj(self):
+        # Maszyna B pobrała element z kolejki albo stała się wolna - odblokowanie
+        # maszyn A w kolejności blokowania, dopóki ich elementy mają miejsce
+        for wpis in list(self.zablokowane):
+            maszyna, zlecenie = wpis
+            if self._jest_miejsce(zlecenie):
+                self.zablokowane.remove(wpis)
+                maszyna.zwolnij()
+                zlecenie.maszyna_b.przyjmij(zlecenie)
+
+
+class PrzeplywProcesow:
+    """Przepływ referencyjny: proces simpy (proces_elementu) dla każdego elementu."""
+
+    def __init__(self, srodowisko: simpy.Environment, statystyki: StatystykiSymulacji,
+                 zasoby_etapu_a: List[ZasobProdukcyjny], zasoby_etapu_b: List[ZasobProdukcyjny],
+                 pojemnosc_bufora: Optional[int] = None, losowe_a=random, losowe_b=random):
+        if pojemnosc_bufora is not None:
+            raise ValueError("Silnik 'procesy' obsługuje tylko nieograniczony bufor A->B")
+        self.srodowisko = srodowisko
+        self.statystyki = statystyki
+        self.losowe_a = losowe_a
+        self.losowe_b = losowe_b
+        self.dziennik = None
+
+    def przybycie(self, id_elementu: int, typ: TypProduktu,
+                  zasoby_etapu_a: List[ZasobProdukcyjny], zasoby_etapu_b: List[ZasobProdukcyjny],
+                  numer_w_typie: int):
+        self.srodowisko.process(
+            proces_elementu(self.srodowisko, id_elementu, zasoby_etapu_a,
+                            zasoby_etapu_b, self.srodowisko.now, self.statystyki, typ,
+                            self.losowe_a, self.losowe_b, numer_w_typie)
         )
 
 
-# FUNKCJE SYMULACJI I WERYFIKACJI
+SILNIKI = {'rekordy': PrzeplywRekordow, 'procesy': PrzeplywProcesow}
 
-def uruchom_symulacje(czas_symulacji: float, statystyki: StatystykiSymulacji) -> Dict:
 
-    # Inicjalizacja środowiska symulacyjnego
-    srodowisko = simpy.Environment()
+def zrodlo_elementow(srodowisko: simpy.Environment,
+                     zasoby_etapu_a: List[ZasobProdukcyjny],
+                     zasoby_etapu_b: List[ZasobProdukcyjny],
+                     typ: TypProduktu,
+                     przeplyw,
+                     licznik_elementow,
+                     losowe=random):
+    # Maszyny dopuszczone dla danego typu produktu
+    if typ.maszyny_a is not None:
+        zasoby_etapu_a = [zasoby_etapu_a[i] for i in typ.maszyny_a]
+    if typ.maszyny_b is not None:
+        zasoby_etapu_b = [zasoby_etapu_b[i] for i in typ.maszyny_b]
+    # Round-robin w obrębie typu: własny licznik (numeracja elementów jest wspólna
+    # dla typów, więc przeplatane typy trafiałyby nierówno na swoje maszyny)
+    licznik_typu = count(1)
+
+    przeplyw.statystyki.czas_realizacji_typu[typ.nazwa] = AkumulatorStrumieniowy()
+    wejscia = przeplyw.statystyki.wejscia_typu[typ.nazwa] = [0, 0.0, 0.0, 0.0]
+    # Odstępy między przybyciami wyznacza profil przybyć typu
+    odstepy = typ.profil.odstepy(srodowisko.now, losowe)
+    czas_miedzy_przybyciami = next(odstepy, None)
+    while czas_miedzy_przybyciami is not None:
+        yield srodowisko.timeout(czas_miedzy_przybyciami)
+        id_elementu = next(licznik_elementow)
+        if przeplyw.dziennik is not None:
+            przeplyw.dziennik.zdarzenie(PRZYBYCIE, id_elementu)
+        wejscia[0] += 1
+        wejscia[1] += czas_miedzy_przybyciami
 
-    # Utworzenie maszyn w etapie A
-    zasoby_etapu_a = [
-        ZasobProdukcyjny(srodowisko, f'A_{i}', ZAKRES_CZASU_A, ZAKRES_MTTR, ZAKRES_MTBF)
-        for i in range(LICZBA_MASZYN_A)
-    ]
+        # Następny odstęp losowany przed czasami przetwarzania elementu - ta sama
+        # kolejność losowań w obu silnikach (proces elementu startuje dopiero po źródle)
+        czas_miedzy_przybyciami = next(odstepy, None)
 
-    # Utworzenie maszyn w etapie B
-    zasoby_etapu_b = [
-        ZasobProdukcyjny(srodowisko, f'B_{i}', ZAKRES_CZASU_B, ZAKRES_MTTR, ZAKRES_MTBF)
-        for i in range(LICZBA_MASZYN_B)
-    ]
+        # Utworzenie nowego elementu (numeracja wspólna dla wszystkich typów)
+        przeplyw.przybycie(id_elementu, typ, zasoby_etapu_a, zasoby_etapu_b, next(licznik_typu))
 
-    # Uruchomienie generatora elementów
-    srodowisko.process(
-        zrodlo_elementow(srodowisko, zasoby_etapu_a, zasoby_etapu_b,
-                         ZAKRES_LAMBDA, statystyki)
-    )
 
-    # Uruchomienie symulacji
-    srodowisko.run(until=czas_symulacji)
+# FUNKCJE SYMULACJI I WERYFIKACJI
 
-    # --- OBLICZENIE WYNIKÓW ---
-    przepustowosc = statystyki.elementy_ukonczone / czas_symulacji
+class ModelLinii:
+    """Zbudowany model linii; pozwala prowadzić symulację odcinkami (krok) i odczytywać
+    wyniki lub migawki w trakcie przebiegu."""
+
+    def __init__(self, statystyki: StatystykiSymulacji,
+                 typy_produktow: Optional[List[TypProduktu]] = None,
+                 liczba_maszyn_a: Optional[int] = None,
+                 liczba_maszyn_b: Optional[int] = None,
+                 zakres_mtbf: Optional[Tuple[float, float]] = None,
+                 zakres_mttr: Optional[Tuple[float, float]] = None,
+                 silnik: str = 'rekordy',
+                 wykrywanie_przeciazenia: bool = False,
+                 pojemnosc_bufora: Optional[int] = None,
+                 strumienie: Optional[StrumienieLosowe] = None,
+                 model_awarii: Optional[ModelAwarii] = None,
+                 liczba_technikow: Optional[int] = None,
+                 polityka_napraw: str = 'fifo',
+                 dziennik: Optional[DziennikZdarzen] = None):
+
+        # Parametry niepodane jawnie - z wartości globalnych modułu
+        if typy_produktow is None:
+            typy_produktow = domyslne_typy_produktow()
+        if liczba_maszyn_a is None:
+            liczba_maszyn_a = LICZBA_MASZYN_A
+        if liczba_maszyn_b is None:
+            liczba_maszyn_b = LICZBA_MASZYN_B
+        if zakres_mtbf is None:
+            zakres_mtbf = ZAKRES_MTBF
+        if zakres_mttr is None:
+            zakres_mttr = ZAKRES_MTTR
+        z_priorytetami = len({typ.priorytet for typ in typy_produktow}) > 1
+
+        # Bez strumieni - wszystkie losowania ze wspólnego generatora modułu random
+        # (z dziennikiem - opakowane do zapisu albo zastąpione zapisanymi liczbami)
+        def strumien(nazwa: str):
+            zrodlo = random if strumienie is None else strumienie(nazwa)
+            if dziennik is None:
+                return zrodlo
+            return dziennik.strumien('random' if strumienie is None else nazwa, zrodlo)
+
+        # Inicjalizacja środowiska symulacyjnego
+        self.srodowisko = srodowisko = simpy.Environment()
+        self.statystyki = statystyki
+        statystyki.wip = CalkaCzasowa(srodowisko.now)
+        self.dziennik = dziennik
+        if dziennik is not None:
+            dziennik.srodowisko = srodowisko
+
+        # Wspólna ekipa naprawcza (None - każda maszyna ma własnego technika)
+        self.ekipa = (EkipaNaprawcza(srodowisko, liczba_technikow, polityka_napraw)
+                      if liczba_technikow is not None else None)
+
+        # Utworzenie maszyn w etapie A
+        self.zasoby_etapu_a = [
+            ZasobProdukcyjny(srodowisko, f'A_{i}', ZAKRES_CZASU_A, zakres_mttr, zakres_mtbf,
+                             z_priorytetami, strumien(f'awarie_A_{i}'), model_awarii, self.ekipa)
+            for i in range(liczba_maszyn_a)
+        ]
+
+        # Utworzenie maszyn w etapie B
+        self.zasoby_etapu_b = [
+            ZasobProdukcyjny(srodowisko, f'B_{i}', ZAKRES_CZASU_B, zakres_mttr, zakres_mtbf,
+                             z_priorytetami, strumien(f'awarie_B_{i}'), model_awarii, self.ekipa)
+            for i in range(liczba_maszyn_b)
+        ]
+
+        # Wykrywanie wąskiego gardła w trakcie przebiegu
+        self.detektor = DetektorWaskiegoGardla(self.zasoby_etapu_a + self.zasoby_etapu_b,
+                                               srodowisko.now)
+
+        # Przepływ elementów: rekordy (domyślnie) albo proces simpy na element (referencyjny)
+        if silnik not in SILNIKI:
+            raise ValueError(f"Nieznany silnik: {silnik!r} (dostępne: {', '.join(SILNIKI)})")
+        # (pojemnosc_bufora=None - bufor A->B nieograniczony)
+        self.przeplyw = SILNIKI[silnik](srodowisko, statystyki, self.zasoby_etapu_a,
+                                        self.zasoby_etapu_b, pojemnosc_bufora,
+                                        strumien('obsluga_a'), strumien('obsluga_b'))
+        if dziennik is not None:
+            for maszyna in self.zasoby_etapu_a + self.zasoby_etapu_b:
+                dziennik.dodaj_maszyne(maszyna)
+            self.przeplyw.dziennik = dziennik
+
+        # Uruchomienie generatorów elementów - osobny strumień przybyć dla każdego typu
+        licznik_elementow = count(1)
+        for typ in typy_produktow:
+            srodowisko.process(
+                zrodlo_elementow(srodowisko, self.zasoby_etapu_a, self.zasoby_etapu_b,
+                                 typ, self.przeplyw, licznik_elementow,
+                                 strumien(f'przybycia_{typ.nazwa}'))
+            )
+
+        # Przerwanie przebiegu, gdy WIP rośnie bez ograniczeń (konfiguracja niestabilna)
+        self.przeciazenie = (DetektorPrzeciazenia(srodowisko, statystyki)
+                             if wykrywanie_przeciazenia else None)
+
+    @property
+    def stabilny(self) -> bool:
+        return self.przeciazenie is None or self.przeciazenie.stabilny
+
+    def krok(self, do_czasu: float):
+        # Przebieg przerwany z powodu przeciążenia nie jest kontynuowany
+        if self.stabilny:
+            self.srodowisko.run(until=do_czasu)
+
+    def migawka(self) -> Dict:
+        # Lekki stan bieżący (bez przeliczania statystyk maszyn)
+        teraz = self.srodowisko.now
+        statystyki = self.statystyki
+        return {
+            'czas': teraz,
+            'ukonczone': statystyki.elementy_ukonczone,
+            'suma_czasow_realizacji': statystyki.czas_realizacji.srednia * statystyki.czas_realizacji.n,
+            'sredni_czas_realizacji': statystyki.czas_realizacji.srednia,
+            'przepustowosc': statystyki.elementy_ukonczone / teraz if teraz > 0 else 0.0,
+            'wip': statystyki.wip.wartosc,
+            'sredni_wip': statystyki.wip.srednia(teraz),
+            'stabilny': self.stabilny
+        }
 
-    sredni_czas_realizacji = (statistics.mean(statystyki.czasy_realizacji)
-                              if statystyki.czasy_realizacji else 0)
+    def wyniki(self) -> Dict:
+        # Wyniki za okres od początku symulacji do chwili bieżącej
+        # (dla przebiegu przerwanego - do chwili przerwania)
+        czas_symulacji = self.srodowisko.now
+        statystyki = self.statystyki
+        zasoby_etapu_a, zasoby_etapu_b = self.zasoby_etapu_a, self.zasoby_etapu_b
+
+        # --- OBLICZENIE WYNIKÓW ---
+        przepustowosc = statystyki.elementy_ukonczone / czas_symulacji
+
+        sredni_czas_realizacji = (statystyki.czas_realizacji.srednia
+                                  if statystyki.czas_realizacji.n else 0)
+
+        sredni_czas_oczekiwania_a_b = (statystyki.czas_oczekiwania_a_b.srednia
+                                       if statystyki.czas_oczekiwania_a_b.n else 0)
+
+        # Obliczenie wykorzystania maszyn
+        wykorzystanie = {}
+        wszystkie_zasoby = zasoby_etapu_a + zasoby_etapu_b
+
+        for zasob in wszystkie_zasoby:
+            # Wykorzystanie = udział czasu przetwarzania, dostępność = udział czasu bez awarii
+            czasy_stanow = zasob.czasy_w_stanach()
+            czas_pracy = czasy_stanow['przetwarzanie']
+            czas_naprawy = czasy_stanow['awaria'] + czasy_stanow['awaria_z_elementem']
+            wykorzystanie[zasob.nazwa] = {
+                'wykorzystanie_procent': (czas_pracy / czas_symulacji) * 100,
+                'dostepnosc_procent': (1 - czas_naprawy / czas_symulacji) * 100,
+                'czas_pracy': czas_pracy,
+                'czas_naprawy': czas_naprawy,
+                'liczba_awarii': zasob.liczba_awarii,
+                'czasy_stanow': czasy_stanow,
+                'srednia_dlugosc_kolejki': zasob.kolejka.srednia(czas_symulacji),
+                'maksymalna_dlugosc_kolejki': zasob.kolejka.maksimum
+            }
+
+        # Średnie długości kolejek etapów (suma kolejek maszyn etapu)
+        kolejki_etapow = {
+            'A': sum(zasob.kolejka.srednia(czas_symulacji) for zasob in zasoby_etapu_a),
+            'B': sum(zasob.kolejka.srednia(czas_symulacji) for zasob in zasoby_etapu_b)
+        }
+        sredni_wip = statystyki.wip.srednia(czas_symulacji)
 
-    sredni_czas_oczekiwania_a_b = (statistics.mean(statystyki.czasy_oczekiwania_a_b)
-                                   if statystyki.czasy_oczekiwania_a_b else 0)
+        waskie_gardlo = self.detektor.raport(czas_symulacji)
+        glowne_gardlo = max(waskie_gardlo, key=lambda nazwa: waskie_gardlo[nazwa]['laczne_procent'])
 
-    # Obliczenie wykorzystania maszyn
-    wykorzystanie = {}
-    wszystkie_zasoby = zasoby_etapu_a + zasoby_etapu_b
+        # Średnie wylosowanych wejść (zmienne kontrolne, por. replikacje.wartosci_oczekiwane_wejsc)
+        srednie_wejsc = {
+            nazwa: {'odstep_przybyc': suma_odstepow / n, 'czas_a': suma_a / n, 'czas_b': suma_b / n}
+            for nazwa, (n, suma_odstepow, suma_a, suma_b) in statystyki.wejscia_typu.items() if n
+        }
 
-    for zasob in wszystkie_zasoby:
-        czas_aktywny = zasob.czas_pracy_sumaryczny + zasob.czas_naprawy_sumaryczny
-        wykorzystanie[zasob.nazwa] = {
-            'wykorzystanie_procent': (czas_aktywny / czas_symulacji) * 100,
-            'czas_pracy': zasob.czas_pracy_sumaryczny,
-            'czas_naprawy': zasob.czas_naprawy_sumaryczny,
-            'liczba_awarii': zasob.liczba_awarii
+        # Statystyki w podziale na typy produktów
+        statystyki_typow = {}
+        for nazwa, akumulator in statystyki.czas_realizacji_typu.items():
+            statystyki_typow[nazwa] = {
+                'przepustowosc': akumulator.n / czas_symulacji,
+                'sredni_czas_realizacji': akumulator.srednia if akumulator.n else 0,
+                'percentyle_czasu_realizacji': akumulator.percentyle(),
+                'liczba_ukonczonych': akumulator.n
+            }
+
+        return {
+            "Przepustowość (elem/min)": przepustowosc,
+            "Średni Czas Realizacji (min)": sredni_czas_realizacji,
+            "Percentyle Czasu Realizacji (min)": statystyki.czas_realizacji.percentyle(),
+            "Średni Czas Oczekiwania A->B (min)": sredni_czas_oczekiwania_a_b,
+            "Wykorzystanie Maszyn": wykorzystanie,
+            "Statystyki Typów Produktów": statystyki_typow,
+            "Średnia Długość Kolejki Etapu": kolejki_etapow,
+            "Średnia Liczba Elementów w Systemie (WIP)": sredni_wip,
+            # Prawo Little'a: L = λ·W, do porównania ze średnim WIP
+            "Little λ·W": przepustowosc * sredni_czas_realizacji,
+            "Wąskie Gardło": waskie_gardlo,
+            "Główne Wąskie Gardło": glowne_gardlo,
+            "Liczba ukończonych elementów": statystyki.elementy_ukonczone,
+            "Średnie Wejściowe": srednie_wejsc,
+            "Stabilny": self.stabilny,
+            "Czas Przerwania (min)": None if self.stabilny else self.przeciazenie.czas_przerwania,
+            # Wspólna ekipa naprawcza: wykorzystanie techników i oczekiwanie na naprawę
+            "Ekipa Naprawcza": None if self.ekipa is None else self.ekipa.raport(czas_symulacji)
         }
 
-    return {
-        "Przepustowość (elem/min)": przepustowosc,
-        "Średni Czas Realizacji (min)": sredni_czas_realizacji,
-        "Średni Czas Oczekiwania A->B (min)": sredni_czas_oczekiwania_a_b,
-        "Wykorzystanie Maszyn": wykorzystanie,
-        "Liczba ukończonych elementów": statystyki.elementy_ukonczone
-    }
+
+def uruchom_symulacje(czas_symulacji: float, statystyki: StatystykiSymulacji,
+                      typy_produktow: Optional[List[TypProduktu]] = None,
+                      liczba_maszyn_a: Optional[int] = None,
+                      liczba_maszyn_b: Optional[int] = None,
+                      zakres_mtbf: Optional[Tuple[float, float]] = None,
+                      zakres_mttr: Optional[Tuple[float, float]] = None,
+                      silnik: str = 'rekordy',
+                      wykrywanie_przeciazenia: bool = False,
+                      pojemnosc_bufora: Optional[int] = None,
+                      strumienie: Optional[StrumienieLosowe] = None,
+                      model_awarii: Optional[ModelAwarii] = None,
+                      liczba_technikow: Optional[int] = None,
+                      polityka_napraw: str = 'fifo',
+                      dziennik: Optional[DziennikZdarzen] = None) -> Dict:
+
+    model = ModelLinii(statystyki, typy_produktow, liczba_maszyn_a, liczba_maszyn_b,
+                       zakres_mtbf, zakres_mttr, silnik, wykrywanie_przeciazenia,
+                       pojemnosc_bufora, strumienie, model_awarii, liczba_technikow,
+                       polityka_napraw, dziennik)
+
+    # Uruchomienie symulacji
+    model.krok(czas_symulacji)
+    return model.wyniki()
 
 
 def weryfikacja_modelu():
@@ -304,19 +1658,23 @@ def test_wydajnosci_konfiguracji():
         wyniki = uruchom_symulacje(5000, statystyki)
 
         print(f"\n{opis} (K_A={ka}, K_B={kb}):")
+        if not wyniki['Stabilny']:
+            print(f"  NIESTABILNA - WIP rośnie bez ograniczeń, przebieg przerwany "
+                  f"w {wyniki['Czas Przerwania (min)']:.0f} min")
         print(f"  Przepustowość: {wyniki['Przepustowość (elem/min)']:.4f} elem/min")
         print(f"  Czas realizacji: {wyniki['Średni Czas Realizacji (min)']:.2f} min")
 
 
 # GŁÓWNA FUNKCJA SYMULACJI
 
-def main():
+def main(z_weryfikacja: bool = False):
     print("SYMULACJA KOMPUTEROWA - PROJEKT")
     print("Dwuetapowa linia produkcyjna z awariami maszyn")
 
-    # Weryfikacja modelu
-    weryfikacja_modelu()
-    test_wydajnosci_konfiguracji()
+    # Weryfikacja modelu tylko na żądanie (python Projekt.py --weryfikacja)
+    if z_weryfikacja:
+        weryfikacja_modelu()
+        test_wydajnosci_konfiguracji()
 
     print("\n" + "=" * 60)
     print("GŁÓWNA SYMULACJA")
@@ -334,19 +1692,52 @@ def main():
     print(f"Czas symulacji: {CZAS_SYMULACJI} min")
     print("-" * 40)
 
+    if not wyniki['Stabilny']:
+        print(f"UWAGA: konfiguracja niestabilna, przebieg przerwany "
+              f"w {wyniki['Czas Przerwania (min)']:.0f} min")
     print(f"Przepustowość: {wyniki['Przepustowość (elem/min)']:.4f} elem/min")
     print(f"Średni czas realizacji: {wyniki['Średni Czas Realizacji (min)']:.2f} min")
     print(f"Średni czas oczekiwania A->B: {wyniki['Średni Czas Oczekiwania A->B (min)']:.2f} min")
     print(f"Liczba ukończonych elementów: {wyniki['Liczba ukończonych elementów']}")
+    print(f"Średni WIP: {wyniki['Średnia Liczba Elementów w Systemie (WIP)']:.3f} "
+          f"(prawo Little'a λ·W = {wyniki['Little λ·W']:.3f})")
+    print(f"Średnie długości kolejek: A={wyniki['Średnia Długość Kolejki Etapu']['A']:.3f}, "
+          f"B={wyniki['Średnia Długość Kolejki Etapu']['B']:.3f}")
+
+    percentyle = wyniki['Percentyle Czasu Realizacji (min)']
+    print("Percentyle czasu realizacji: " +
+          ", ".join(f"p{p}={wartosc:.2f}" for p, wartosc in percentyle.items()) + " min")
+
+    print("\n--- TYPY PRODUKTÓW ---")
+    for nazwa, dane in wyniki["Statystyki Typów Produktów"].items():
+        print(f"{nazwa}: {dane['liczba_ukonczonych']} elem., "
+              f"przepustowość {dane['przepustowosc']:.4f} elem/min, "
+              f"średni czas realizacji {dane['sredni_czas_realizacji']:.2f} min")
 
     print("\n--- WYKORZYSTANIE MASZYN ---")
     for nazwa, dane in wyniki["Wykorzystanie Maszyn"].items():
         print(f"{nazwa}:")
         print(f"  - Wykorzystanie: {dane['wykorzystanie_procent']:.2f}%")
+        print(f"  - Dostępność: {dane['dostepnosc_procent']:.2f}%")
         print(f"  - Czas pracy: {dane['czas_pracy']:.2f} min")
         print(f"  - Czas naprawy: {dane['czas_naprawy']:.2f} min")
         print(f"  - Liczba awarii: {dane['liczba_awarii']}")
 
+    print("\n--- WĄSKIE GARDŁO (metoda okresów aktywności) ---")
+    for nazwa, dane in wyniki["Wąskie Gardło"].items():
+        print(f"{nazwa}: jedyne {dane['jedyne_procent']:.2f}%, "
+              f"wspólne {dane['wspolne_procent']:.2f}%")
+    print(f"Główne wąskie gardło: {wyniki['Główne Wąskie Gardło']}")
+
+    ekipa = wyniki.get("Ekipa Naprawcza")
+    if ekipa is not None:
+        print(f"\n--- EKIPA NAPRAWCZA ({ekipa['liczba_technikow']} tech., {ekipa['polityka']}) ---")
+        print(f"Wykorzystanie techników: {ekipa['wykorzystanie_procent']:.2f}%")
+        print(f"Średnie oczekiwanie na naprawę: {ekipa['sredni_czas_oczekiwania']:.2f} min "
+              f"(maks. {ekipa['maksymalny_czas_oczekiwania']:.2f} min)")
+        print(f"Średnia długość kolejki napraw: {ekipa['srednia_dlugosc_kolejki']:.3f}")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import sys
+    main('--weryfikacja' in sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,286 @@
+"""
+Przybliżenia analityczne linii (bez symulacji) i wstępna selekcja punktów przeglądu.
+
+Każda maszyna ma własną kolejkę (przydział round-robin), więc linia to sieć kolejek
+GI/G/1: czas oczekiwania z przybliżenia Kingmana, zmienność przybyć do etapu B
+z równania przejścia (linking equation). Awaria nie przerywa przetwarzania w modelu
+z Projekt.py - element rozpoczynający pracę na zepsutej maszynie czeka na koniec
+naprawy, więc efektywny czas obsługi to czas przetwarzania + pozostały czas naprawy
+z prawdopodobieństwem zastania awarii. Dla elementu przybywającego do wolnej maszyny
+jest to 1 - A, gdzie A = MTBF/(MTBF+MTTR); element startujący zaraz po poprzednim
+(maszyna była sprawna na jego starcie) zastaje awarię rzadziej.
+
+Oszacowanie punktu trwa mikrosekundy; selekcja odrzuca punkty niestabilne (ρ ≥ prog),
+jednoznacznie niespełniające wymagania czasu realizacji i zdominowane (więcej maszyn
+bez istotnej poprawy), a pozostałe porządkuje od najbardziej niepewnych.
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import Projekt
+import replikacje
+
+
+def moment_jednostajny(zakres: Sequence[float], k: int) -> float:
+    """E[X^k] dla X ~ U(a, b) (dla a = b - wartość stała)."""
+    a, b = float(zakres[0]), float(zakres[1])
+    if a == b:
+        return a ** k
+    return (b ** (k + 1) - a ** (k + 1)) / ((k + 1) * (b - a))
+
+
+def momenty_przybyc(zakres_lambda: Sequence[float]) -> Tuple[float, float]:
+    """Intensywność i kwadrat wsp. zmienności odstępów (mieszanina wykładniczych
+    o średniej losowanej z zakresu, jak w ProfilStacjonarny)."""
+    srednia = moment_jednostajny(zakres_lambda, 1)
+    ca2 = 2 * moment_jednostajny(zakres_lambda, 2) / srednia ** 2 - 1
+    return 1.0 / srednia, ca2
+
+
+def dostepnosc(zakres_mtbf: Sequence[float], zakres_mttr: Sequence[float]) -> float:
+    mtbf = moment_jednostajny(zakres_mtbf, 1)
+    mttr = moment_jednostajny(zakres_mttr, 1)
+    return mtbf / (mtbf + mttr)
+
+
+def czas_obslugi_z_awariami(m1: float, m2: float, zakres_mttr: Sequence[float],
+                            p_awarii: float) -> Tuple[float, float]:
+    """Średnia i kwadrat wsp. zmienności efektywnego czasu obsługi.
+
+    m1, m2 - pierwszy i drugi moment czasu przetwarzania, p_awarii - prawdopodobieństwo
+    zastania maszyny w naprawie na starcie. Czas naprawy to mieszanina wykładniczych
+    (E[R^k] = k!·E[m^k]), opóźnienie startu to pozostały czas naprawy
+    (E[D] = E[R²]/2E[R], E[D²] = E[R³]/3E[R]).
+    """
+    mttr = moment_jednostajny(zakres_mttr, 1)
+    if mttr == 0:
+        return m1, m2 / m1 ** 2 - 1
+    r2 = 2 * moment_jednostajny(zakres_mttr, 2)
+    r3 = 6 * moment_jednostajny(zakres_mttr, 3)
+    d1 = p_awarii * r2 / (2 * mttr)
+    d2 = p_awarii * r3 / (3 * mttr)
+
+    srednia = m1 + d1
+    wariancja = (m2 - m1 ** 2) + (d2 - d1 ** 2)
+    return srednia, wariancja / srednia ** 2
+
+
+def _laplace_jednostajnego(zakres: Sequence[float], kappa: float) -> float:
+    # E[exp(-κT)] dla T ~ U(a, b)
+    a, b = float(zakres[0]), float(zakres[1])
+    if a == b or kappa == 0:
+        return math.exp(-kappa * a)
+    return (math.exp(-kappa * a) - math.exp(-kappa * b)) / (kappa * (b - a))
+
+
+def kingman(ca2: float, ce2: float, rho: float, te: float) -> float:
+    """Średni czas oczekiwania w kolejce GI/G/1 (przybliżenie Kingmana / VUT)."""
+    if rho >= 1:
+        return math.inf
+    return (ca2 + ce2) / 2 * rho / (1 - rho) * te
+
+
+def _etap(typy: List[Projekt.TypProduktu], liczba_maszyn: int, etap: str,
+          strumienie: Dict[str, Tuple[float, float]], parametry: Dict) -> List[Dict]:
+    # Strumień każdego typu dzielony równo między dopuszczone maszyny etapu
+    mttr = moment_jednostajny(parametry['zakres_mttr'], 1)
+    model_awarii = replikacje.model_awarii_z_konfiguracji(parametry['model_awarii'],
+                                                          parametry['zakres_mtbf'])
+    mtbf = (moment_jednostajny(parametry['zakres_mtbf'], 1) if model_awarii is None
+            else model_awarii.srednia_do_awarii())
+    maszyny = []
+    for j in range(liczba_maszyn):
+        przeplywy = []
+        for typ in typy:
+            dopuszczone = getattr(typ, f'maszyny_{etap}')
+            dopuszczone = range(liczba_maszyn) if dopuszczone is None else dopuszczone
+            if j in dopuszczone:
+                intensywnosc, ca2 = strumienie[typ.nazwa]
+                przeplywy.append((typ, intensywnosc / len(dopuszczone), ca2, len(dopuszczone)))
+
+        intensywnosc = sum(p[1] for p in przeplywy)
+        if intensywnosc == 0:
+            maszyny.append({'intensywnosc': 0.0, 'rho': 0.0, 'te': 0.0, 'ce2': 0.0,
+                            'ca2': 1.0, 'oczekiwanie': 0.0})
+            continue
+
+        # Momenty czasu przetwarzania - mieszanina typów ważona przepływem
+        m1 = m2 = laplace = 0.0
+        for typ, przeplyw, _, _ in przeplywy:
+            zakres = getattr(typ, f'zakres_czasu_{etap}')
+            m1 += przeplyw / intensywnosc * moment_jednostajny(zakres, 1)
+            m2 += przeplyw / intensywnosc * moment_jednostajny(zakres, 2)
+
+        # Awarie według czasu pracy: średni czas kalendarzowy do awarii rośnie
+        # odwrotnie do udziału przetwarzania; inne rozkłady - tylko przez średnią
+        # (wspólna ekipa naprawcza nie jest uwzględniana)
+        mtbf_kalendarzowy = mtbf
+        if model_awarii is not None and model_awarii.wedlug_czasu_pracy:
+            mtbf_kalendarzowy = mtbf / min(1.0, max(intensywnosc * m1, 1e-9))
+        a = mtbf_kalendarzowy / (mtbf_kalendarzowy + mttr)
+        kappa = 1 / mtbf_kalendarzowy + (1 / mttr if mttr > 0 else 0.0)
+        for typ, przeplyw, _, _ in przeplywy:
+            zakres = getattr(typ, f'zakres_czasu_{etap}')
+            laplace += przeplyw / intensywnosc * _laplace_jednostajnego(zakres, kappa)
+
+        # Awaria na starcie: 1 - A przy wolnej maszynie (udział 1 - ρ), przy starcie zaraz
+        # po poprzednim elemencie (udział ρ) - przejście sprawna -> awaria w czasie
+        # przetwarzania T: (1 - A)·(1 - E[exp(-κT)]), κ = 1/MTBF + 1/MTTR
+        rho = 0.0
+        for _ in range(20):
+            p_awarii = (1 - a) * ((1 - min(rho, 1.0)) + min(rho, 1.0) * (1 - laplace))
+            te, ce2 = czas_obslugi_z_awariami(m1, m2, parametry['zakres_mttr'], p_awarii)
+            rho = intensywnosc * te
+
+        if len(przeplywy) == len(typy) and all(p[3] == liczba_maszyn for p in przeplywy):
+            # Numeracja elementów wspólna dla typów w kolejności przybyć, więc przy pełnej
+            # dopuszczalności to round-robin połączonego strumienia: co c-te przybycie
+            # (superpozycja - średnia c_a² ważona intensywnością)
+            ca2 = sum(p[1] * p[2] for p in przeplywy) / intensywnosc / liczba_maszyn
+        else:
+            # Typy z ograniczonym zbiorem maszyn: podział typu jak losowy (Bernoulli),
+            # potem superpozycja
+            ca2 = sum(p[1] / intensywnosc * (p[2] / p[3] + 1 - 1 / p[3]) for p in przeplywy)
+
+        maszyny.append({'intensywnosc': intensywnosc, 'rho': rho, 'te': te, 'ce2': ce2,
+                        'ca2': ca2, 'oczekiwanie': kingman(ca2, ce2, rho, te)})
+    return maszyny
+
+
+def oszacuj(konfiguracja: Dict) -> Dict:
+    """Wykorzystanie, czas realizacji i przepustowość z przybliżeń analitycznych.
+
+    Obsługiwane są profile stacjonarne; dla innych zgłaszany jest ValueError.
+    """
+    parametry = replikacje.pelna_konfiguracja(konfiguracja)
+    typy = replikacje.typy_z_konfiguracji(parametry)
+
+    strumienie = {}
+    for typ in typy:
+        if not isinstance(typ.profil, Projekt.ProfilStacjonarny):
+            raise ValueError(f"Przybliżenie wymaga profilu stacjonarnego (typ {typ.nazwa!r})")
+        strumienie[typ.nazwa] = momenty_przybyc(typ.profil.zakres_lambda)
+
+    maszyny_a = _etap(typy, parametry['liczba_maszyn_a'], 'a', strumienie, parametry)
+
+    # Przybycia do B: ten sam podział round-robin, zmienność po przejściu przez etap A
+    # (równanie przejścia c_d² = ρ²·c_e² + (1 - ρ²)·c_a² dla średnich etapu A)
+    intensywnosc_a = sum(m['intensywnosc'] for m in maszyny_a)
+    rho_a = sum(m['intensywnosc'] * m['rho'] for m in maszyny_a) / intensywnosc_a
+    ce2_a = sum(m['intensywnosc'] * m['ce2'] for m in maszyny_a) / intensywnosc_a
+    maszyny_b = _etap(typy, parametry['liczba_maszyn_b'], 'b', strumienie, parametry)
+    for maszyna in maszyny_b:
+        if maszyna['intensywnosc'] > 0:
+            maszyna['ca2'] = min(1.0, rho_a) ** 2 * ce2_a + (1 - min(1.0, rho_a) ** 2) * maszyna['ca2']
+            maszyna['oczekiwanie'] = kingman(maszyna['ca2'], maszyna['ce2'], maszyna['rho'], maszyna['te'])
+
+    # Czas realizacji: średnia po elementach (przepływy maszyn jako wagi)
+    czas_realizacji = 0.0
+    for maszyny in (maszyny_a, maszyny_b):
+        intensywnosc = sum(m['intensywnosc'] for m in maszyny)
+        czas_realizacji += sum(m['intensywnosc'] * (m['oczekiwanie'] + m['te'])
+                               for m in maszyny if m['intensywnosc'] > 0) / intensywnosc
+
+    rho_max = max(m['rho'] for m in maszyny_a + maszyny_b)
+    return {
+        'rho_a': [m['rho'] for m in maszyny_a],
+        'rho_b': [m['rho'] for m in maszyny_b],
+        'rho_max': rho_max,
+        'stabilny': rho_max < 1,
+        'czas_realizacji': czas_realizacji,
+        # Podział przepływu między maszyny jest stały, więc najbardziej przeciążona
+        # maszyna ogranicza cały strumień proporcjonalnie
+        'przepustowosc': intensywnosc_a / max(1.0, rho_max),
+        'wip': intensywnosc_a * czas_realizacji
+    }
+
+
+def niepewnosc_wzgledna(rho_max: float) -> float:
+    # Odchylenie standardowe ln(czas symulowany / oszacowanie), rośnie z obciążeniem.
+    # Porównanie z symulacją (200000 min, 4 replikacje): błąd 0-11% dla linii z Etapu I
+    # i jej wariantów (ρ 0.34-0.9), do 18% przy naprawach 3x dłuższych; oszacowanie
+    # jest zawsze zawyżone (bezpieczne przy odrzucaniu).
+    return 0.1 + 0.2 * min(rho_max, 1.0) ** 2
+
+
+def selekcja_wstepna(model: Dict, punkty: List[Dict], prog_rho: float = 1.0,
+                     max_czas_realizacji: Optional[float] = None,
+                     tolerancja_dominacji: float = 0.02,
+                     koszt_maszyny_a: float = 1.0, koszt_maszyny_b: float = 1.0) -> Dict:
+    """Podział punktów przeglądu na do symulacji (uporządkowane) i odrzucone (z powodem).
+
+    - niestabilne: ρ_max ≥ prog_rho,
+    - niespełniające wymagania: oszacowanie czasu realizacji większe od max_czas_realizacji
+      o więcej niż 3 niepewności (w skali logarytmicznej),
+    - zdominowane: wśród punktów o tych samych pozostałych parametrach istnieje punkt
+      nie droższy (koszt maszyn), o oszacowaniu czasu realizacji gorszym co najwyżej
+      o tolerancja_dominacji.
+
+    Kolejność symulacji: od największej oczekiwanej informacji - przy zadanym wymaganiu
+    bliskość progu w jednostkach niepewności (exp(-z²/2)), bez wymagania - niepewność.
+    Punkty bez oszacowania (profile niestacjonarne) są symulowane na końcu.
+    """
+    oceny = []
+    for punkt in punkty:
+        konfiguracja = replikacje.pelna_konfiguracja({**model, **punkt})
+        koszt = (koszt_maszyny_a * konfiguracja['liczba_maszyn_a']
+                 + koszt_maszyny_b * konfiguracja['liczba_maszyn_b'])
+        try:
+            oszacowanie = oszacuj(konfiguracja)
+        except ValueError:
+            oszacowanie = None
+        oceny.append({'punkt': punkt, 'koszt': koszt, 'oszacowanie': oszacowanie})
+
+    odrzucone, pozostale = [], []
+    for ocena in oceny:
+        oszacowanie = ocena['oszacowanie']
+        if oszacowanie is None:
+            pozostale.append(ocena)
+        elif oszacowanie['rho_max'] >= prog_rho:
+            odrzucone.append({**ocena, 'powod': 'niestabilny'})
+        elif (max_czas_realizacji is not None and math.log(
+                oszacowanie['czas_realizacji'] / max_czas_realizacji)
+              > 3 * niepewnosc_wzgledna(oszacowanie['rho_max'])):
+            odrzucone.append({**ocena, 'powod': 'czas_realizacji'})
+        else:
+            pozostale.append(ocena)
+
+    do_symulacji = []
+    for ocena in pozostale:
+        dominujacy = _dominujacy(ocena, pozostale, tolerancja_dominacji)
+        if dominujacy is not None:
+            odrzucone.append({**ocena, 'powod': 'zdominowany', 'przez': dominujacy['punkt']})
+            continue
+
+        oszacowanie = ocena['oszacowanie']
+        if oszacowanie is None:
+            ocena['informacja'] = 0.0
+        else:
+            sigma = niepewnosc_wzgledna(oszacowanie['rho_max'])
+            if max_czas_realizacji is None:
+                ocena['informacja'] = sigma
+            else:
+                z = math.log(oszacowanie['czas_realizacji'] / max_czas_realizacji) / sigma
+                ocena['informacja'] = math.exp(-z * z / 2)
+        do_symulacji.append(ocena)
+
+    do_symulacji.sort(key=lambda ocena: (-ocena['informacja'], ocena['koszt']))
+    return {'do_symulacji': do_symulacji, 'odrzucone': odrzucone}
+
+
+def _dominujacy(ocena: Dict, oceny: List[Dict], tolerancja: float) -> Optional[Dict]:
+    if ocena['oszacowanie'] is None:
+        return None
+    pozostale_parametry = {k: v for k, v in ocena['punkt'].items()
+                           if k not in ('liczba_maszyn_a', 'liczba_maszyn_b')}
+    czas = ocena['oszacowanie']['czas_realizacji']
+    for inna in oceny:
+        if inna is ocena or inna['oszacowanie'] is None or inna['koszt'] >= ocena['koszt']:
+            continue
+        if {k: v for k, v in inna['punkt'].items()
+                if k not in ('liczba_maszyn_a', 'liczba_maszyn_b')} != pozostale_parametry:
+            continue
+        if inna['oszacowanie']['czas_realizacji'] <= czas * (1 + tolerancja):
+            return inna
+    return None
@@ -0,0 +1,120 @@
+"""
+Asynchroniczne API: migawki z długiego przebiegu i wyniki częściowe serii replikacji.
+
+Symulacja działa w osobnych procesach, więc pętla zdarzeń asyncio nie jest blokowana;
+migawki przychodzą jako iterator asynchroniczny:
+
+    async for migawka in strumien_symulacji(konfiguracja, seed=1, liczba_migawek=50):
+        print(migawka['czas'], migawka['sredni_czas_realizacji'])
+
+    async for stan in strumien_replikacji(konfiguracja, seedy):
+        if stan['metryki']['Średni Czas Realizacji (min)']['polowa_przedzialu'] < 0.5:
+            break  # reguła sekwencyjnego zatrzymania - pozostałe replikacje są anulowane
+"""
+
+import asyncio
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+import Projekt
+import replikacje
+
+
+GLOWNE_METRYKI = (
+    'Przepustowość (elem/min)',
+    'Średni Czas Realizacji (min)',
+    'Średnia Liczba Elementów w Systemie (WIP)'
+)
+
+
+def _przebieg_z_migawkami(konfiguracja: Dict, seed: Optional[int], liczba_migawek: int, kolejka):
+    try:
+        model, czas_symulacji = replikacje.przygotuj_model(konfiguracja, seed)
+        # Przedział ufności średniego czasu realizacji metodą średnich z partii
+        # (partia = elementy ukończone między kolejnymi migawkami)
+        srednie_partii = []
+        poprzednia = model.migawka()
+        for k in range(1, liczba_migawek + 1):
+            model.krok(czas_symulacji if k == liczba_migawek else czas_symulacji * k / liczba_migawek)
+            migawka = model.migawka()
+
+            ukonczone_w_partii = migawka['ukonczone'] - poprzednia['ukonczone']
+            if ukonczone_w_partii > 0:
+                srednie_partii.append((migawka['suma_czasow_realizacji']
+                                       - poprzednia['suma_czasow_realizacji']) / ukonczone_w_partii)
+            migawka['polowa_przedzialu_czasu_realizacji'] = Projekt.przedzial_ufnosci(srednie_partii)[1]
+            migawka['postep'] = k / liczba_migawek
+            kolejka.put(('migawka', migawka))
+            poprzednia = migawka
+
+        kolejka.put(('wyniki', model.wyniki()))
+    except Exception as e:
+        kolejka.put(('blad', f"{type(e).__name__}: {e}"))
+
+
+def _odbierz(kolejka, proces):
+    # Oczekiwanie z limitem, by wątek nie zawisł po zakończeniu procesu
+    while True:
+        try:
+            return kolejka.get(timeout=0.2)
+        except queue.Empty:
+            if not proces.is_alive():
+                try:
+                    return kolejka.get_nowait()
+                except queue.Empty:
+                    return 'blad', f"Proces symulacji zakończył się (kod {proces.exitcode})"
+
+
+async def strumien_symulacji(konfiguracja: Dict, seed: Optional[int] = None,
+                             liczba_migawek: int = 20) -> AsyncIterator[Dict]:
+    """Migawki przebiegu (czas, ukończone, średnie i przedział ufności), na końcu
+    {'koniec': True, 'wyniki': pełny słownik wyników}."""
+    kontekst = multiprocessing.get_context()
+    kolejka = kontekst.Queue()
+    proces = kontekst.Process(target=_przebieg_z_migawkami,
+                              args=(konfiguracja, seed, liczba_migawek, kolejka), daemon=True)
+    proces.start()
+    petla = asyncio.get_running_loop()
+    try:
+        while True:
+            rodzaj, dane = await petla.run_in_executor(None, _odbierz, kolejka, proces)
+            if rodzaj == 'blad':
+                raise RuntimeError(dane)
+            if rodzaj == 'wyniki':
+                yield {'koniec': True, 'wyniki': dane}
+                return
+            yield dane
+    finally:
+        if proces.is_alive():
+            proces.terminate()
+        proces.join()
+
+
+async def strumien_replikacji(konfiguracja: Dict, seedy: Sequence[int],
+                              liczba_procesow: Optional[int] = None,
+                              metryki: Sequence[str] = GLOWNE_METRYKI) -> AsyncIterator[Dict]:
+    """Bieżące średnie i przedziały ufności po każdej ukończonej replikacji.
+
+    Przerwanie iteracji anuluje replikacje, które jeszcze nie wystartowały.
+    """
+    petla = asyncio.get_running_loop()
+    pula = ProcessPoolExecutor(max_workers=liczba_procesow)
+    zadania = [petla.run_in_executor(pula, replikacje.uruchom_replikacje, konfiguracja, seed)
+               for seed in seedy]
+    wiersze: List[Dict[str, float]] = []
+    try:
+        for nastepne in asyncio.as_completed(zadania):
+            wynik = await nastepne
+            wiersz = replikacje.splaszcz_wyniki(wynik)
+            wiersze.append({klucz: wiersz[klucz] for klucz in metryki if klucz in wiersz})
+            yield {
+                'ukonczone': len(wiersze),
+                'liczba': len(zadania),
+                'metryki': replikacje.podsumuj_replikacje(wiersze)
+            }
+    finally:
+        for zadanie in zadania:
+            zadanie.cancel()
+        pula.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,204 @@
+"""
+Kolumnowy, binarny magazyn wyników replikacji (tylko dopisywanie).
+
+Katalog magazynu:
+    schemat.json      - kolumny, konfiguracje i liczba zatwierdzonych wierszy
+    <nr>.f64          - jedna kolumna: kolejne float64 (kolejność bajtów maszyny)
+
+Wiersz to jedna replikacja: indeks konfiguracji, seed i każda liczbowa metryka
+z wyników uruchom_symulacje (spłaszczona jak w replikacje.splaszcz_wyniki, więc także
+wykorzystanie każdej maszyny). Brak wartości zapisywany jest jako NaN, a nowa metryka
+dodaje kolumnę wypełnioną NaN dla wcześniejszych wierszy.
+
+Dopisane wiersze są widoczne dopiero po zatwierdz() - liczba wierszy w schemacie jest
+podmieniana atomowo po zapisaniu kolumn, więc przerwany zapis nie psuje magazynu
+(nadmiarowe bajty są obcinane przy kolejnym otwarciu do zapisu). Odczyt mapuje
+kolumny do pamięci (mmap) bez parsowania:
+
+    with MagazynWynikow('wyniki.mag') as magazyn:
+        czasy = magazyn.kolumna('Średni Czas Realizacji (min)')  # memoryview 'd'
+        numpy.frombuffer(czasy)                                   # bez kopiowania
+"""
+
+import json
+import math
+import mmap
+import os
+from array import array
+from typing import Dict, Iterable, List, Sequence
+
+import replikacje
+
+
+PLIK_SCHEMATU = 'schemat.json'
+ROZMIAR = array('d').itemsize
+
+# Kolumny zawsze obecne (na początku schematu)
+KOLUMNY_STALE = ('konfiguracja', 'seed')
+
+
+class MagazynWynikow:
+    """Magazyn w katalogu; dopisywanie przez dopisz()/zatwierdz(), odczyt przez kolumna()."""
+
+    def __init__(self, katalog: str):
+        self.katalog = katalog
+        os.makedirs(katalog, exist_ok=True)
+        self.kolumny: List[str] = list(KOLUMNY_STALE)
+        self.konfiguracje: List[Dict] = []
+        self.liczba_wierszy = 0
+        self._indeksy_kolumn: Dict[str, int] = {}
+        self._indeksy_konfiguracji: Dict[str, int] = {}
+        self._bufor: Dict[str, array] = {}
+        self._oczekujace = 0
+        self._mapy: Dict[str, tuple] = {}
+        self._do_zapisu = False
+        self.odswiez()
+
+    # --- schemat ---
+
+    def odswiez(self):
+        """Wczytuje schemat (np. zatwierdzony w międzyczasie przez innego pisarza)."""
+        sciezka = os.path.join(self.katalog, PLIK_SCHEMATU)
+        if os.path.exists(sciezka):
+            with open(sciezka, encoding='utf-8') as plik:
+                schemat = json.load(plik)
+            self.kolumny = schemat['kolumny']
+            self.konfiguracje = schemat['konfiguracje']
+            self.liczba_wierszy = schemat['wiersze']
+        self._indeksy_kolumn = {nazwa: i for i, nazwa in enumerate(self.kolumny)}
+        self._indeksy_konfiguracji = {replikacje.klucz_konfiguracji(k): i
+                                      for i, k in enumerate(self.konfiguracje)}
+        self._zamknij_mapy()
+
+    def _zapisz_schemat(self):
+        sciezka = os.path.join(self.katalog, PLIK_SCHEMATU)
+        tymczasowa = sciezka + '.tmp'
+        with open(tymczasowa, 'w', encoding='utf-8') as plik:
+            json.dump({'wersja': 1, 'typ': 'float64', 'kolumny': self.kolumny,
+                       'konfiguracje': self.konfiguracje, 'wiersze': self.liczba_wierszy},
+                      plik, ensure_ascii=False)
+            plik.flush()
+            os.fsync(plik.fileno())
+        os.replace(tymczasowa, sciezka)
+
+    def _sciezka_kolumny(self, nazwa: str) -> str:
+        return os.path.join(self.katalog, f"{self._indeksy_kolumn[nazwa]}.f64")
+
+    def _przygotuj_zapis(self):
+        # Obcięcie bajtów po przerwanym zapisie (poza zatwierdzonymi wierszami)
+        if self._do_zapisu:
+            return
+        for nazwa in self.kolumny:
+            with open(self._sciezka_kolumny(nazwa), 'ab') as plik:
+                plik.truncate(self.liczba_wierszy * ROZMIAR)
+        self._do_zapisu = True
+
+    def indeks_konfiguracji(self, konfiguracja: Dict) -> int:
+        """Indeks konfiguracji (pełnej, znormalizowanej) - nowa jest dodawana do schematu."""
+        konfiguracja = json.loads(json.dumps(replikacje.pelna_konfiguracja(konfiguracja)))
+        klucz = replikacje.klucz_konfiguracji(konfiguracja)
+        if klucz not in self._indeksy_konfiguracji:
+            self._indeksy_konfiguracji[klucz] = len(self.konfiguracje)
+            self.konfiguracje.append(konfiguracja)
+        return self._indeksy_konfiguracji[klucz]
+
+    # --- zapis ---
+
+    def dopisz(self, konfiguracja: Dict, seed: int, wyniki: Dict):
+        """Dopisuje replikację (wyniki uruchom_symulacje albo spłaszczony wiersz)."""
+        self._przygotuj_zapis()
+        wiersz = replikacje.splaszcz_wyniki(wyniki)
+        wiersz['konfiguracja'] = float(self.indeks_konfiguracji(konfiguracja))
+        wiersz['seed'] = float(seed)
+        if not self._oczekujace:
+            self._bufor = {nazwa: array('d') for nazwa in self.kolumny}
+        for nazwa in wiersz:
+            if nazwa not in self._indeksy_kolumn:
+                # Nowa kolumna: NaN dla wierszy zapisanych i oczekujących
+                self._indeksy_kolumn[nazwa] = len(self.kolumny)
+                self.kolumny.append(nazwa)
+                with open(self._sciezka_kolumny(nazwa), 'wb') as plik:
+                    plik.write(array('d', [math.nan] * self.liczba_wierszy).tobytes())
+                self._bufor[nazwa] = array('d', [math.nan] * self._oczekujace)
+        for nazwa in self.kolumny:
+            self._bufor[nazwa].append(wiersz.get(nazwa, math.nan))
+        self._oczekujace += 1
+
+    def dopisz_wiele(self, wiersze: Iterable[tuple]):
+        """Dopisuje (konfiguracja, seed, wyniki) i zatwierdza całość."""
+        for konfiguracja, seed, wyniki in wiersze:
+            self.dopisz(konfiguracja, seed, wyniki)
+        self.zatwierdz()
+
+    def zatwierdz(self):
+        """Zapisuje oczekujące wiersze na dysk i udostępnia je czytelnikom."""
+        if not self._oczekujace:
+            return
+        for nazwa in self.kolumny:
+            with open(self._sciezka_kolumny(nazwa), 'ab') as plik:
+                self._bufor[nazwa].tofile(plik)
+                plik.flush()
+                os.fsync(plik.fileno())
+        self.liczba_wierszy += self._oczekujace
+        self._bufor, self._oczekujace = {}, 0
+        self._zapisz_schemat()
+        self._zamknij_mapy()
+
+    # --- odczyt ---
+
+    def __len__(self) -> int:
+        return self.liczba_wierszy
+
+    def kolumna(self, nazwa: str) -> memoryview:
+        """Zatwierdzone wartości kolumny jako memoryview 'd' na pliku zmapowanym w pamięci."""
+        if nazwa not in self._mapy:
+            rozmiar = self.liczba_wierszy * ROZMIAR
+            if rozmiar == 0:
+                return memoryview(array('d'))
+            with open(self._sciezka_kolumny(nazwa), 'rb') as plik:
+                mapa = mmap.mmap(plik.fileno(), rozmiar, access=mmap.ACCESS_READ)
+            self._mapy[nazwa] = (mapa, memoryview(mapa).cast('d'))
+        return self._mapy[nazwa][1]
+
+    def wiersz(self, i: int) -> Dict[str, float]:
+        return {nazwa: self.kolumna(nazwa)[i] for nazwa in self.kolumny}
+
+    def wiersze_konfiguracji(self, konfiguracja: Dict) -> List[int]:
+        """Numery wierszy replikacji danej konfiguracji."""
+        indeks = self._indeksy_konfiguracji.get(replikacje.klucz_konfiguracji(
+            json.loads(json.dumps(replikacje.pelna_konfiguracja(konfiguracja)))))
+        if indeks is None:
+            return []
+        kolumna = self.kolumna('konfiguracja')
+        return [i for i in range(self.liczba_wierszy) if kolumna[i] == indeks]
+
+    def wyniki(self, metryki: Sequence[str]) -> Dict[str, Dict[int, Dict[str, float]]]:
+        """{klucz konfiguracji: {seed: {metryka: wartość}}} (jak PamiecReplikacji.wyniki)."""
+        konfiguracje, seedy = self.kolumna('konfiguracja'), self.kolumna('seed')
+        kolumny = [(metryka, self.kolumna(metryka)) for metryka in metryki]
+        klucze = [replikacje.klucz_konfiguracji(k) for k in self.konfiguracje]
+        wynik: Dict[str, Dict[int, Dict[str, float]]] = {}
+        for i in range(self.liczba_wierszy):
+            wiersz = {metryka: kolumna[i] for metryka, kolumna in kolumny
+                      if not math.isnan(kolumna[i])}
+            wynik.setdefault(klucze[int(konfiguracje[i])], {})[int(seedy[i])] = wiersz
+        return wynik
+
+    def _zamknij_mapy(self):
+        for mapa, widok in self._mapy.values():
+            try:
+                widok.release()
+                mapa.close()
+            except BufferError:
+                pass  # widoki kolumny są jeszcze używane - mapa zostanie zwolniona z nimi
+        self._mapy = {}
+
+    def zamknij(self):
+        self.zatwierdz()
+        self._zamknij_mapy()
+
+    def __enter__(self) -> 'MagazynWynikow':
+        return self
+
+    def __exit__(self, *wyjatek):
+        self.zamknij()
@@ -0,0 +1,390 @@
+"""
+Metamodel (proces gaussowski) dopasowany do zapisanych wyników replikacji.
+
+Odpowiada na pytania „co jeśli" (przepustowość, czas realizacji) w milisekundach,
+z niepewnością, i wskazuje punkty, które warto jeszcze zasymulować - tam, gdzie
+niepewność jest największa.
+
+    pamiec = PamiecReplikacji('pamiec.jsonl')
+    model = dopasuj_adaptacyjnie(pamiec, {'czas_symulacji': 20000}, kandydaci,
+                                 cechy=('liczba_maszyn_b', 'zakres_lambda'))
+    model.przewiduj({'liczba_maszyn_b': 3, 'zakres_lambda': [8, 12]})
+
+Czysty Python (bez numpy): przy kilkudziesięciu-kilkuset punktach rozkład Cholesky'ego
+trwa ułamek sekundy, a predykcja O(n²) - milisekundy.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import replikacje
+
+
+METRYKI = ('Przepustowość (elem/min)', 'Średni Czas Realizacji (min)')
+# Metryki dodatnie o rozkładzie skośnym modelowane w skali logarytmicznej
+METRYKI_LOG = ('Średni Czas Realizacji (min)',)
+
+
+class PamiecReplikacji:
+    """Wyniki replikacji (konfiguracja, seed) -> wiersz, dopisywane do pliku JSON Lines."""
+
+    def __init__(self, sciezka: Optional[str] = None):
+        self.sciezka = sciezka
+        self.konfiguracje: Dict[str, Dict] = {}
+        self.wyniki: Dict[str, Dict[int, Dict[str, float]]] = {}
+        if sciezka is not None and os.path.exists(sciezka):
+            with open(sciezka, encoding='utf-8') as plik:
+                for linia in plik:
+                    if linia.strip():
+                        wpis = json.loads(linia)
+                        self._zapamietaj(wpis['konfiguracja'], wpis['seed'], wpis['wiersz'])
+
+    @staticmethod
+    def normalizuj(konfiguracja: Dict) -> Dict:
+        # Pełna konfiguracja, krotki -> listy: ta sama konfiguracja zawsze ma ten sam klucz
+        return json.loads(json.dumps(replikacje.pelna_konfiguracja(konfiguracja)))
+
+    def _zapamietaj(self, konfiguracja: Dict, seed: int, wiersz: Dict[str, float]) -> str:
+        klucz = replikacje.klucz_konfiguracji(konfiguracja)
+        self.konfiguracje[klucz] = konfiguracja
+        self.wyniki.setdefault(klucz, {})[seed] = wiersz
+        return klucz
+
+    def dodaj(self, konfiguracja: Dict, seed: int, wiersz: Dict[str, float]):
+        konfiguracja = self.normalizuj(konfiguracja)
+        self._zapamietaj(konfiguracja, seed, wiersz)
+        if self.sciezka is not None:
+            with open(self.sciezka, 'a', encoding='utf-8') as plik:
+                plik.write(json.dumps({'konfiguracja': konfiguracja, 'seed': seed, 'wiersz': wiersz},
+                                      ensure_ascii=False) + '\n')
+
+    def brakujace(self, konfiguracja: Dict, seedy: Iterable[int]) -> List[int]:
+        zapisane = self.wyniki.get(replikacje.klucz_konfiguracji(self.normalizuj(konfiguracja)), {})
+        return [seed for seed in seedy if seed not in zapisane]
+
+    def punkty(self) -> List[Tuple[Dict, List[Dict[str, float]]]]:
+        return [(self.konfiguracje[klucz], list(wiersze.values()))
+                for klucz, wiersze in self.wyniki.items()]
+
+
+def uzupelnij_pamiec(pamiec: PamiecReplikacji, konfiguracje: Iterable[Dict], seedy: Sequence[int],
+                     liczba_procesow: Optional[int] = None) -> int:
+    """Symuluje brakujące replikacje (konfiguracja, seed); zwraca ich liczbę."""
+    zadania = [(konfiguracja, seed) for konfiguracja in konfiguracje
+               for seed in pamiec.brakujace(konfiguracja, seedy)]
+    if not zadania:
+        return 0
+    for (konfiguracja, seed), wynik in zip(
+            zadania, replikacje.uruchom_replikacje_rownolegle(zadania, liczba_procesow)):
+        pamiec.dodaj(konfiguracja, seed, replikacje.splaszcz_wyniki(wynik))
+    return len(zadania)
+
+
+def wektor_cech(konfiguracja: Dict, cechy: Sequence[str]) -> List[float]:
+    """Cechy liczbowe konfiguracji; dla zakresów (a, b) - środek zakresu,
+    dla nazwy z przyrostkiem '.rozpietosc' - szerokość zakresu."""
+    parametry = replikacje.pelna_konfiguracja(konfiguracja)
+    wektor = []
+    for cecha in cechy:
+        nazwa, _, czesc = cecha.partition('.')
+        wartosc = parametry[nazwa]
+        if isinstance(wartosc, (list, tuple)):
+            wartosc = wartosc[1] - wartosc[0] if czesc == 'rozpietosc' else (wartosc[0] + wartosc[1]) / 2
+        wektor.append(float(wartosc))
+    return wektor
+
+
+# ALGEBRA LINIOWA (macierze jako listy wierszy)
+
+def cholesky(macierz: List[List[float]]) -> List[List[float]]:
+    n = len(macierz)
+    dolna = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        wiersz_i = dolna[i]
+        for j in range(i + 1):
+            wiersz_j = dolna[j]
+            suma = macierz[i][j] - sum(wiersz_i[k] * wiersz_j[k] for k in range(j))
+            if i == j:
+                if suma <= 0:
+                    raise ValueError("Macierz nie jest dodatnio określona")
+                wiersz_i[i] = math.sqrt(suma)
+            else:
+                wiersz_i[j] = suma / wiersz_j[j]
+    return dolna
+
+
+def rozwiaz_dolna(dolna: List[List[float]], b: Sequence[float]) -> List[float]:
+    # L·x = b
+    x = []
+    for i, wiersz in enumerate(dolna):
+        x.append((b[i] - sum(wiersz[k] * x[k] for k in range(i))) / wiersz[i])
+    return x
+
+
+def rozwiaz_gorna_t(dolna: List[List[float]], b: Sequence[float]) -> List[float]:
+    # Lᵀ·x = b
+    n = len(dolna)
+    x = [0.0] * n
+    for i in range(n - 1, -1, -1):
+        x[i] = (b[i] - sum(dolna[k][i] * x[k] for k in range(i + 1, n))) / dolna[i][i]
+    return x
+
+
+class ProcesGaussowski:
+    """Regresja GP z jądrem RBF (osobna skala długości dla każdej cechy) i szumem
+    obserwacji znanym dla każdego punktu (wariancja średniej z replikacji)."""
+
+    def __init__(self, skale: Sequence[float], wariancja_sygnalu: float = 1.0):
+        self.skale = list(skale)
+        self.wariancja_sygnalu = wariancja_sygnalu
+        self.x: List[List[float]] = []
+        self.szum: List[float] = []
+        self.dolna: List[List[float]] = []
+        self.alfa: List[float] = []
+        self._y: List[float] = []
+
+    def jadro(self, x1: Sequence[float], x2: Sequence[float]) -> float:
+        odleglosc = sum(((a - b) / skala) ** 2 for a, b, skala in zip(x1, x2, self.skale))
+        return self.wariancja_sygnalu * math.exp(-0.5 * odleglosc)
+
+    def dopasuj(self, x: List[List[float]], y: List[float], szum: List[float]) -> 'ProcesGaussowski':
+        self.x, self.szum = x, szum
+        macierz = [[self.jadro(xi, xj) + (szum[i] + 1e-8 if i == j else 0.0)
+                    for j, xj in enumerate(x)] for i, xi in enumerate(x)]
+        self.dolna = cholesky(macierz)
+        self.alfa = rozwiaz_gorna_t(self.dolna, rozwiaz_dolna(self.dolna, y))
+        self._y = y
+        return self
+
+    def log_wiarygodnosc(self) -> float:
+        # log p(y | X) = -½yᵀα - Σ log L_ii - n/2·log 2π
+        return (-0.5 * sum(a * b for a, b in zip(self._y, self.alfa))
+                - sum(math.log(self.dolna[i][i]) for i in range(len(self.x)))
+                - len(self.x) / 2 * math.log(2 * math.pi))
+
+    def przewiduj(self, x: Sequence[float]) -> Tuple[float, float]:
+        """Średnia i wariancja (bez szumu obserwacji) w punkcie x."""
+        k = [self.jadro(x, xi) for xi in self.x]
+        srednia = sum(a * b for a, b in zip(k, self.alfa))
+        return srednia, self._wariancja(k)
+
+    def wariancja(self, x: Sequence[float]) -> float:
+        return self._wariancja([self.jadro(x, xi) for xi in self.x])
+
+    def _wariancja(self, k: List[float]) -> float:
+        v = rozwiaz_dolna(self.dolna, k)
+        return max(0.0, self.wariancja_sygnalu - sum(a * a for a in v))
+
+    def kopia_wariancji(self) -> 'ProcesGaussowski':
+        """Kopia do aktualizacji wariancji (dodaj_obserwacje), bez średniej."""
+        kopia = ProcesGaussowski(self.skale, self.wariancja_sygnalu)
+        kopia.x, kopia.szum = list(self.x), list(self.szum)
+        kopia.dolna = [list(wiersz) for wiersz in self.dolna]
+        return kopia
+
+    def dodaj_obserwacje(self, x: Sequence[float], szum: float):
+        """Rozszerzenie rozkładu Cholesky'ego o punkt (bez wartości - tylko wariancje);
+        do wyboru kolejnych punktów partii ze zmniejszoną niepewnością w sąsiedztwie."""
+        k = [self.jadro(x, xi) for xi in self.x]
+        wiersz = rozwiaz_dolna(self.dolna, k)
+        przekatna = math.sqrt(max(1e-12, self.jadro(x, x) + szum + 1e-8 - sum(a * a for a in wiersz)))
+        for poprzedni in self.dolna:
+            poprzedni.append(0.0)
+        self.dolna.append(wiersz + [przekatna])
+        self.x = self.x + [list(x)]
+        self.szum = self.szum + [szum]
+
+
+def _dopasuj_hiperparametry(x: List[List[float]], y: List[float], szum: List[float]) -> ProcesGaussowski:
+    # Przeszukiwanie po współrzędnych (skale długości, wariancja sygnału) na siatce
+    # logarytmicznej, maksymalizacja log-wiarygodności brzegowej
+    siatka_skal = (0.1, 0.2, 0.35, 0.6, 1.0, 2.0, 4.0)
+    siatka_wariancji = (0.25, 0.5, 1.0, 2.0, 4.0)
+    najlepszy = ProcesGaussowski([0.6] * len(x[0])).dopasuj(x, y, szum)
+    wynik = najlepszy.log_wiarygodnosc()
+    for _ in range(2):
+        for wymiar in range(len(x[0]) + 1):
+            siatka = siatka_wariancji if wymiar == len(x[0]) else siatka_skal
+            for wartosc in siatka:
+                skale = list(najlepszy.skale)
+                wariancja = najlepszy.wariancja_sygnalu
+                if wymiar == len(x[0]):
+                    wariancja = wartosc
+                else:
+                    skale[wymiar] = wartosc
+                try:
+                    kandydat = ProcesGaussowski(skale, wariancja).dopasuj(x, y, szum)
+                except ValueError:
+                    continue
+                if kandydat.log_wiarygodnosc() > wynik:
+                    najlepszy, wynik = kandydat, kandydat.log_wiarygodnosc()
+    return najlepszy
+
+
+class Metamodel:
+    """Osobny proces gaussowski dla każdej metryki, na cechach przeskalowanych do [0, 1]
+    i standaryzowanych wartościach (metryki z METRYKI_LOG w skali logarytmicznej).
+
+    Punkt treningowy to średnia z replikacji konfiguracji; jej wariancja (s²/n) jest
+    szumem obserwacji. Replikacje przerwane z powodu przeciążenia są pomijane.
+    """
+
+    def __init__(self, cechy: Sequence[str], metryki: Sequence[str] = METRYKI,
+                 metryki_log: Sequence[str] = METRYKI_LOG):
+        self.cechy = list(cechy)
+        self.metryki = list(metryki)
+        self.metryki_log = set(metryki_log)
+        self.procesy: Dict[str, ProcesGaussowski] = {}
+        self.skalowanie_y: Dict[str, Tuple[float, float]] = {}
+        self.minimum: List[float] = []
+        self.rozpietosc: List[float] = []
+        self.liczba_punktow = 0
+
+    def _przeskaluj(self, wektor: Sequence[float]) -> List[float]:
+        return [(w - m) / r for w, m, r in zip(wektor, self.minimum, self.rozpietosc)]
+
+    def dopasuj(self, punkty: Sequence[Tuple[Dict, List[Dict[str, float]]]]) -> 'Metamodel':
+        dane = []
+        for konfiguracja, wiersze in punkty:
+            # Punkt z przebiegiem przerwanym jest niestabilny - bez średnich metryk
+            if len(wiersze) >= 2 and not replikacje.liczba_przerwanych(wiersze):
+                dane.append((wektor_cech(konfiguracja, self.cechy), wiersze))
+        if len(dane) < 2:
+            raise ValueError("Za mało stabilnych punktów z co najmniej dwiema replikacjami")
+
+        wektory = [wektor for wektor, _ in dane]
+        self.minimum = [min(kolumna) for kolumna in zip(*wektory)]
+        self.rozpietosc = [(max(kolumna) - min(kolumna)) or 1.0 for kolumna in zip(*wektory)]
+        x = [self._przeskaluj(wektor) for wektor in wektory]
+        self.liczba_punktow = len(x)
+
+        for metryka in self.metryki:
+            srednie, szum = [], []
+            for _, wiersze in dane:
+                wartosci = [w[metryka] for w in wiersze]
+                if metryka in self.metryki_log:
+                    wartosci = [math.log(w) for w in wartosci]
+                srednie.append(statistics.mean(wartosci))
+                szum.append(statistics.variance(wartosci) / len(wartosci))
+            srodek = statistics.mean(srednie)
+            skala = statistics.pstdev(srednie) or 1.0
+            self.skalowanie_y[metryka] = (srodek, skala)
+            y = [(s - srodek) / skala for s in srednie]
+            self.procesy[metryka] = _dopasuj_hiperparametry(x, y, [s / skala ** 2 for s in szum])
+        return self
+
+    def przewiduj(self, konfiguracja: Dict, poziom: float = 0.95) -> Dict[str, Dict[str, float]]:
+        """{metryka: {'srednia', 'odchylenie', 'dolna', 'gorna'}} w jednostkach metryki
+        (dla metryk logarytmowanych odchylenie przybliżone metodą delty)."""
+        x = self._przeskaluj(wektor_cech(konfiguracja, self.cechy))
+        z = statistics.NormalDist().inv_cdf(0.5 + poziom / 2)
+        prognoza = {}
+        for metryka, proces in self.procesy.items():
+            srodek, skala = self.skalowanie_y[metryka]
+            srednia, wariancja = proces.przewiduj(x)
+            srednia = srodek + skala * srednia
+            odchylenie = skala * math.sqrt(wariancja)
+            if metryka in self.metryki_log:
+                prognoza[metryka] = {'srednia': math.exp(srednia),
+                                     'odchylenie': math.exp(srednia) * odchylenie,
+                                     'dolna': math.exp(srednia - z * odchylenie),
+                                     'gorna': math.exp(srednia + z * odchylenie)}
+            else:
+                prognoza[metryka] = {'srednia': srednia, 'odchylenie': odchylenie,
+                                     'dolna': srednia - z * odchylenie,
+                                     'gorna': srednia + z * odchylenie}
+        return prognoza
+
+    def niepewnosc(self, konfiguracja: Dict) -> float:
+        # Największe względne odchylenie prognozy (po metrykach)
+        prognoza = self.przewiduj(konfiguracja)
+        return max(p['odchylenie'] / abs(p['srednia']) if p['srednia'] else math.inf
+                   for p in prognoza.values())
+
+    def zaproponuj(self, kandydaci: Sequence[Dict], liczba: int,
+                   prog_niepewnosci: float = 0.02) -> List[Dict]:
+        """Do `liczba` kandydatów o największej niepewności (powyżej progu), wybieranych
+        kolejno: po wyborze punktu niepewność w jego sąsiedztwie jest aktualizowana."""
+        procesy = {metryka: p.kopia_wariancji() for metryka, p in self.procesy.items()}
+        wektory = [self._przeskaluj(wektor_cech(k, self.cechy)) for k in kandydaci]
+        # Średnie prognozy nie zmieniają się przy dodawaniu punktów bez wartości
+        srednie = {metryka: [abs(self.skalowanie_y[metryka][0] + self.skalowanie_y[metryka][1]
+                                 * proces.przewiduj(x)[0]) for x in wektory]
+                   for metryka, proces in self.procesy.items()}
+        wybrane: List[int] = []
+        while len(wybrane) < liczba:
+            najlepszy, najwieksza = None, prog_niepewnosci
+            for indeks, x in enumerate(wektory):
+                if indeks in wybrane:
+                    continue
+                niepewnosc = 0.0
+                for metryka, proces in procesy.items():
+                    odchylenie = self.skalowanie_y[metryka][1] * math.sqrt(proces.wariancja(x))
+                    if metryka not in self.metryki_log:
+                        # Odchylenie względne (dla metryk logarytmowanych już względne)
+                        srednia = srednie[metryka][indeks]
+                        odchylenie = odchylenie / srednia if srednia else math.inf
+                    niepewnosc = max(niepewnosc, odchylenie)
+                if niepewnosc > najwieksza:
+                    najlepszy, najwieksza = indeks, niepewnosc
+            if najlepszy is None:
+                break
+            wybrane.append(najlepszy)
+            # Szum nowego punktu jak mediana szumu punktów treningowych
+            for proces in procesy.values():
+                proces.dodaj_obserwacje(wektory[najlepszy], statistics.median(proces.szum))
+        return [kandydaci[i] for i in wybrane]
+
+
+def dopasuj_adaptacyjnie(pamiec: PamiecReplikacji, model: Dict, kandydaci: Sequence[Dict],
+                         cechy: Sequence[str], seedy: Sequence[int] = tuple(range(1, 6)),
+                         liczba_startowa: int = 5, partia: int = 4, budzet: int = 40,
+                         prog_niepewnosci: float = 0.02,
+                         liczba_procesow: Optional[int] = None) -> Metamodel:
+    """Metamodel na punktach z pamięci, uzupełnianej symulacjami tylko w punktach
+    o największej niepewności, aż niepewność spadnie poniżej progu albo skończy się
+    budżet (liczba symulowanych punktów). Kandydaci to zmiany względem `model`."""
+    konfiguracje = [{**model, **kandydat} for kandydat in kandydaci]
+
+    # Punkty startowe równomiernie z listy kandydatów
+    krok = max(1, len(konfiguracje) // liczba_startowa)
+    startowe = konfiguracje[::krok][:liczba_startowa]
+    uzupelnij_pamiec(pamiec, startowe, seedy, liczba_procesow)
+    zasymulowane = len(startowe)
+
+    klucze = {replikacje.klucz_konfiguracji(PamiecReplikacji.normalizuj(k)) for k in konfiguracje}
+    while True:
+        punkty = [(k, w) for k, w in pamiec.punkty()
+                  if replikacje.klucz_konfiguracji(k) in klucze]
+        metamodel = Metamodel(cechy).dopasuj(punkty)
+        if zasymulowane >= budzet:
+            return metamodel
+        nowe = metamodel.zaproponuj(konfiguracje, min(partia, budzet - zasymulowane),
+                                    prog_niepewnosci)
+        nowe = [k for k in nowe if pamiec.brakujace(k, seedy)]
+        if not nowe:
+            return metamodel
+        uzupelnij_pamiec(pamiec, nowe, seedy, liczba_procesow)
+        zasymulowane += len(nowe)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Prognozy metamodelu z zapisanych replikacji")
+    parser.add_argument('pamiec', help="plik JSON Lines z wynikami replikacji")
+    parser.add_argument('zapytania', nargs='+', help="konfiguracje (JSON) do prognozy")
+    parser.add_argument('--cechy', required=True, help="nazwy cech oddzielone przecinkami")
+    argumenty = parser.parse_args(argv)
+
+    metamodel = Metamodel(argumenty.cechy.split(',')).dopasuj(PamiecReplikacji(argumenty.pamiec).punkty())
+    for zapytanie in argumenty.zapytania:
+        print(zapytanie)
+        for metryka, p in metamodel.przewiduj(json.loads(zapytanie)).items():
+            print(f"  {metryka}: {p['srednia']:.4f} (95%: {p['dolna']:.4f} - {p['gorna']:.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Najtańsza konfiguracja (K_A, K_B, bufor A->B) spełniająca wymaganie czasu realizacji.
+
+Procedura sekwencyjna z gwarancją statystyczną (sprawdzanie wykonalności z przedziałami
+ufności, por. procedury selekcji typu KN):
+    - kandydaci to iloczyn kartezjański list, koszt = koszty maszyn + koszt miejsc bufora;
+      kandydaci niestabilni według analityka.oszacuj (ρ ≥ 1) są odrzucani bez symulacji,
+    - kandydaci są rozstrzygani od najtańszych; droższych od najtańszego potwierdzonego
+      kandydata spełniającego wymaganie nie trzeba symulować,
+    - po każdej partii replikacji jednostronne przedziały t-Studenta decydują:
+      spełnia (górna granica < SLA), nie spełnia (dolna > SLA) albo na granicy
+      (cały przedział w strefie obojętności SLA ± δ - różnica nieistotna praktycznie),
+    - alarm detektora przeciążenia jest przesłanką, nie wyrokiem: kandydat jest
+      niestabilny, gdy liczba alarmów jest istotna wobec częstości fałszywych alarmów
+      detektora (test dwumianowy); replikacje z alarmem u pozostałych kandydatów są
+      powtarzane w całości bez detektora (ten sam seed), więc średnie są nieobciążone,
+    - poziom pojedynczego testu α/(2·k·L) (Bonferroni po testach średniej i alarmów,
+      k kandydatach i L przeglądach), więc wszystkie decyzje są poprawne (z dokładnością
+      do δ) z prawdopodobieństwem ≥ 1 - α,
+    - replikacje są przydzielane porcjami jak w OCBA dla wykonalności: kandydat dostaje
+      porcję, gdy ma największy stosunek s²/(średnia - SLA)² do liczby replikacji
+      (najwięcej do rozstrzygnięcia na replikację),
+    - replikacja j każdego kandydata używa tego samego seeda (wspólne liczby losowe).
+"""
+
+import math
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import Projekt
+import analityka
+import replikacje
+
+
+METRYKA = 'Średni Czas Realizacji (min)'
+
+# Stany kandydata uznawane za spełniające wymaganie
+SPELNIA = ('spelnia', 'na_granicy')
+
+# Górna granica częstości fałszywych alarmów Projekt.DetektorPrzeciazenia
+# (kalibracja: 1-2% przebiegów przy ρ≈0.92-0.955)
+FALSZYWE_ALARMY = 0.02
+
+
+def kandydaci_siatki(liczba_maszyn_a: Sequence[int], liczba_maszyn_b: Sequence[int],
+                     pojemnosc_bufora: Sequence[Optional[int]] = (None,),
+                     koszt_maszyny_a: float = 1.0, koszt_maszyny_b: float = 1.0,
+                     koszt_bufora: float = 0.0) -> List[Dict]:
+    """Kandydaci uporządkowani rosnąco po koszcie (bufor None - nieograniczony)."""
+    if koszt_bufora > 0 and None in pojemnosc_bufora:
+        raise ValueError("Nieograniczony bufor nie ma kosztu - podaj skończone pojemności")
+    kandydaci = []
+    for ka in liczba_maszyn_a:
+        for kb in liczba_maszyn_b:
+            for bufor in pojemnosc_bufora:
+                kandydaci.append({
+                    'punkt': {'liczba_maszyn_a': ka, 'liczba_maszyn_b': kb,
+                              'pojemnosc_bufora': bufor},
+                    'koszt': koszt_maszyny_a * ka + koszt_maszyny_b * kb
+                             + koszt_bufora * (bufor or 0)
+                })
+    kandydaci.sort(key=lambda k: k['koszt'])
+    return kandydaci
+
+
+def _ocena(kandydat: Dict, sla: float, strefa: float, alfa_testu: float):
+    wartosci = kandydat['wartosci']
+    n = len(wartosci)
+    kandydat['srednia'] = statistics.fmean(wartosci)
+    kandydat['odchylenie'] = statistics.stdev(wartosci) if n > 1 else math.inf
+    if n < 2:
+        return
+    polowa = Projekt.kwantyl_t(1 - alfa_testu, n - 1) * kandydat['odchylenie'] / math.sqrt(n)
+    kandydat['polowa_przedzialu'] = polowa
+    dolna, gorna = kandydat['srednia'] - polowa, kandydat['srednia'] + polowa
+    if gorna < sla:
+        kandydat['status'] = 'spelnia'
+    elif dolna > sla:
+        kandydat['status'] = 'nie_spelnia'
+    elif sla - strefa <= dolna and gorna <= sla + strefa:
+        kandydat['status'] = 'na_granicy'
+
+
+def _ogon_dwumianowy(k: int, n: int, p: float) -> float:
+    # P(X ≥ k) dla X ~ Bin(n, p)
+    return 1.0 - sum(math.comb(n, i) * p ** i * (1 - p) ** (n - i) for i in range(k))
+
+
+def _priorytet(kandydat: Dict, n: int, sla: float, strefa: float) -> float:
+    # Udział docelowy ~ s²/(średnia - SLA)² podzielony przez liczbę replikacji
+    roznica = max(abs(kandydat['srednia'] - sla), strefa, 1e-9)
+    return (kandydat['odchylenie'] / roznica) ** 2 / n
+
+
+def optymalizuj(model: Dict, sla: float,
+                liczba_maszyn_a: Sequence[int], liczba_maszyn_b: Sequence[int],
+                pojemnosc_bufora: Sequence[Optional[int]] = (None,),
+                koszt_maszyny_a: float = 1.0, koszt_maszyny_b: float = 1.0,
+                koszt_bufora: float = 0.0, metryka: str = METRYKA,
+                alfa: float = 0.05, strefa_obojetnosci: Optional[float] = None,
+                porcja: int = 5, max_replikacji: int = 50, szerokosc: Optional[int] = None,
+                seed: Optional[int] = None, liczba_procesow: Optional[int] = None,
+                falszywe_alarmy: float = FALSZYWE_ALARMY, wykonawca=None) -> Dict:
+    """Najtańszy kandydat o średniej metryki ≤ sla oraz przebieg procedury.
+
+    porcja - replikacje dodawane kandydatowi naraz (także start; przeglądy po każdej porcji),
+    strefa_obojetnosci - δ w jednostkach metryki (domyślnie 1% SLA),
+    szerokosc - liczba najtańszych nierozstrzygniętych kandydatów symulowanych
+    równocześnie (domyślnie tylu, by zająć pulę procesów),
+    falszywe_alarmy - częstość fałszywych alarmów detektora przeciążenia w teście alarmów,
+    wykonawca - jak w replikacje.uruchom_replikacje_rownolegle (domyślnie pula procesów
+    utrzymywana przez całą procedurę).
+
+    Wynik: 'najlepszy' (kandydat albo None), 'kandydaci' (stan, n, alarmy, średnia, przedział),
+    'replikacje' i 'minuty_symulacji' (łącznie, z przebiegami przerwanymi wcześniej).
+    """
+    if liczba_procesow is None:
+        liczba_procesow = os.cpu_count() or 1
+    if szerokosc is None:
+        szerokosc = max(2, math.ceil(liczba_procesow / porcja))
+    strefa = 0.01 * sla if strefa_obojetnosci is None else strefa_obojetnosci
+    # Przebiegi niestabilnych kandydatów są przerywane wcześnie (chyba że konfiguracja
+    # mówi inaczej); alarm jest tylko przesłanką dla testu alarmów
+    model = {'wykrywanie_przeciazenia': True, **model}
+
+    kandydaci = kandydaci_siatki(liczba_maszyn_a, liczba_maszyn_b, pojemnosc_bufora,
+                                 koszt_maszyny_a, koszt_maszyny_b, koszt_bufora)
+    for kandydat in kandydaci:
+        kandydat.update({'status': None, 'wartosci': [], 'alarmy': 0, 'srednia': None,
+                         'odchylenie': None, 'polowa_przedzialu': None})
+        # Bufor skończony tylko ogranicza przepływ, więc niestabilność bez bufora
+        # (ρ ≥ 1) wyklucza kandydata niezależnie od pojemności
+        try:
+            oszacowanie = analityka.oszacuj({**model, **kandydat['punkt'], 'pojemnosc_bufora': None})
+        except ValueError:
+            continue
+        if not oszacowanie['stabilny']:
+            kandydat['status'] = 'niestabilny'
+            kandydat['analitycznie'] = True
+
+    symulowani = [k for k in kandydaci if k['status'] is None]
+    liczba_przegladow = math.ceil(max_replikacji / porcja)
+    # Połowa α na testy średnich, połowa na testy alarmów
+    alfa_testu = alfa / (2 * max(1, len(symulowani)) * liczba_przegladow)
+    seedy = replikacje.seedy_replikacji(seed, max_replikacji)
+
+    pula = None
+    if wykonawca is None and liczba_procesow > 1:
+        pula = ProcessPoolExecutor(max_workers=liczba_procesow)
+
+        def wykonawca(zadania):
+            return list(pula.map(replikacje.uruchom_zadanie, zadania))
+
+    liczba_replikacji, minuty = 0, 0.0
+    try:
+        while True:
+            spelniajace = [k for k in kandydaci if k['status'] in SPELNIA]
+            granica = min((k['koszt'] for k in spelniajace), default=math.inf)
+            aktywni = [k for k in kandydaci
+                       if k['status'] is None and k['koszt'] <= granica][:szerokosc]
+            if not aktywni:
+                break
+
+            # Nowi aktywni dostają porcję startową, pozostałe porcje według priorytetu
+            przydzial = {id(k): porcja for k in aktywni if not k['wartosci']}
+            doswiadczeni = [k for k in aktywni if k['wartosci']]
+            for _ in range(max(1, math.ceil(liczba_procesow / porcja)) - len(przydzial)):
+                planowane = {id(k): len(k['wartosci']) + przydzial.get(id(k), 0)
+                             for k in doswiadczeni}
+                wolni = [k for k in doswiadczeni if planowane[id(k)] < max_replikacji]
+                if not wolni:
+                    break
+                wybrany = max(wolni, key=lambda k: _priorytet(k, planowane[id(k)], sla, strefa))
+                przydzial[id(wybrany)] = planowane[id(wybrany)] - len(wybrany['wartosci']) + porcja
+
+            zadania, wlasciciele = [], []
+            for kandydat in aktywni:
+                n = len(kandydat['wartosci'])
+                for j in range(n, min(max_replikacji, n + przydzial.get(id(kandydat), 0))):
+                    zadania.append(({**model, **kandydat['punkt']}, seedy[j]))
+                    wlasciciele.append(kandydat)
+            wyniki = replikacje.uruchom_replikacje_rownolegle(zadania, liczba_procesow, wykonawca)
+
+            for (konfiguracja, _), kandydat, wynik in zip(zadania, wlasciciele, wyniki):
+                liczba_replikacji += 1
+                minuty += (wynik['Czas Przerwania (min)']
+                           if wynik['Czas Przerwania (min)'] is not None
+                           else replikacje.pelna_konfiguracja(konfiguracja)['czas_symulacji'])
+                kandydat['alarmy'] += not wynik['Stabilny']
+            for kandydat in aktywni:
+                n = len(kandydat['wartosci']) + wlasciciele.count(kandydat)
+                if (kandydat['alarmy']
+                        and _ogon_dwumianowy(kandydat['alarmy'], n, falszywe_alarmy) <= alfa_testu):
+                    kandydat['status'] = 'niestabilny'
+
+            # Alarmy u kandydatów nieuznanych za niestabilnych - powtórka bez detektora
+            powtorki = [i for i, (kandydat, wynik) in enumerate(zip(wlasciciele, wyniki))
+                        if not wynik['Stabilny'] and kandydat['status'] != 'niestabilny']
+            if powtorki:
+                zadania_powtorek = [({**zadania[i][0], 'wykrywanie_przeciazenia': False},
+                                     zadania[i][1]) for i in powtorki]
+                for i, wynik in zip(powtorki, replikacje.uruchom_replikacje_rownolegle(
+                        zadania_powtorek, liczba_procesow, wykonawca)):
+                    wyniki[i] = wynik
+                    liczba_replikacji += 1
+                    minuty += replikacje.pelna_konfiguracja(zadania[i][0])['czas_symulacji']
+
+            for kandydat, wynik in zip(wlasciciele, wyniki):
+                kandydat['wartosci'].append(wynik[metryka])
+
+            for kandydat in aktywni:
+                if kandydat['status'] is None:
+                    _ocena(kandydat, sla, strefa, alfa_testu)
+                    if kandydat['status'] is None and len(kandydat['wartosci']) >= max_replikacji:
+                        kandydat['status'] = 'nierozstrzygniety'
+                elif kandydat['wartosci']:
+                    kandydat['srednia'] = statistics.fmean(kandydat['wartosci'])
+    finally:
+        if pula is not None:
+            pula.shutdown()
+
+    # Wszyscy tańsi od najlepszego są rozstrzygnięci; przy równym koszcie niższa średnia
+    spelniajace = [k for k in kandydaci if k['status'] in SPELNIA]
+    najlepszy = min(spelniajace, key=lambda k: (k['koszt'], k['srednia']), default=None)
+    for kandydat in kandydaci:
+        if kandydat['status'] is None:
+            kandydat['status'] = 'pominiety'  # droższy od najlepszego
+        kandydat['n'] = len(kandydat.pop('wartosci'))
+        kandydat.setdefault('analitycznie', False)
+
+    return {
+        'najlepszy': najlepszy,
+        'kandydaci': kandydaci,
+        'replikacje': liczba_replikacji,
+        'minuty_symulacji': minuty,
+        'alfa_testu': alfa_testu
+    }
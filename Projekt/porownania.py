@@ -0,0 +1,172 @@
+"""
+Porównania parami konfiguracji na wspólnych liczbach losowych (CRN).
+
+Replikacje różnych konfiguracji z tym samym seedem są skorelowane, więc porównuje się
+różnice w parach (d_j = X_a,j - X_b,j). Wszystkie pary konfiguracji i wszystkie
+metryki liczone są naraz na tablicy numpy [konfiguracja, metryka, seed]:
+    - średnia różnica, przedział ufności t-Studenta i statystyka t (test dla par),
+    - wartości p skorygowane na wielokrotne porównania (Holm - kontrola FWER,
+      Benjamini-Hochberg - kontrola FDR) w obrębie całej rodziny testów,
+    - wielkość efektu d_z Cohena (średnia różnica / odchylenie różnic).
+
+Wiersze są wyrównane po seedzie - do porównania trafiają tylko seedy wspólne dla
+wszystkich konfiguracji, więc brakujące replikacje nie psują sparowania. Konfiguracja
+z przebiegiem przerwanym jako niestabilny (Stabilny = 0) nie jest porównywana - jej
+pary mają tylko 'niestabilne' (etykiety), bez statystyk; pozostałe porównania liczone
+są na niezmienionej populacji seedów.
+
+    pamiec = metamodel.PamiecReplikacji('pamiec.jsonl')
+    wyniki = porownaj_pamiec(pamiec, metryki=('Średni Czas Realizacji (min)',), pary='do_bazowej')
+"""
+
+import itertools
+import math
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+import Projekt
+import replikacje
+
+
+METRYKI = ('Przepustowość (elem/min)', 'Średni Czas Realizacji (min)',
+           'Średnia Liczba Elementów w Systemie (WIP)')
+
+POPRAWKI = ('holm', 'bh', None)
+
+
+def wyrownaj(wyniki: Dict[str, Dict[int, Dict[str, float]]],
+             metryki: Sequence[str]) -> Tuple[List[int], np.ndarray]:
+    """Seedy wspólne dla wszystkich konfiguracji i tablica [konfiguracja, metryka, seed]."""
+    wspolne = None
+    for wiersze in wyniki.values():
+        seedy = {seed for seed, wiersz in wiersze.items()
+                 if all(m in wiersz for m in metryki)}
+        wspolne = seedy if wspolne is None else wspolne & seedy
+    seedy = sorted(wspolne or ())
+    tablica = np.array([[[wiersze[seed][metryka] for seed in seedy] for metryka in metryki]
+                        for wiersze in wyniki.values()], dtype=float)
+    return seedy, tablica.reshape(len(wyniki), len(metryki), len(seedy))
+
+
+def poprawka_holma(p: np.ndarray) -> np.ndarray:
+    """Skorygowane wartości p metodą Holma (step-down Bonferroni)."""
+    m = p.size
+    kolejnosc = np.argsort(p, kind='stable')
+    skorygowane = np.maximum.accumulate((m - np.arange(m)) * p[kolejnosc])
+    wynik = np.empty(m)
+    wynik[kolejnosc] = np.minimum(skorygowane, 1.0)
+    return wynik
+
+
+def poprawka_bh(p: np.ndarray) -> np.ndarray:
+    """Skorygowane wartości p metodą Benjaminiego-Hochberga (q-wartości)."""
+    m = p.size
+    kolejnosc = np.argsort(p, kind='stable')
+    skorygowane = np.minimum.accumulate((m / np.arange(m, 0, -1) * p[kolejnosc][::-1]))[::-1]
+    wynik = np.empty(m)
+    wynik[kolejnosc] = np.minimum(skorygowane, 1.0)
+    return wynik
+
+
+def _wartosci_p(t: np.ndarray, stopnie_swobody: int) -> np.ndarray:
+    # Dwustronne p z rozkładu t (scipy tylko do dystrybuanty)
+    from scipy.special import stdtr
+    return 2 * stdtr(stopnie_swobody, -np.abs(t))
+
+
+def porownaj_tablice(tablica: np.ndarray, pary: Sequence[Tuple[int, int]],
+                     poziom: float = 0.95, poprawka: Optional[str] = 'holm',
+                     alfa: float = 0.05) -> Dict[str, np.ndarray]:
+    """Statystyki różnic dla par indeksów konfiguracji; tablice [para, metryka]."""
+    if poprawka not in POPRAWKI:
+        raise ValueError(f"Nieznana poprawka: {poprawka} (dostępne: {POPRAWKI})")
+    n = tablica.shape[2]
+    if n < 2:
+        raise ValueError("Porównanie wymaga co najmniej 2 wspólnych seedów")
+    a, b = np.array(pary, dtype=int).reshape(-1, 2).T
+    roznice = tablica[a] - tablica[b]  # [para, metryka, seed]
+
+    srednia = roznice.mean(axis=2)
+    odchylenie = roznice.std(axis=2, ddof=1)
+    blad = odchylenie / math.sqrt(n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Stała różnica: t = ±inf (p = 0), a zerowa - brak różnicy (p = 1)
+        t = np.where(blad > 0, srednia / np.where(blad > 0, blad, 1.0),
+                     np.where(srednia == 0, 0.0, np.sign(srednia) * np.inf))
+        d_z = np.where(odchylenie > 0, srednia / np.where(odchylenie > 0, odchylenie, 1.0),
+                       np.where(srednia == 0, 0.0, np.sign(srednia) * np.inf))
+    p = _wartosci_p(t, n - 1)
+
+    if poprawka == 'holm':
+        p_skorygowane = poprawka_holma(p.ravel()).reshape(p.shape)
+    elif poprawka == 'bh':
+        p_skorygowane = poprawka_bh(p.ravel()).reshape(p.shape)
+    else:
+        p_skorygowane = p
+    return {
+        'srednia_roznicy': srednia,
+        'odchylenie_roznicy': odchylenie,
+        'polowa_przedzialu': Projekt.kwantyl_t(0.5 + poziom / 2, n - 1) * blad,
+        't': t,
+        'p': p,
+        'p_skorygowane': p_skorygowane,
+        'istotna': p_skorygowane < alfa,
+        'd_z': d_z
+    }
+
+
+def wybierz_pary(liczba: int, pary: Union[str, Sequence[Tuple[int, int]]]) -> List[Tuple[int, int]]:
+    """'wszystkie' - każda para raz, 'do_bazowej' - każda konfiguracja z pierwszą."""
+    if pary == 'wszystkie':
+        return list(itertools.combinations(range(liczba), 2))
+    if pary == 'do_bazowej':
+        return [(0, i) for i in range(1, liczba)]
+    if isinstance(pary, str):
+        raise ValueError(f"Nieznany wybór par: {pary}")
+    return [tuple(para) for para in pary]
+
+
+def porownaj(wyniki: Dict[str, Dict[int, Dict[str, float]]], metryki: Sequence[str] = METRYKI,
+             pary: Union[str, Sequence[Tuple[int, int]]] = 'wszystkie', poziom: float = 0.95,
+             poprawka: Optional[str] = 'holm', alfa: float = 0.05) -> List[Dict]:
+    """Porównania parami konfiguracji {etykieta: {seed: wiersz}}; wiersz na parę i metrykę.
+
+    Różnica = A - B. Poprawka obejmuje wszystkie porównywane pary i metryki naraz;
+    pary z konfiguracją niestabilną mają zamiast statystyk 'niestabilne'.
+    """
+    etykiety = list(wyniki)
+    niestabilne = {i for i, wiersze in enumerate(wyniki.values())
+                   if replikacje.liczba_przerwanych(wiersze.values())}
+    seedy, tablica = wyrownaj(wyniki, metryki)
+    pary = wybierz_pary(len(etykiety), pary)
+    porownywane = [para for para in pary if not set(para) & niestabilne]
+    statystyki = porownaj_tablice(tablica, porownywane, poziom, poprawka, alfa) if porownywane else {}
+
+    wiersze = []
+    i = 0
+    for a, b in pary:
+        if {a, b} & niestabilne:
+            for metryka in metryki:
+                wiersze.append({'a': etykiety[a], 'b': etykiety[b], 'metryka': metryka,
+                                'n': len(seedy),
+                                'niestabilne': [etykiety[k] for k in (a, b) if k in niestabilne]})
+            continue
+        for j, metryka in enumerate(metryki):
+            wiersze.append({
+                'a': etykiety[a],
+                'b': etykiety[b],
+                'metryka': metryka,
+                'n': len(seedy),
+                **{klucz: wartosci[i, j].item() for klucz, wartosci in statystyki.items()}
+            })
+        i += 1
+    return wiersze
+
+
+def porownaj_pamiec(pamiec, metryki: Sequence[str] = METRYKI,
+                    pary: Union[str, Sequence[Tuple[int, int]]] = 'wszystkie',
+                    poziom: float = 0.95, poprawka: Optional[str] = 'holm',
+                    alfa: float = 0.05) -> List[Dict]:
+    """Porównania wszystkich konfiguracji z metamodel.PamiecReplikacji (etykieta = klucz)."""
+    return porownaj(pamiec.wyniki, metryki, pary, poziom, poprawka, alfa)
@@ -0,0 +1,384 @@
+"""
+Uruchamianie replikacji modelu z Projekt.py na podstawie konfiguracji (słownika).
+
+Moduł jest rdzeniem dla skryptów badań: importuje wyłącznie simpy (przez Projekt.py)
+i bibliotekę standardową, dzięki czemu procesy robocze startują szybko.
+Analiza statystyczna (scipy) i wykresy (matplotlib) są ładowane dopiero w skryptach,
+które ich potrzebują.
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import Projekt
+
+
+# Klucze konfiguracji przekazywane do modelu
+KLUCZE_KONFIGURACJI = (
+    'czas_symulacji', 'liczba_maszyn_a', 'liczba_maszyn_b',
+    'zakres_lambda', 'zakres_czasu_a', 'zakres_czasu_b',
+    'zakres_mtbf', 'zakres_mttr', 'typy_produktow', 'silnik',
+    'wykrywanie_przeciazenia', 'pojemnosc_bufora', 'strumienie_losowe', 'antytetyczne',
+    'model_awarii', 'liczba_technikow', 'polityka_napraw'
+)
+
+
+def domyslna_konfiguracja() -> Dict:
+    # Wartości globalne z Projekt.py odczytywane w chwili wywołania
+    return {
+        'czas_symulacji': Projekt.CZAS_SYMULACJI,
+        'liczba_maszyn_a': Projekt.LICZBA_MASZYN_A,
+        'liczba_maszyn_b': Projekt.LICZBA_MASZYN_B,
+        'zakres_lambda': Projekt.ZAKRES_LAMBDA,
+        'zakres_czasu_a': Projekt.ZAKRES_CZASU_A,
+        'zakres_czasu_b': Projekt.ZAKRES_CZASU_B,
+        'zakres_mtbf': Projekt.ZAKRES_MTBF,
+        'zakres_mttr': Projekt.ZAKRES_MTTR,
+        'typy_produktow': None,
+        'silnik': 'rekordy',
+        # Przerywanie przebiegów niestabilnych (fałszywe alarmy przy ρ bliskim 1) -
+        # tylko na żądanie, np. w optymalizacji i przeglądzie z selekcją
+        'wykrywanie_przeciazenia': False,
+        'pojemnosc_bufora': None,
+        # Osobne generatory dla źródeł losowości (Projekt.StrumienieLosowe) - zmiana
+        # liczby maszyn czy typów nie przesuwa losowań pozostałych źródeł; False -
+        # wspólny generator modułu random (wyniki sprzed hierarchii strumieni);
+        # antytetyczne=True - przebieg z 1 - U, para do przebiegu o tym samym seedzie
+        'strumienie_losowe': True,
+        'antytetyczne': False,
+        # Rozkład czasu do awarii (model_awarii_z_konfiguracji; None - wykładniczy
+        # z zakres_mtbf) i wspólna ekipa naprawcza (None - technik przy każdej maszynie)
+        # z kolejnością napraw Projekt.POLITYKI_NAPRAW
+        'model_awarii': None,
+        'liczba_technikow': None,
+        'polityka_napraw': 'fifo'
+    }
+
+
+def pelna_konfiguracja(konfiguracja: Dict) -> Dict:
+    nieznane = set(konfiguracja) - set(KLUCZE_KONFIGURACJI)
+    if nieznane:
+        raise ValueError(f"Nieznane klucze konfiguracji: {', '.join(sorted(nieznane))}")
+    return {**domyslna_konfiguracja(), **konfiguracja}
+
+
+def profil_z_konfiguracji(opis: Dict):
+    rodzaj = opis.get('rodzaj', 'stacjonarny')
+    if rodzaj == 'stacjonarny':
+        return Projekt.ProfilStacjonarny(tuple(opis['zakres_lambda']))
+    if rodzaj == 'deterministyczny':
+        return Projekt.ProfilDeterministyczny(opis['odstep'])
+    if rodzaj == 'odcinkowy':
+        # Wartość null/"inf" w punkcie oznacza brak przybyć
+        punkty = [(czas, math.inf if srednia in (None, 'inf') else srednia)
+                  for czas, srednia in opis['punkty']]
+        return Projekt.ProfilOdcinkowy(punkty, opis.get('okres'), opis.get('liniowy', False))
+    if rodzaj == 'plik':
+        return Projekt.ProfilZPliku(opis['sciezka'], opis.get('skala', 1.0),
+                                    opis.get('przesuniecie', 0.0))
+    raise ValueError(f"Nieznany rodzaj profilu przybyć: {rodzaj!r}")
+
+
+def model_awarii_z_konfiguracji(opis: Optional[Dict], zakres_mtbf) -> Optional[Projekt.ModelAwarii]:
+    """{'rozklad': 'wykladniczy' | 'weibull' | 'lognormalny', parametry rozkładu,
+    'wedlug_czasu_pracy': bool}; wykładniczy bez 'zakres_mtbf' używa zakresu modelu."""
+    if opis is None:
+        return None
+    rozklad = opis.get('rozklad', 'wykladniczy')
+    wedlug_czasu_pracy = opis.get('wedlug_czasu_pracy', False)
+    if rozklad == 'wykladniczy':
+        return Projekt.AwarieWykladnicze(tuple(opis.get('zakres_mtbf', zakres_mtbf)),
+                                         wedlug_czasu_pracy)
+    if rozklad == 'weibull':
+        return Projekt.AwarieWeibulla(opis['ksztalt'], opis['skala'], wedlug_czasu_pracy)
+    if rozklad == 'lognormalny':
+        return Projekt.AwarieLogNormalne(opis['mu'], opis['sigma'], wedlug_czasu_pracy)
+    raise ValueError(f"Nieznany rozkład czasu do awarii: {rozklad!r}")
+
+
+def typy_z_konfiguracji(konfiguracja: Dict) -> List[Projekt.TypProduktu]:
+    opisy = konfiguracja['typy_produktow']
+    if not opisy:
+        return [Projekt.TypProduktu('standard', tuple(konfiguracja['zakres_lambda']),
+                                    tuple(konfiguracja['zakres_czasu_a']),
+                                    tuple(konfiguracja['zakres_czasu_b']))]
+
+    typy = []
+    for opis in opisy:
+        zakres_lambda = tuple(opis.get('zakres_lambda', konfiguracja['zakres_lambda']))
+        profil = profil_z_konfiguracji(opis['profil']) if 'profil' in opis else None
+        typy.append(Projekt.TypProduktu(
+            opis['nazwa'], zakres_lambda,
+            tuple(opis.get('zakres_czasu_a', konfiguracja['zakres_czasu_a'])),
+            tuple(opis.get('zakres_czasu_b', konfiguracja['zakres_czasu_b'])),
+            opis.get('priorytet', 0), opis.get('maszyny_a'), opis.get('maszyny_b'),
+            profil
+        ))
+    return typy
+
+
+def przygotuj_model(konfiguracja: Dict, seed: Optional[int] = None,
+                    dziennik: Optional[Projekt.DziennikZdarzen] = None) -> Tuple[Projekt.ModelLinii, float]:
+    """Model gotowy do prowadzenia odcinkami oraz docelowy czas symulacji."""
+    parametry = pelna_konfiguracja(konfiguracja)
+    if seed is not None:
+        random.seed(seed)
+    strumienie = None
+    if parametry['strumienie_losowe'] or parametry['antytetyczne']:
+        strumienie = Projekt.StrumienieLosowe(seed, parametry['antytetyczne'])
+
+    model = Projekt.ModelLinii(
+        Projekt.StatystykiSymulacji(),
+        typy_z_konfiguracji(parametry),
+        parametry['liczba_maszyn_a'], parametry['liczba_maszyn_b'],
+        tuple(parametry['zakres_mtbf']), tuple(parametry['zakres_mttr']),
+        parametry['silnik'], parametry['wykrywanie_przeciazenia'],
+        parametry['pojemnosc_bufora'], strumienie,
+        model_awarii_z_konfiguracji(parametry['model_awarii'], parametry['zakres_mtbf']),
+        parametry['liczba_technikow'], parametry['polityka_napraw'], dziennik
+    )
+    return model, parametry['czas_symulacji']
+
+
+def uruchom_replikacje(konfiguracja: Dict, seed: Optional[int] = None) -> Dict:
+    """Pojedyncza replikacja; zwraca słownik wyników uruchom_symulacje."""
+    model, czas_symulacji = przygotuj_model(konfiguracja, seed)
+    model.krok(czas_symulacji)
+    return model.wyniki()
+
+
+def klucz_konfiguracji(dane) -> str:
+    # Skrót kanonicznego JSON - ta sama konfiguracja daje ten sam klucz
+    tekst = json.dumps(dane, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(tekst.encode('utf-8')).hexdigest()[:16]
+
+
+def seed_replikacji(seed_glowny: int, indeks: int) -> int:
+    """Seed replikacji o danym indeksie - wyznaczany samodzielnie, bez poprzednich.
+
+    Permutacja indeksu zależna od seeda głównego (Projekt.SekwencjaSeedow), więc seedy
+    jednej serii nigdy nie kolidują; wartości < 2^52 są dokładne także jako float64.
+    Strumienie replikacji (przybycia, obsługa A i B, awarie maszyn) wyprowadza z tego
+    seeda Projekt.StrumienieLosowe.
+    """
+    return Projekt.SekwencjaSeedow(seed_glowny, ('replikacje',)).permutacja(indeks)
+
+
+def seedy_replikacji(seed_glowny: Optional[int], liczba: int, start: int = 0) -> List[int]:
+    """Seedy replikacji start .. start + liczba - 1 (seed_glowny=None - losowy)."""
+    if seed_glowny is None:
+        seed_glowny = random.SystemRandom().getrandbits(64)
+    return [seed_replikacji(seed_glowny, indeks) for indeks in range(start, start + liczba)]
+
+
+def splaszcz_wyniki(wyniki: Dict, prefiks: str = '') -> Dict[str, float]:
+    """Liczbowe pola (także zagnieżdżone) słownika wyników jako {'klucz.podklucz': wartość}."""
+    wiersz = {}
+    for klucz, wartosc in wyniki.items():
+        nazwa = f"{prefiks}{klucz}"
+        if isinstance(wartosc, dict):
+            wiersz.update(splaszcz_wyniki(wartosc, nazwa + '.'))
+        elif isinstance(wartosc, (int, float)):
+            wiersz[nazwa] = float(wartosc)
+    return wiersz
+
+
+def liczba_przerwanych(wiersze: Iterable[Dict[str, float]]) -> int:
+    """Replikacje przerwane przez detektor przeciążenia (Stabilny = 0)."""
+    return sum(1 for wiersz in wiersze if wiersz.get('Stabilny', 1.0) != 1.0)
+
+
+def podsumuj_replikacje(wiersze: List[Dict[str, float]], poziom: float = 0.95,
+                        pomin: Iterable[str] = ('seed',)) -> Dict[str, Dict]:
+    """Średnia, odchylenie i przedział ufności każdej metryki wspólnej dla replikacji.
+
+    Gdy detektor przeciążenia przerwał którąkolwiek replikację, konfiguracja jest
+    niestabilna i podsumowanie zawiera tylko 'Stabilny' (średnia = udział stabilnych
+    replikacji): średnie z pozostałych, najmniej zatłoczonych przebiegów zaniżałyby
+    czas realizacji i WIP, a przerwanych - obejmują tylko czas do przerwania.
+    """
+    if not wiersze:
+        return {}
+    pomin = set(pomin)
+    klucze = ['Stabilny'] if liczba_przerwanych(wiersze) else wiersze[0]
+    podsumowanie = {}
+    for klucz in klucze:
+        if klucz in pomin:
+            continue
+        wartosci = [wiersz[klucz] for wiersz in wiersze if klucz in wiersz]
+        if len(wartosci) != len(wiersze):
+            continue
+        srednia, polowa = Projekt.przedzial_ufnosci(wartosci, poziom)
+        podsumowanie[klucz] = {
+            'srednia': srednia,
+            'odchylenie': statistics.stdev(wartosci) if len(wartosci) > 1 else 0.0,
+            'polowa_przedzialu': polowa,
+            'n': len(wartosci)
+        }
+    return podsumowanie
+
+
+def wartosci_oczekiwane_wejsc(konfiguracja: Dict) -> Dict[str, float]:
+    """Znane wartości oczekiwane średnich wejść (klucze jak w splaszcz_wyniki).
+
+    Średnia z zakresu jednostajnego to środek zakresu; odstęp wykładniczy o średniej
+    losowanej z zakresu_lambda ma średnią równą środkowi tego zakresu. Typy
+    z profilem niestacjonarnym pomijane są tylko dla odstępów.
+    """
+    parametry = pelna_konfiguracja(konfiguracja)
+    oczekiwane = {}
+    for typ in typy_z_konfiguracji(parametry):
+        prefiks = f"Średnie Wejściowe.{typ.nazwa}."
+        if isinstance(typ.profil, Projekt.ProfilStacjonarny):
+            oczekiwane[prefiks + 'odstep_przybyc'] = sum(typ.profil.zakres_lambda) / 2
+        oczekiwane[prefiks + 'czas_a'] = sum(typ.zakres_czasu_a) / 2
+        oczekiwane[prefiks + 'czas_b'] = sum(typ.zakres_czasu_b) / 2
+    return oczekiwane
+
+
+def _odwroc(macierz: List[List[float]]) -> List[List[float]]:
+    # Eliminacja Gaussa-Jordana z wyborem elementu głównego (małe macierze)
+    n = len(macierz)
+    a = [list(wiersz) + [float(i == j) for j in range(n)] for i, wiersz in enumerate(macierz)]
+    for k in range(n):
+        glowny = max(range(k, n), key=lambda i: abs(a[i][k]))
+        if abs(a[glowny][k]) < 1e-12:
+            raise ValueError("Macierz osobliwa")
+        a[k], a[glowny] = a[glowny], a[k]
+        dzielnik = a[k][k]
+        a[k] = [x / dzielnik for x in a[k]]
+        for i in range(n):
+            if i != k and a[i][k]:
+                czynnik = a[i][k]
+                a[i] = [x - czynnik * y for x, y in zip(a[i], a[k])]
+    return [wiersz[n:] for wiersz in a]
+
+
+def estymator_kontrolny(wartosci: List[float], kontrolne: List[List[float]],
+                        oczekiwane: List[float], poziom: float = 0.95) -> Dict:
+    """Estymator ze zmiennymi kontrolnymi: wyraz wolny regresji Y na (C - E[C]).
+
+    Y_i = β0 + βᵀ(C_i - E[C]) + ε; estymatorem średniej jest β0, jego wariancja to
+    s²·[(XᵀX)⁻¹]₀₀, przedział t-Studenta ma n - 1 - q stopni swobody.
+    """
+    n, q = len(wartosci), len(oczekiwane)
+    if n - 1 - q < 1:
+        raise ValueError(f"Za mało obserwacji ({n}) dla {q} zmiennych kontrolnych")
+    x = [[1.0] + [c - m for c, m in zip(wiersz, oczekiwane)] for wiersz in kontrolne]
+    xtx = [[sum(w[i] * w[j] for w in x) for j in range(q + 1)] for i in range(q + 1)]
+    xty = [sum(w[i] * y for w, y in zip(x, wartosci)) for i in range(q + 1)]
+    odwrotna = _odwroc(xtx)
+    beta = [sum(odwrotna[i][j] * xty[j] for j in range(q + 1)) for i in range(q + 1)]
+    reszty = [y - sum(b * xi for b, xi in zip(beta, w)) for w, y in zip(x, wartosci)]
+    s2 = sum(r * r for r in reszty) / (n - 1 - q)
+    odchylenie_sredniej = math.sqrt(s2 * odwrotna[0][0])
+    return {
+        'srednia': beta[0],
+        'odchylenie': math.sqrt(s2 * odwrotna[0][0] * n),
+        'polowa_przedzialu': Projekt.kwantyl_t(0.5 + poziom / 2, n - 1 - q) * odchylenie_sredniej,
+        'n': n,
+        'wspolczynniki': beta[1:]
+    }
+
+
+def podsumuj_z_kontrola(wiersze: List[Dict[str, float]], oczekiwane: Dict[str, float],
+                        poziom: float = 0.95, pomin: Iterable[str] = ('seed',)) -> Dict[str, Dict]:
+    """Jak podsumuj_replikacje, ale średnie metryk skorygowane zmiennymi kontrolnymi.
+
+    Zmienne kontrolne to średnie wejść o znanych wartościach oczekiwanych; stałe
+    we wszystkich wierszach (np. zakres zerowej szerokości) są pomijane. Przy zbyt
+    małej liczbie wierszy zostaje zwykły przedział, a konfiguracji niestabilnej -
+    samo 'Stabilny' jak w podsumuj_replikacje.
+    """
+    podsumowanie = podsumuj_replikacje(wiersze, poziom, pomin)
+    if liczba_przerwanych(wiersze):
+        return podsumowanie
+    kontrolne = [k for k in oczekiwane
+                 if k in podsumowanie and podsumowanie[k]['odchylenie'] > 0]
+    if len(wiersze) - 1 - len(kontrolne) < 2:
+        return podsumowanie
+    macierz = [[wiersz[k] for k in kontrolne] for wiersz in wiersze]
+    for klucz, dane in podsumowanie.items():
+        if klucz in oczekiwane or klucz == 'Stabilny' or dane['odchylenie'] == 0:
+            continue
+        skorygowane = estymator_kontrolny([wiersz[klucz] for wiersz in wiersze], macierz,
+                                          [oczekiwane[k] for k in kontrolne], poziom)
+        podsumowanie[klucz] = {**dane, 'srednia': skorygowane['srednia'],
+                               'polowa_przedzialu': skorygowane['polowa_przedzialu'],
+                               'polowa_przedzialu_bez_kontroli': dane['polowa_przedzialu']}
+    return podsumowanie
+
+
+def uruchom_serie(konfiguracja: Dict, liczba: int, seed_glowny: Optional[int] = None,
+                  liczba_procesow: Optional[int] = None, antytetyczne: bool = False,
+                  zmienne_kontrolne: bool = False, poziom: float = 0.95,
+                  wykonawca=None) -> Dict:
+    """Seria replikacji z opcjonalną redukcją wariancji.
+
+    antytetyczne - ceil(liczba / 2) par (U, 1 - U) na osobnych strumieniach losowych
+    (nieparzysta liczba zaokrąglana w górę do pełnej pary - żadna replikacja nie
+    przepada); obserwacją jest średnia pary, więc przedział liczony jest z par.
+    zmienne_kontrolne - średnie skorygowane regresją na średnie wejść (podsumuj_z_kontrola).
+    wykonawca - jak w uruchom_replikacje_rownolegle.
+    Zwraca 'wiersze' (każda replikacja) i 'podsumowanie'.
+    """
+    if antytetyczne:
+        seedy = seedy_replikacji(seed_glowny, max(1, math.ceil(liczba / 2)))
+        zadania = [({**konfiguracja, 'strumienie_losowe': True, 'antytetyczne': odbicie}, seed)
+                   for seed in seedy for odbicie in (False, True)]
+    else:
+        seedy = seedy_replikacji(seed_glowny, liczba)
+        zadania = [(konfiguracja, seed) for seed in seedy]
+    wyniki = uruchom_replikacje_rownolegle(zadania, liczba_procesow, wykonawca)
+    wiersze = [{'seed': seed, **splaszcz_wyniki(wynik)}
+               for (_, seed), wynik in zip(zadania, wyniki)]
+
+    obserwacje = wiersze
+    if antytetyczne:
+        obserwacje = []
+        for para in zip(wiersze[::2], wiersze[1::2]):
+            wspolne = set(para[0]) & set(para[1])
+            obserwacje.append({k: (para[0][k] + para[1][k]) / 2 for k in para[0] if k in wspolne})
+            if 'Stabilny' in wspolne:
+                # Para jest stabilna tylko, gdy oba przebiegi są stabilne
+                obserwacje[-1]['Stabilny'] = min(para[0]['Stabilny'], para[1]['Stabilny'])
+    if zmienne_kontrolne:
+        podsumowanie = podsumuj_z_kontrola(obserwacje, wartosci_oczekiwane_wejsc(konfiguracja),
+                                           poziom)
+    else:
+        podsumowanie = podsumuj_replikacje(obserwacje, poziom)
+    return {'wiersze': wiersze, 'podsumowanie': podsumowanie}
+
+
+def uruchom_zadanie(zadanie: Tuple[Dict, Optional[int]]) -> Dict:
+    """Jedna replikacja zadania (konfiguracja, seed); funkcja dla puli procesów."""
+    konfiguracja, seed = zadanie
+    return uruchom_replikacje(konfiguracja, seed)
+
+
+def uruchom_replikacje_rownolegle(zadania: Iterable[Tuple[Dict, Optional[int]]],
+                                  liczba_procesow: Optional[int] = None,
+                                  wykonawca=None) -> List[Dict]:
+    """Replikacje (konfiguracja, seed) w puli procesów; wyniki w kolejności zadań.
+
+    Przy liczba_procesow=1 replikacje są liczone w bieżącym procesie. wykonawca -
+    funkcja zadania -> wyniki zastępująca pulę (np. rozproszone.wykonawca_rozproszony).
+    """
+    zadania = list(zadania)
+    if wykonawca is not None:
+        return wykonawca(zadania)
+    if liczba_procesow is None:
+        liczba_procesow = os.cpu_count() or 1
+    liczba_procesow = max(1, min(liczba_procesow, len(zadania)))
+
+    if liczba_procesow == 1:
+        return [uruchom_zadanie(zadanie) for zadanie in zadania]
+
+    with ProcessPoolExecutor(max_workers=liczba_procesow) as pula:
+        return list(pula.map(uruchom_zadanie, zadania))
@@ -0,0 +1,348 @@
+"""
+Rozproszone replikacje: koordynator rozdziela zadania (konfiguracja, seed) węzłom przez TCP.
+
+Węzły same łączą się z koordynatorem i pobierają kolejne zadania (JSON, jeden
+komunikat na linię):
+    węzeł -> {"typ": "pobierz", "wezel": ...}
+    koord -> {"typ": "zadanie", "id": i, "konfiguracja": {...}, "seed": s}
+             | {"typ": "czekaj", "sekundy": t} | {"typ": "koniec"}
+    węzeł -> {"typ": "wynik", "id": i, "wyniki": {...}} | {"typ": "blad", "id": i, "komunikat": ...}
+    koord -> {"typ": "ok"}
+
+Zadanie z błędem, z zerwanego połączenia albo przekraczające limit czasu wraca do
+kolejki (najwyżej max_prob prób). Seed należy do zadania, a nie do węzła, więc wyniki
+są identyczne jak przy uruchomieniu lokalnym, niezależnie od przydziału i powtórzeń.
+
+    # na każdym węźle (także wiele procesów na węzeł):
+    python rozproszone.py wezel koordynator:9400 --workers 8
+    # przegląd rozproszony (koordynator nasłuchuje na porcie 9400):
+    python uruchom.py przeglad konfiguracja.toml --wezly 0.0.0.0:9400
+    # test na jednej maszynie - lokalne procesy węzłów:
+    python uruchom.py przeglad konfiguracja.toml --lokalne-wezly 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import replikacje
+
+
+KLUCZ_INT = '__int__'
+
+
+def _koduj(obiekt):
+    # Słowniki z kluczami całkowitymi (percentyle) przechodzą przez JSON bez zmian typu
+    if isinstance(obiekt, dict):
+        if obiekt and all(isinstance(k, int) and not isinstance(k, bool) for k in obiekt):
+            return {KLUCZ_INT: {str(k): _koduj(v) for k, v in obiekt.items()}}
+        return {k: _koduj(v) for k, v in obiekt.items()}
+    if isinstance(obiekt, (list, tuple)):
+        return [_koduj(v) for v in obiekt]
+    return obiekt
+
+
+def _dekoduj_slownik(slownik: Dict):
+    if len(slownik) == 1 and KLUCZ_INT in slownik:
+        return {int(k): v for k, v in slownik[KLUCZ_INT].items()}
+    return slownik
+
+
+def wyslij(plik, komunikat: Dict):
+    plik.write(json.dumps(_koduj(komunikat), ensure_ascii=False).encode('utf-8') + b'\n')
+    plik.flush()
+
+
+def odbierz(plik) -> Optional[Dict]:
+    linia = plik.readline()
+    if not linia:
+        return None
+    return json.loads(linia, object_hook=_dekoduj_slownik)
+
+
+def adres_z_tekstu(tekst: str) -> Tuple[str, int]:
+    host, _, port = tekst.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class Koordynator:
+    """Kolejka zadań (konfiguracja, seed) obsługiwana przez węzły łączące się przez TCP.
+
+    Wyniki są przekazywane partiami przez wątek uruchom(), poza blokadą: po_wyniku dla
+    każdego wyniku partii, potem po_partii (np. zatwierdzenie magazynu). Partia zamyka
+    się po rozmiar_partii wynikach albo okres_partii sekundach, ostatnia - na końcu.
+    """
+
+    def __init__(self, zadania: Sequence[Tuple[Dict, Optional[int]]],
+                 adres: Tuple[str, int] = ('127.0.0.1', 0), max_prob: int = 3,
+                 limit_czasu: Optional[float] = None,
+                 po_wyniku: Optional[Callable[[int, Dict], None]] = None,
+                 po_partii: Optional[Callable[[], None]] = None,
+                 rozmiar_partii: int = 100, okres_partii: float = 5.0):
+        self.zadania = [(json.loads(json.dumps(k)), s) for k, s in zadania]
+        self.max_prob = max_prob
+        self.limit_czasu = limit_czasu
+        self.po_wyniku = po_wyniku
+        self.po_partii = po_partii
+        self.rozmiar_partii = rozmiar_partii
+        self.okres_partii = okres_partii
+        self._nowe_wyniki: List[Tuple[int, Dict]] = []  # do przekazania w następnej partii
+
+        self.wyniki: List[Optional[Dict]] = [None] * len(self.zadania)
+        self.proby = [0] * len(self.zadania)
+        self.kolejka = deque(range(len(self.zadania)))
+        self.w_toku: Dict[int, Tuple[str, float]] = {}  # id -> (węzeł, start)
+        self.ukonczone = 0
+        self.blad: Optional[str] = None
+        self.warunek = threading.Condition()
+
+        koordynator = self
+
+        class Obsluga(socketserver.StreamRequestHandler):
+            def handle(self):
+                koordynator._obsluz(self.rfile, self.wfile, f"{self.client_address}")
+
+        self.serwer = socketserver.ThreadingTCPServer(adres, Obsluga, bind_and_activate=False)
+        self.serwer.daemon_threads = True
+        self.serwer.allow_reuse_address = True
+        self.serwer.server_bind()
+        self.serwer.server_activate()
+
+    @property
+    def adres(self) -> Tuple[str, int]:
+        return self.serwer.server_address[:2]
+
+    @property
+    def zakonczone(self) -> bool:
+        return self.blad is not None or self.ukonczone == len(self.zadania)
+
+    def _sprawdz_limity(self):
+        # Wywoływane z blokadą; zadania przekraczające limit czasu wracają do kolejki
+        if self.limit_czasu is None:
+            return
+        teraz = time.monotonic()
+        for indeks, (_, start) in list(self.w_toku.items()):
+            if teraz - start > self.limit_czasu:
+                self._ponow(indeks, f"przekroczony limit czasu {self.limit_czasu} s")
+
+    def _przydziel(self, wezel: str) -> Optional[int]:
+        self._sprawdz_limity()
+        while self.kolejka:
+            indeks = self.kolejka.popleft()
+            if self.wyniki[indeks] is None:
+                self.w_toku[indeks] = (wezel, time.monotonic())
+                return indeks
+        return None
+
+    def _ponow(self, indeks: int, powod: str):
+        self.w_toku.pop(indeks, None)
+        if self.wyniki[indeks] is not None:
+            return
+        self.proby[indeks] += 1
+        if self.proby[indeks] >= self.max_prob:
+            self.blad = f"Zadanie {indeks} nie powiodło się {self.proby[indeks]} razy: {powod}"
+            self.warunek.notify_all()
+        else:
+            self.kolejka.append(indeks)
+
+    def _zapisz_wynik(self, indeks: int, wyniki: Dict):
+        self.w_toku.pop(indeks, None)
+        if self.wyniki[indeks] is not None:
+            return  # powtórzone zadanie (np. po limicie czasu) - wynik jest ten sam
+        self.wyniki[indeks] = wyniki
+        self.ukonczone += 1
+        if self.po_wyniku is not None or self.po_partii is not None:
+            self._nowe_wyniki.append((indeks, wyniki))
+        self.warunek.notify_all()
+
+    def _obsluz(self, odczyt, zapis, wezel: str):
+        przydzielone = set()
+        try:
+            while True:
+                komunikat = odbierz(odczyt)
+                if komunikat is None:
+                    return
+                typ = komunikat.get('typ')
+                if typ == 'pobierz':
+                    with self.warunek:
+                        indeks = None if self.zakonczone else self._przydziel(wezel)
+                        koniec = self.zakonczone
+                    if indeks is not None:
+                        przydzielone.add(indeks)
+                        konfiguracja, seed = self.zadania[indeks]
+                        wyslij(zapis, {'typ': 'zadanie', 'id': indeks,
+                                       'konfiguracja': konfiguracja, 'seed': seed})
+                    elif koniec:
+                        wyslij(zapis, {'typ': 'koniec'})
+                        return
+                    else:
+                        # Pozostałe zadania są u innych węzłów - mogą jeszcze wrócić do kolejki
+                        wyslij(zapis, {'typ': 'czekaj', 'sekundy': 0.2})
+                elif typ in ('wynik', 'blad'):
+                    indeks = komunikat['id']
+                    przydzielone.discard(indeks)
+                    with self.warunek:
+                        if typ == 'wynik':
+                            self._zapisz_wynik(indeks, komunikat['wyniki'])
+                        else:
+                            self._ponow(indeks, komunikat.get('komunikat', ''))
+                    wyslij(zapis, {'typ': 'ok'})
+                else:
+                    raise ValueError(f"Nieznany komunikat: {typ}")
+        except (OSError, ValueError):
+            pass
+        finally:
+            # Zerwane połączenie: zadania węzła wracają do kolejki
+            with self.warunek:
+                for indeks in przydzielone:
+                    if indeks in self.w_toku and self.w_toku[indeks][0] == wezel:
+                        self._ponow(indeks, f"utracone połączenie z węzłem {wezel}")
+
+    def _przekaz(self, wszystkie: bool = False, poczatek_partii: float = 0.0) -> bool:
+        # Partia wyników do wywołań zwrotnych; zapis (np. do magazynu) poza blokadą,
+        # więc węzły nie czekają na dysk
+        with self.warunek:
+            gotowa = self._nowe_wyniki and (
+                wszystkie or len(self._nowe_wyniki) >= self.rozmiar_partii
+                or time.monotonic() - poczatek_partii >= self.okres_partii)
+            if not gotowa:
+                return False
+            partia, self._nowe_wyniki = self._nowe_wyniki, []
+        if self.po_wyniku is not None:
+            for indeks, wyniki in partia:
+                self.po_wyniku(indeks, wyniki)
+        if self.po_partii is not None:
+            self.po_partii()
+        return True
+
+    def uruchom(self) -> List[Dict]:
+        """Obsługuje węzły aż do ukończenia wszystkich zadań; wyniki w kolejności zadań."""
+        watek = threading.Thread(target=self.serwer.serve_forever, daemon=True)
+        watek.start()
+        poczatek_partii = time.monotonic()
+        try:
+            while True:
+                with self.warunek:
+                    if self.zakonczone:
+                        break
+                    # Okresowe budzenie - limit czasu sprawdzany też, gdy węzły milczą
+                    self.warunek.wait(timeout=min(1.0, self.okres_partii))
+                    self._sprawdz_limity()
+                if self._przekaz(poczatek_partii=poczatek_partii):
+                    poczatek_partii = time.monotonic()
+        finally:
+            self.serwer.shutdown()
+            self.serwer.server_close()
+            # Ostatnia partia (także po błędzie - ukończone wyniki są poprawne)
+            self._przekaz(wszystkie=True)
+        if self.blad is not None:
+            raise RuntimeError(self.blad)
+        return self.wyniki
+
+
+def wezel(adres: Tuple[str, int], nazwa: Optional[str] = None, proby_polaczenia: int = 50):
+    """Pętla węzła: pobiera zadania od koordynatora, aż ten odpowie 'koniec'."""
+    nazwa = nazwa or f"{socket.gethostname()}:{os.getpid()}"
+    for proba in range(proby_polaczenia):
+        try:
+            polaczenie = socket.create_connection(adres)
+            break
+        except OSError:
+            if proba == proby_polaczenia - 1:
+                raise
+            time.sleep(0.2)
+    with polaczenie, polaczenie.makefile('rb') as odczyt, polaczenie.makefile('wb') as zapis:
+        while True:
+            wyslij(zapis, {'typ': 'pobierz', 'wezel': nazwa})
+            komunikat = odbierz(odczyt)
+            if komunikat is None or komunikat['typ'] == 'koniec':
+                return
+            if komunikat['typ'] == 'czekaj':
+                time.sleep(komunikat['sekundy'])
+                continue
+            try:
+                wyniki = replikacje.uruchom_replikacje(komunikat['konfiguracja'], komunikat['seed'])
+                odpowiedz = {'typ': 'wynik', 'id': komunikat['id'], 'wyniki': wyniki}
+            except Exception as e:
+                odpowiedz = {'typ': 'blad', 'id': komunikat['id'],
+                             'komunikat': f"{type(e).__name__}: {e}"}
+            wyslij(zapis, odpowiedz)
+            if odbierz(odczyt) is None:
+                return
+
+
+def uruchom_wezly(adres: Tuple[str, int], liczba_procesow: int) -> List[multiprocessing.Process]:
+    """Procesy węzłów (lokalne zastępstwo węzłów klastra albo procesy jednego węzła)."""
+    procesy = [multiprocessing.Process(target=wezel, args=(adres, None), daemon=True)
+               for _ in range(liczba_procesow)]
+    for proces in procesy:
+        proces.start()
+    return procesy
+
+
+def uruchom_rozproszone(zadania: Sequence[Tuple[Dict, Optional[int]]],
+                        adres: Tuple[str, int] = ('127.0.0.1', 0), lokalne_wezly: int = 0,
+                        max_prob: int = 3, limit_czasu: Optional[float] = None,
+                        po_wyniku: Optional[Callable[[int, Dict], None]] = None,
+                        po_partii: Optional[Callable[[], None]] = None,
+                        rozmiar_partii: int = 100, okres_partii: float = 5.0) -> List[Dict]:
+    """Zadania (konfiguracja, seed) na węzłach; wyniki jak replikacje.uruchom_replikacje_rownolegle.
+
+    lokalne_wezly - liczba procesów węzłów uruchamianych na tej maszynie (do testów
+    i jako zastępstwo klastra); zdalne węzły mogą dołączyć niezależnie.
+    po_wyniku / po_partii - jak w Koordynator (partie wyników poza blokadą).
+    """
+    koordynator = Koordynator(zadania, adres, max_prob, limit_czasu, po_wyniku, po_partii,
+                              rozmiar_partii, okres_partii)
+    procesy = uruchom_wezly(koordynator.adres, lokalne_wezly) if lokalne_wezly else []
+    try:
+        return koordynator.uruchom()
+    finally:
+        for proces in procesy:
+            proces.join(timeout=5)
+            if proces.is_alive():
+                proces.terminate()
+
+
+def wykonawca_rozproszony(adres: Tuple[str, int] = ('127.0.0.1', 0), lokalne_wezly: int = 0,
+                          max_prob: int = 3, limit_czasu: Optional[float] = None,
+                          magazyn=None, rozmiar_partii: int = 100,
+                          okres_partii: float = 5.0) -> Callable[[List[Tuple[Dict, Optional[int]]]], List[Dict]]:
+    """Wykonawca dla replikacje.uruchom_replikacje_rownolegle; wyniki trafiają na bieżąco
+    do magazynu (magazyn.MagazynWynikow), jeśli podany - zatwierdzane partiami
+    (rozmiar_partii wyników albo okres_partii sekund i na końcu)."""
+    def wykonaj(zadania: List[Tuple[Dict, Optional[int]]]) -> List[Dict]:
+        po_wyniku = po_partii = None
+        if magazyn is not None:
+            def po_wyniku(indeks: int, wyniki: Dict):
+                konfiguracja, seed = zadania[indeks]
+                magazyn.dopisz(konfiguracja, seed, wyniki)
+            po_partii = magazyn.zatwierdz
+        return uruchom_rozproszone(zadania, adres, lokalne_wezly, max_prob, limit_czasu,
+                                   po_wyniku, po_partii, rozmiar_partii, okres_partii)
+    return wykonaj
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Węzeł rozproszonych replikacji")
+    parser.add_argument('tryb', choices=('wezel',))
+    parser.add_argument('koordynator', help="adres koordynatora HOST:PORT")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="liczba procesów węzła (domyślnie liczba rdzeni)")
+    argumenty = parser.parse_args(argv)
+
+    procesy = uruchom_wezly(adres_z_tekstu(argumenty.koordynator),
+                            argumenty.workers or os.cpu_count() or 1)
+    for proces in procesy:
+        proces.join()
+
+
+if __name__ == "__main__":
+    main()
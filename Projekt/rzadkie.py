@@ -0,0 +1,273 @@
+"""
+Prawdopodobieństwa rzadkich, bardzo długich czasów realizacji (ogon rozkładu)
+metodą próbkowania ważonego (importance sampling) czasów napraw.
+
+Czas realizacji rzędu godzin powstaje praktycznie tylko przez wyjątkowo długą naprawę
+(bezpośrednio albo przez kolejkę, która narasta w jej trakcie), więc zmieniany jest
+rozkład napraw:
+    - para (MTTR μ, czas naprawy r) pochodzi z mieszaniny
+      (1 - ε)·p + ε·Σ_k p(· | r > c_k)/K: z prawdopodobieństwem ε naprawa jest losowana
+      warunkowo jako dłuższa niż jeden z progów c_k (μ z rozkładu a posteriori
+      ∝ e^(-c/μ) metodą odrzucania, r = c + Exp(μ)),
+    - iloraz wiarygodności naprawy zależy tylko od tego, które progi c_k przekracza r:
+      1/((1 - ε) + ε/K·Σ_k 1{r > c_k}/P(r > c_k)) ≤ 1/(1 - ε) - długie naprawy w tym
+      samym przedziale mają tę samą wagę, niezależnie od μ i nadwyżki,
+    - po długiej naprawie (r > min c_k) kolejne naprawy do punktu regeneracji są
+      losowane nominalnie,
+    - waga elementu to iloczyn ilorazów napraw od ostatniego punktu regeneracji
+      (system pusty, wszystkie maszyny sprawne) do jego ukończenia, więc wagi nie
+      degenerują się w długim przebiegu,
+    - P(CT > x) = Σ w·1{CT > x} / Σ w (regeneracyjny estymator ilorazowy), przedział
+      ufności z replikacji metodą delta.
+
+Liczba długich napraw w przebiegu nie zależy od progu, więc względny błąd pozostaje
+ograniczony, gdy P(CT > x) maleje wykładniczo z x. Do ogona prowadzą zarówno naprawy
+dłuższe od x, jak i wyraźnie krótsze (kolejka narastająca w trakcie naprawy), stąd
+domyślnie poziomy c_k od połowy najmniejszego progu do największego progu pomniejszonego
+o medianę czasu realizacji z krótkiego przebiegu pilotażowego. Pojedynczy, zbyt wysoki
+poziom c pomija część dróg do ogona - estymator pozostaje nieobciążony, ale zaniża
+wynik w typowym przebiegu, a jego przedział ufności bywa wtedy złudnie wąski.
+
+Przybliżenie: punkt regeneracji nie zeruje zegarów awarii (średni czas do awarii
+jest losowany, więc czas do awarii nie jest bez pamięci), a długie naprawy nieco
+zmieniają ich rozkład w punktach regeneracji.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import Projekt
+import replikacje
+
+
+def prawdopodobienstwo_dlugiej_naprawy(zakres_mttr: Sequence[float], prog: float,
+                                       liczba_przedzialow: int = 2000) -> float:
+    """P(r > prog) dla μ ~ U(zakres_mttr) i r ~ Exp(μ) (całka metodą Simpsona)."""
+    a, b = zakres_mttr
+    if b <= 0:
+        return 0.0
+    if b - a <= 0:
+        return math.exp(-prog / b)
+
+    def f(mu: float) -> float:
+        return math.exp(-prog / mu) if mu > 0 else 0.0
+
+    h = (b - a) / liczba_przedzialow
+    suma = f(a) + f(b) + sum((4 if i % 2 else 2) * f(a + i * h) for i in range(1, liczba_przedzialow))
+    return suma * h / 3 / (b - a)
+
+
+class ProbkowanieNapraw:
+    """Losowanie napraw z mieszaniny i iloraz wiarygodności od punktu regeneracji."""
+
+    def __init__(self, maszyny: List[Projekt.ZasobProdukcyjny], progi_napraw: Sequence[float],
+                 epsilon: float):
+        if not 0 < epsilon < 1 or not progi_napraw or min(progi_napraw) < 0:
+            raise ValueError("Wymagane 0 < epsilon < 1 i nieujemne progi napraw")
+        self.maszyny = maszyny
+        self.progi_napraw = sorted(progi_napraw)
+        self.epsilon = epsilon
+        self.log_waga = 0.0
+        self.regeneracje = 0
+        self.dlugie_naprawy = 0
+        self.dlugie_w_cyklu = False
+        self._prawdopodobienstwa: Dict[Tuple[float, float], List[float]] = {}
+
+    def _log_iloraz_dlugiej(self, zakres_mttr: Tuple[float, float], czas: float) -> float:
+        prawdopodobienstwa = self._prawdopodobienstwa.get(zakres_mttr)
+        if prawdopodobienstwa is None:
+            prawdopodobienstwa = [prawdopodobienstwo_dlugiej_naprawy(zakres_mttr, c)
+                                  for c in self.progi_napraw]
+            if min(prawdopodobienstwa) <= 0:
+                raise ValueError("Naprawy dłuższe niż progi napraw są niemożliwe")
+            self._prawdopodobienstwa[zakres_mttr] = prawdopodobienstwa
+        gestosc = sum(1 / p for c, p in zip(self.progi_napraw, prawdopodobienstwa) if czas > c)
+        return -math.log((1 - self.epsilon) + self.epsilon * gestosc / len(self.progi_napraw))
+
+    def czas_naprawy(self, losowe, zakres_mttr: Tuple[float, float]) -> float:
+        if self.dlugie_w_cyklu or losowe.random() >= self.epsilon:
+            # Losowanie nominalne (jak w ZasobProdukcyjny)
+            sredni_mttr = losowe.uniform(*zakres_mttr)
+            czas = losowe.expovariate(1.0 / sredni_mttr) if sredni_mttr > 0 else 0.0
+        else:
+            # μ z rozkładu a posteriori ∝ e^(-c/μ) na zakresie (odrzucanie względem
+            # wartości w górnym końcu), czas naprawy z braku pamięci rozkładu wykładniczego
+            c, gorny = losowe.choice(self.progi_napraw), zakres_mttr[1]
+            while True:
+                sredni_mttr = losowe.uniform(*zakres_mttr)
+                if losowe.random() < math.exp(c / gorny - c / sredni_mttr):
+                    break
+            czas = c + losowe.expovariate(1.0 / sredni_mttr)
+
+        if self.dlugie_w_cyklu:
+            return czas
+        if czas > self.progi_napraw[0]:
+            self.log_waga += self._log_iloraz_dlugiej(tuple(zakres_mttr), czas)
+            self.dlugie_w_cyklu = True
+            self.dlugie_naprawy += 1
+        else:
+            self.log_waga -= math.log(1 - self.epsilon)
+        return czas
+
+    def regeneracja(self):
+        if any(maszyna.zepsuta for maszyna in self.maszyny):
+            return
+        self.log_waga = 0.0
+        self.dlugie_w_cyklu = False
+        self.regeneracje += 1
+
+
+class CalkaZRegeneracja(Projekt.CalkaCzasowa):
+    """WIP, który przy opróżnieniu systemu zgłasza możliwy punkt regeneracji."""
+
+    __slots__ = ('probkowanie',)
+
+    def __init__(self, probkowanie: ProbkowanieNapraw, czas_startu: float = 0.0):
+        super().__init__(czas_startu)
+        self.probkowanie = probkowanie
+
+    def zmien(self, teraz: float, delta: float):
+        Projekt.CalkaCzasowa.zmien(self, teraz, delta)
+        if self.wartosc == 0:
+            self.probkowanie.regeneracja()
+
+
+class AkumulatorOgona(Projekt.AkumulatorStrumieniowy):
+    """Akumulator czasu realizacji, który sumuje też wagi elementów powyżej progów."""
+
+    __slots__ = ('probkowanie', 'progi', 'suma_wag', 'sumy_ogona', 'trafienia')
+
+    def __init__(self, probkowanie: ProbkowanieNapraw, progi: Sequence[float]):
+        super().__init__()
+        self.probkowanie = probkowanie
+        self.progi = sorted(progi)
+        self.suma_wag = 0.0
+        self.sumy_ogona = [0.0] * len(self.progi)
+        self.trafienia = [0] * len(self.progi)
+
+    def dodaj(self, x: float):
+        Projekt.AkumulatorStrumieniowy.dodaj(self, x)
+        waga = math.exp(self.probkowanie.log_waga)
+        self.suma_wag += waga
+        if x > self.progi[0]:
+            for i, prog in enumerate(self.progi):
+                if x <= prog:
+                    break
+                self.sumy_ogona[i] += waga
+                self.trafienia[i] += 1
+
+
+def przebieg_wazony(konfiguracja: Dict, seed: Optional[int], progi_napraw: Sequence[float],
+                    epsilon: float, progi: Sequence[float]) -> Dict:
+    """Jedna replikacja z próbkowaniem ważonym napraw; sumy wag do estymatora ilorazowego."""
+    model, czas_symulacji = replikacje.przygotuj_model(konfiguracja, seed)
+    maszyny = model.zasoby_etapu_a + model.zasoby_etapu_b
+    probkowanie = ProbkowanieNapraw(maszyny, progi_napraw, epsilon)
+    for maszyna in maszyny:
+        maszyna.probkowanie_napraw = probkowanie
+    statystyki = model.statystyki
+    statystyki.wip = CalkaZRegeneracja(probkowanie, model.srodowisko.now)
+    ogon = statystyki.czas_realizacji = AkumulatorOgona(probkowanie, progi)
+    model.krok(czas_symulacji)
+    return {
+        'suma_wag': ogon.suma_wag,
+        'sumy_ogona': ogon.sumy_ogona,
+        'trafienia': ogon.trafienia,
+        'elementy': ogon.n,
+        'dlugie_naprawy': probkowanie.dlugie_naprawy,
+        'regeneracje': probkowanie.regeneracje,
+        'czas': model.srodowisko.now,
+        'stabilny': model.stabilny
+    }
+
+
+def _przebieg_zadania(zadanie: Tuple) -> Dict:
+    return przebieg_wazony(*zadanie)
+
+
+def dobierz_progi_napraw(konfiguracja: Dict, progi: Sequence[float], seed: Optional[int] = None,
+                         czas_pilotazu: float = 20000.0, liczba_poziomow: int = 5) -> List[float]:
+    """Poziomy c_k równomiernie od połowy najmniejszego progu do największego progu
+    pomniejszonego o medianę czasu realizacji (z przebiegu pilotażowego)."""
+    parametry = replikacje.pelna_konfiguracja(konfiguracja)
+    model, _ = replikacje.przygotuj_model(konfiguracja, seed)
+    model.krok(min(czas_pilotazu, parametry['czas_symulacji']))
+    mediana = model.statystyki.czas_realizacji.percentyl(50)
+    dolny = min(progi) / 2
+    gorny = max(dolny, max(progi) - mediana)
+    if liczba_poziomow < 2 or gorny == dolny:
+        return [gorny]
+    krok = (gorny - dolny) / (liczba_poziomow - 1)
+    return [dolny + k * krok for k in range(liczba_poziomow)]
+
+
+def _oszacowanie(przebiegi: List[Dict], i: int, poziom: float) -> Dict:
+    n = len(przebiegi)
+    suma_ogona = sum(p['sumy_ogona'][i] for p in przebiegi)
+    suma_wag = sum(p['suma_wag'] for p in przebiegi)
+    p_hat = suma_ogona / suma_wag if suma_wag > 0 else 0.0
+    polowa = math.inf
+    if n > 1 and suma_wag > 0:
+        # Metoda delta dla ilorazu średnich: reszty A_r - p·B_r
+        reszty = [p['sumy_ogona'][i] - p_hat * p['suma_wag'] for p in przebiegi]
+        srednia_reszt = sum(reszty) / n
+        wariancja = sum((r - srednia_reszt) ** 2 for r in reszty) / (n - 1)
+        polowa = (Projekt.kwantyl_t(0.5 + poziom / 2, n - 1)
+                  * math.sqrt(wariancja / n) / (suma_wag / n))
+    return {
+        'prawdopodobienstwo': p_hat,
+        'polowa_przedzialu': polowa,
+        'blad_wzgledny': polowa / p_hat if p_hat > 0 else math.inf,
+        'trafienia': sum(p['trafienia'][i] for p in przebiegi)
+    }
+
+
+def oszacuj_ogon(konfiguracja: Dict, progi: Sequence[float],
+                 progi_napraw: Optional[Sequence[float]] = None, epsilon: float = 0.05,
+                 liczba_replikacji: int = 10, seed: Optional[int] = None,
+                 liczba_procesow: Optional[int] = None,
+                 cel_bledu_wzglednego: Optional[float] = None, max_replikacji: int = 200,
+                 poziom: float = 0.95) -> Dict:
+    """P(czas realizacji > próg) dla każdego progu.
+
+    progi_napraw=None - dobór z przebiegu pilotażowego (dobierz_progi_napraw). Przy
+    cel_bledu_wzglednego replikacje są dokładane partiami po liczba_replikacji, aż
+    względna połowa przedziału ufności każdego progu spadnie poniżej celu
+    (albo do max_replikacji).
+    """
+    progi = sorted(progi)
+    if progi_napraw is None:
+        progi_napraw = dobierz_progi_napraw(konfiguracja, progi,
+                                            None if seed is None else seed + 1)
+    if liczba_procesow is None:
+        liczba_procesow = os.cpu_count() or 1
+    seedy = replikacje.seedy_replikacji(seed, max_replikacji)
+
+    przebiegi: List[Dict] = []
+    pula = ProcessPoolExecutor(max_workers=liczba_procesow) if liczba_procesow > 1 else None
+    try:
+        while len(przebiegi) < max_replikacji:
+            zadania = [(konfiguracja, s, progi_napraw, epsilon, progi)
+                       for s in seedy[len(przebiegi):len(przebiegi) + liczba_replikacji]]
+            przebiegi += (list(pula.map(_przebieg_zadania, zadania)) if pula
+                          else [_przebieg_zadania(zadanie) for zadanie in zadania])
+            oszacowania = [_oszacowanie(przebiegi, i, poziom) for i in range(len(progi))]
+            if (cel_bledu_wzglednego is None
+                    or all(o['blad_wzgledny'] <= cel_bledu_wzglednego for o in oszacowania)):
+                break
+    finally:
+        if pula is not None:
+            pula.shutdown()
+
+    return {
+        'progi': [{'prog': prog, **oszacowanie} for prog, oszacowanie in zip(progi, oszacowania)],
+        'progi_napraw': list(progi_napraw),
+        'epsilon': epsilon,
+        'replikacje': len(przebiegi),
+        'elementy': sum(p['elementy'] for p in przebiegi),
+        'dlugie_naprawy': sum(p['dlugie_naprawy'] for p in przebiegi),
+        'minuty_symulacji': sum(p['czas'] for p in przebiegi),
+        'stabilne': all(p['stabilny'] for p in przebiegi)
+    }
@@ -0,0 +1,308 @@
+"""
+Lokalny serwis symulacji: kolejka zadań nad stałą pulą rozgrzanych procesów roboczych.
+
+Zespoły zgłaszają konfiguracje przez HTTP (TCP na localhost albo gniazdo Unix),
+identyczne zgłoszenia i identyczne replikacje (konfiguracja, seed) są liczone raz.
+Działa w całości offline, na jednej maszynie. Pamięć jest ograniczona: ponad
+--max-zadan zakończonych zadań i --max-replikacji gotowych replikacji najdawniej
+używane są zapominane. Nagła śmierć procesu roboczego psuje pulę - serwis tworzy
+nową i ponawia przerwane replikacje.
+
+    python serwis.py --port 8765 --workers 8
+    python serwis.py --socket /tmp/symulacja.sock
+
+API (JSON):
+    POST /zadania                  {"model": {...}, "replikacje": 30, "seed": 42}
+                                   -> {"id": ..., "nowe": true/false, ...}
+    GET  /zadania                  lista zadań i ich stan
+    GET  /zadania/<id>             stan, postęp i (po zakończeniu) wyniki
+    GET  /zadania/<id>/strumien    postęp na bieżąco (NDJSON, chunked) aż do wyników
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import replikacje
+
+
+# Ponowienia replikacji przerwanej awarią puli (replikacja, która sama zabija proces
+# roboczy, kończy się po nich błędem zadania)
+MAX_PONOWIEN = 2
+
+
+def _rozgrzej():
+    # Wymusza start procesu roboczego (import simpy i modelu) przed pierwszym zadaniem
+    return os.getpid()
+
+
+class Zadanie:
+
+    def __init__(self, identyfikator: str, konfiguracja: Dict, seedy: List[int]):
+        self.identyfikator = identyfikator
+        self.konfiguracja = konfiguracja
+        self.seedy = seedy
+        self.wiersze: List[Optional[Dict]] = [None] * len(seedy)
+        self.ukonczone = 0
+        self.blad: Optional[str] = None
+        self.wersja = 0  # zwiększana przy każdej zmianie postępu
+
+    @property
+    def stan(self) -> str:
+        if self.blad is not None:
+            return 'blad'
+        if self.ukonczone == len(self.seedy):
+            return 'zakonczone'
+        return 'w_toku' if self.ukonczone else 'oczekuje'
+
+    def opis(self, z_wynikami: bool = False) -> Dict:
+        opis = {
+            'id': self.identyfikator,
+            'stan': self.stan,
+            'ukonczone': self.ukonczone,
+            'liczba': len(self.seedy)
+        }
+        if self.blad is not None:
+            opis['blad'] = self.blad
+        if z_wynikami and self.stan == 'zakonczone':
+            opis['podsumowanie'] = replikacje.podsumuj_replikacje(self.wiersze)
+            opis['wiersze'] = self.wiersze
+        return opis
+
+
+class SerwisSymulacji:
+
+    def __init__(self, liczba_procesow: Optional[int] = None, max_zadan: int = 1000,
+                 max_replikacji: int = 100000):
+        self.liczba_procesow = liczba_procesow or os.cpu_count() or 1
+        self.max_zadan = max_zadan
+        self.max_replikacji = max_replikacji
+        self.pula = ProcessPoolExecutor(max_workers=self.liczba_procesow)
+        for przyszlosc in [self.pula.submit(_rozgrzej) for _ in range(self.liczba_procesow)]:
+            przyszlosc.result()
+
+        self.zadania: Dict[str, Zadanie] = {}
+        # Wspólne dla wszystkich zadań: (konfiguracja, seed) -> Future z wierszem wyników
+        self.replikacje: Dict[Tuple[str, int], Future] = {}
+        self.warunek = threading.Condition()
+
+    def zglos(self, zgloszenie: Dict) -> Tuple[Zadanie, bool]:
+        konfiguracja = replikacje.pelna_konfiguracja(zgloszenie.get('model', {}))
+        # Normalizacja (krotki -> listy), by ta sama konfiguracja dawała ten sam klucz
+        konfiguracja = json.loads(json.dumps(konfiguracja))
+        liczba = int(zgloszenie.get('replikacje', 10))
+        seed = int(zgloszenie.get('seed', 0))
+        identyfikator = replikacje.klucz_konfiguracji([konfiguracja, liczba, seed])
+
+        with self.warunek:
+            poprzednie = self.zadania.pop(identyfikator, None)
+            # Zadanie zakończone błędem zgłaszane ponownie - od nowa (ponowienie)
+            if poprzednie is not None and poprzednie.blad is None:
+                self.zadania[identyfikator] = poprzednie  # na koniec kolejności użycia
+                return poprzednie, False
+
+            zadanie = Zadanie(identyfikator, konfiguracja, replikacje.seedy_replikacji(seed, liczba))
+            self.zadania[identyfikator] = zadanie
+            klucz = replikacje.klucz_konfiguracji(konfiguracja)
+            for indeks in range(len(zadanie.seedy)):
+                self._oczekuj(zadanie, indeks, klucz)
+            self._sprzataj()
+        return zadanie, True
+
+    def opisy(self) -> List[Dict]:
+        with self.warunek:
+            return [zadanie.opis() for zadanie in self.zadania.values()]
+
+    def znajdz(self, identyfikator: str) -> Optional[Zadanie]:
+        with self.warunek:
+            return self.zadania.get(identyfikator)
+
+    def _wyslij(self, konfiguracja: Dict, seed: int) -> Future:
+        # Wywoływane z blokadą; zepsuta pula odrzuca zlecenia od razu
+        try:
+            return self.pula.submit(_replikacja_wiersz, konfiguracja, seed)
+        except BrokenProcessPool:
+            self.pula.shutdown(wait=False, cancel_futures=True)
+            self.pula = ProcessPoolExecutor(max_workers=self.liczba_procesow)
+            return self.pula.submit(_replikacja_wiersz, konfiguracja, seed)
+
+    def _oczekuj(self, zadanie: Zadanie, indeks: int, klucz: str, proba: int = 0):
+        # Replikacja zadania z pamięci podręcznej (konfiguracja, seed) albo nowo zlecona
+        klucz_replikacji = (klucz, zadanie.seedy[indeks])
+        przyszlosc = self.replikacje.pop(klucz_replikacji, None)
+        if przyszlosc is None:
+            przyszlosc = self._wyslij(zadanie.konfiguracja, zadanie.seedy[indeks])
+            przyszlosc.add_done_callback(
+                lambda p: self._usun_nieudana(klucz_replikacji, p))
+        self.replikacje[klucz_replikacji] = przyszlosc  # na koniec kolejności użycia
+        przyszlosc.add_done_callback(
+            lambda p: self._po_replikacji(zadanie, indeks, klucz, proba, p))
+
+    def _sprzataj(self):
+        # Ponad limity zapominane są najdawniej używane zakończone zadania i gotowe replikacje
+        nadmiar = len(self.zadania) - self.max_zadan
+        if nadmiar > 0:
+            for identyfikator in [i for i, z in self.zadania.items()
+                                  if z.stan in ('zakonczone', 'blad')][:nadmiar]:
+                del self.zadania[identyfikator]
+        nadmiar = len(self.replikacje) - self.max_replikacji
+        if nadmiar > 0:
+            for klucz in [k for k, p in self.replikacje.items() if p.done()][:nadmiar]:
+                del self.replikacje[klucz]
+
+    def _usun_nieudana(self, klucz_replikacji: Tuple[str, int], przyszlosc: Future):
+        # Nieudana replikacja nie zostaje w pamięci podręcznej - ponowne zgłoszenie ją powtórzy
+        if przyszlosc.cancelled() or przyszlosc.exception() is not None:
+            with self.warunek:
+                if self.replikacje.get(klucz_replikacji) is przyszlosc:
+                    del self.replikacje[klucz_replikacji]
+
+    def _po_replikacji(self, zadanie: Zadanie, indeks: int, klucz: str, proba: int,
+                       przyszlosc: Future):
+        with self.warunek:
+            try:
+                zadanie.wiersze[indeks] = przyszlosc.result()
+                zadanie.ukonczone += 1
+            except BrokenProcessPool as e:
+                if proba < MAX_PONOWIEN:
+                    # Przerwana awarią puli - ponownie w nowej puli
+                    self._oczekuj(zadanie, indeks, klucz, proba + 1)
+                    return
+                zadanie.blad = f"{type(e).__name__}: {e}"
+            except Exception as e:
+                zadanie.blad = f"{type(e).__name__}: {e}"
+            zadanie.wersja += 1
+            self.warunek.notify_all()
+
+    def czekaj_na_zmiane(self, zadanie: Zadanie, wersja: int, limit_czasu: float = 30.0) -> int:
+        with self.warunek:
+            self.warunek.wait_for(lambda: zadanie.wersja != wersja, timeout=limit_czasu)
+            return zadanie.wersja
+
+    def zamknij(self):
+        self.pula.shutdown(cancel_futures=True)
+
+
+def _replikacja_wiersz(konfiguracja: Dict, seed: int) -> Dict:
+    wynik = replikacje.uruchom_replikacje(konfiguracja, seed)
+    return {'seed': seed, **replikacje.splaszcz_wyniki(wynik)}
+
+
+class ObslugaZapytan(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    serwis: SerwisSymulacji = None
+
+    def _wyslij_json(self, kod: int, dane):
+        tresc = json.dumps(dane, ensure_ascii=False).encode('utf-8')
+        self.send_response(kod)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(tresc)))
+        self.end_headers()
+        self.wfile.write(tresc)
+
+    def _wyslij_fragment(self, dane: Dict):
+        tresc = (json.dumps(dane, ensure_ascii=False) + '\n').encode('utf-8')
+        self.wfile.write(f"{len(tresc):x}\r\n".encode('ascii') + tresc + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/zadania':
+            return self._wyslij_json(404, {'blad': 'nieznana ścieżka'})
+        try:
+            dlugosc = int(self.headers.get('Content-Length', 0))
+            zgloszenie = json.loads(self.rfile.read(dlugosc) or b'{}')
+            zadanie, nowe = self.serwis.zglos(zgloszenie)
+        except (ValueError, TypeError, KeyError) as e:
+            return self._wyslij_json(400, {'blad': str(e)})
+        with self.serwis.warunek:
+            opis = zadanie.opis()
+        self._wyslij_json(201 if nowe else 200, {**opis, 'nowe': nowe})
+
+    def do_GET(self):
+        czesci = [c for c in self.path.split('/') if c]
+        if czesci == ['zadania']:
+            return self._wyslij_json(200, self.serwis.opisy())
+        zadanie = (self.serwis.znajdz(czesci[1])
+                   if len(czesci) >= 2 and czesci[0] == 'zadania' else None)
+        if zadanie is None:
+            return self._wyslij_json(404, {'blad': 'nieznane zadanie'})
+
+        if len(czesci) == 2:
+            with self.serwis.warunek:
+                opis = zadanie.opis(z_wynikami=True)
+            return self._wyslij_json(200, opis)
+        if czesci[2:] != ['strumien']:
+            return self._wyslij_json(404, {'blad': 'nieznana ścieżka'})
+
+        # Postęp wysyłany przy każdej zmianie, na końcu pełne wyniki
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        wersja = -1
+        while True:
+            with self.serwis.warunek:
+                opis = zadanie.opis(z_wynikami=True)
+                aktualna = zadanie.wersja
+            if aktualna != wersja:
+                self._wyslij_fragment(opis)
+                wersja = aktualna
+            if opis['stan'] in ('zakonczone', 'blad'):
+                break
+            self.serwis.czekaj_na_zmiane(zadanie, wersja)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        # Dla gniazda Unix adres klienta jest pusty
+        pass
+
+
+class SerwerUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        polaczenie, _ = super().get_request()
+        return polaczenie, ('unix', 0)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Lokalny serwis symulacji")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', default=None, help="ścieżka gniazda Unix zamiast TCP")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-zadan', type=int, default=1000,
+                        help="zakończone zadania przechowywane do odczytu")
+    parser.add_argument('--max-replikacji', type=int, default=100000,
+                        help="gotowe replikacje w pamięci podręcznej")
+    argumenty = parser.parse_args(argv)
+
+    serwis = SerwisSymulacji(argumenty.workers, argumenty.max_zadan, argumenty.max_replikacji)
+    ObslugaZapytan.serwis = serwis
+    if argumenty.socket:
+        if os.path.exists(argumenty.socket):
+            os.unlink(argumenty.socket)
+        serwer = SerwerUnix(argumenty.socket, ObslugaZapytan)
+        adres = argumenty.socket
+    else:
+        serwer = ThreadingHTTPServer((argumenty.host, argumenty.port), ObslugaZapytan)
+        adres = f"http://{argumenty.host}:{argumenty.port}"
+
+    print(f"Serwis symulacji: {adres} ({serwis.liczba_procesow} procesów roboczych)")
+    try:
+        serwer.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serwer.server_close()
+        serwis.zamknij()
+
+
+if __name__ == "__main__":
+    main()
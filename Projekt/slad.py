@@ -0,0 +1,201 @@
+"""
+Ślad przebiegu: zapis, odtwarzanie i porównanie silników zdarzenie po zdarzeniu.
+
+nagraj() prowadzi przebieg z Projekt.DziennikZdarzen, który zapisuje każdą liczbę U
+zużytą przez każdy strumień losowy oraz każde zdarzenie: przybycie, start i koniec
+obsługi na maszynie, wyjście elementu, zmianę stanu maszyny. odtworz() prowadzi
+przebieg dowolnym silnikiem wyłącznie na zapisanych liczbach U, a porownaj()
+zestawia osie czasu elementów (i maszyn) i wskazuje pierwszą rozbieżność - ślad
+zapisany przed zmianą silnika sprawdza przebieg po zmianie:
+
+    slad.zapisz('przed.slad', *slad.nagraj(konfiguracja, seed=1))
+    ...                                           # zmiana silnika
+    slad.porownaj_z_zapisem('przed.slad', silniki=('rekordy', 'procesy'))
+
+Plik (kolejność bajtów maszyny zapisującej, zamieniana przy odczycie):
+    MAGIA, długość nagłówka (uint32), nagłówek JSON (konfiguracja, seed, maszyny,
+    strumienie z liczbą wartości, liczba zdarzeń), liczby U kolejnych strumieni
+    (float64), zdarzenia kolumnami: czas (float64), rodzaj (int8), element (int64),
+    maszyna (int16), stan (int8) - 20 bajtów na zdarzenie.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import Projekt
+import replikacje
+
+
+MAGIA = b'SLADSYM1'
+KOLUMNY = (('czasy', 'd'), ('rodzaje', 'b'), ('elementy', 'q'),
+           ('numery_maszyn', 'h'), ('stany', 'b'))
+
+
+# --- zapis i odczyt ---
+
+def nagraj(konfiguracja: Dict, seed: Optional[int] = None) -> Tuple[Dict, Projekt.DziennikZdarzen]:
+    """Przebieg konfiguracji z zapisem śladu; zwraca (nagłówek, dziennik)."""
+    dziennik = Projekt.DziennikZdarzen()
+    model, czas_symulacji = replikacje.przygotuj_model(konfiguracja, seed, dziennik)
+    model.krok(czas_symulacji)
+    naglowek = {
+        'konfiguracja': replikacje.pelna_konfiguracja(konfiguracja),
+        'seed': seed,
+        'czas': model.srodowisko.now
+    }
+    return naglowek, dziennik
+
+
+def zapisz(sciezka: str, naglowek: Dict, dziennik: Projekt.DziennikZdarzen):
+    strumienie = [[nazwa, len(zapis)] for nazwa, zapis in dziennik.liczby.items()]
+    tekst = json.dumps({**naglowek, 'wersja': 1, 'kolejnosc_bajtow': sys.byteorder,
+                        'maszyny': dziennik.maszyny, 'strumienie': strumienie,
+                        'zdarzenia': len(dziennik)},
+                       ensure_ascii=False, default=list).encode('utf-8')
+    with open(sciezka, 'wb') as plik:
+        plik.write(MAGIA + struct.pack('<I', len(tekst)) + tekst)
+        for nazwa, _ in strumienie:
+            dziennik.liczby[nazwa].tofile(plik)
+        for kolumna, _ in KOLUMNY:
+            getattr(dziennik, kolumna).tofile(plik)
+
+
+def wczytaj(sciezka: str) -> Tuple[Dict, Projekt.DziennikZdarzen]:
+    """(nagłówek, dziennik) z pliku; dziennik zawiera liczby U i zdarzenia zapisu."""
+    with open(sciezka, 'rb') as plik:
+        if plik.read(len(MAGIA)) != MAGIA:
+            raise ValueError(f"{sciezka}: to nie jest plik śladu przebiegu")
+        dlugosc, = struct.unpack('<I', plik.read(4))
+        naglowek = json.loads(plik.read(dlugosc).decode('utf-8'))
+        zamiana = naglowek['kolejnosc_bajtow'] != sys.byteorder
+
+        def czytaj(typ: str, liczba: int) -> array:
+            kolumna = array(typ)
+            kolumna.fromfile(plik, liczba)
+            if zamiana:
+                kolumna.byteswap()
+            return kolumna
+
+        dziennik = Projekt.DziennikZdarzen()
+        dziennik.maszyny = naglowek['maszyny']
+        dziennik.liczby = {nazwa: czytaj('d', liczba) for nazwa, liczba in naglowek['strumienie']}
+        for kolumna, typ in KOLUMNY:
+            setattr(dziennik, kolumna, czytaj(typ, naglowek['zdarzenia']))
+    return naglowek, dziennik
+
+
+def odtworz(naglowek: Dict, wzorzec: Projekt.DziennikZdarzen,
+            silnik: Optional[str] = None) -> Tuple[Projekt.DziennikZdarzen, Optional[str]]:
+    """Przebieg (innym silnikiem) na liczbach U wzorca; zwraca (dziennik, błąd wyczerpania)."""
+    konfiguracja = dict(naglowek['konfiguracja'])
+    if silnik is not None:
+        konfiguracja['silnik'] = silnik
+    dziennik = Projekt.DziennikZdarzen(wzorzec.liczby)
+    model, _ = replikacje.przygotuj_model(konfiguracja, naglowek['seed'], dziennik)
+    try:
+        model.krok(naglowek['czas'])
+    except Projekt.WyczerpanySlad as blad:
+        return dziennik, str(blad)
+    return dziennik, None
+
+
+# --- osie czasu i porównanie ---
+
+def osie_czasu(dziennik: Projekt.DziennikZdarzen) -> Dict[int, List[Tuple]]:
+    """{element: [(czas, zdarzenie, maszyna)]} w kolejności zapisu."""
+    osie: Dict[int, List[Tuple]] = {}
+    for czas, rodzaj, element, maszyna in zip(dziennik.czasy, dziennik.rodzaje,
+                                               dziennik.elementy, dziennik.numery_maszyn):
+        if rodzaj != Projekt.STAN:
+            osie.setdefault(element, []).append(
+                (czas, Projekt.ZDARZENIA_SLADU[rodzaj],
+                 dziennik.maszyny[maszyna] if maszyna >= 0 else None))
+    return osie
+
+
+def osie_maszyn(dziennik: Projekt.DziennikZdarzen) -> Dict[str, List[Tuple]]:
+    """{maszyna: [(czas, stan)]} bez stanów o zerowym czasie trwania (kolejność zmian
+    w jednej chwili zależy od silnika, a nie wpływa na statystyki)."""
+    osie: Dict[str, List[Tuple]] = {nazwa: [] for nazwa in dziennik.maszyny}
+    for czas, rodzaj, maszyna, stan in zip(dziennik.czasy, dziennik.rodzaje,
+                                            dziennik.numery_maszyn, dziennik.stany):
+        if rodzaj == Projekt.STAN:
+            os_maszyny = osie[dziennik.maszyny[maszyna]]
+            if os_maszyny and os_maszyny[-1][0] == czas:
+                os_maszyny.pop()
+            if not os_maszyny or os_maszyny[-1][1] != Projekt.STANY_MASZYNY[stan]:
+                os_maszyny.append((czas, Projekt.STANY_MASZYNY[stan]))
+    return osie
+
+
+def _pierwsza_roznica(a: Sequence[Tuple], b: Sequence[Tuple], tolerancja: float):
+    # Indeks pierwszego niezgodnego wpisu (None - zgodne)
+    for i, (wpis_a, wpis_b) in enumerate(zip(a, b)):
+        if abs(wpis_a[0] - wpis_b[0]) > tolerancja or wpis_a[1:] != wpis_b[1:]:
+            return i
+    return None if len(a) == len(b) else min(len(a), len(b))
+
+
+def porownaj(wzorzec: Projekt.DziennikZdarzen, badany: Projekt.DziennikZdarzen,
+             tolerancja: float = 0.0) -> Dict:
+    """Osie czasu elementów i maszyn obu śladów; 'rozbieznosc' - najwcześniejsza
+    niezgodność (None - ślady zgodne)."""
+    rozbieznosc = None
+    for rodzaj, osie_a, osie_b in (('element', osie_czasu(wzorzec), osie_czasu(badany)),
+                                   ('maszyna', osie_maszyn(wzorzec), osie_maszyn(badany))):
+        for klucz in sorted(set(osie_a) | set(osie_b), key=str):
+            a, b = osie_a.get(klucz, []), osie_b.get(klucz, [])
+            i = _pierwsza_roznica(a, b, tolerancja)
+            if i is None:
+                continue
+            oczekiwane = a[i] if i < len(a) else None
+            otrzymane = b[i] if i < len(b) else None
+            czas = min(wpis[0] for wpis in (oczekiwane, otrzymane) if wpis is not None)
+            if rozbieznosc is None or czas < rozbieznosc['czas']:
+                rozbieznosc = {'czas': czas, rodzaj: klucz, 'indeks': i,
+                               'oczekiwane': oczekiwane, 'otrzymane': otrzymane}
+
+    losowania_a, losowania_b = wzorzec.liczba_losowan(), badany.liczba_losowan()
+    strumienie = sorted(nazwa for nazwa in set(losowania_a) | set(losowania_b)
+                        if losowania_a.get(nazwa, 0) != losowania_b.get(nazwa, 0))
+    return {
+        'zgodne': rozbieznosc is None and not strumienie,
+        'rozbieznosc': rozbieznosc,
+        'zdarzenia': (len(wzorzec), len(badany)),
+        # Strumienie, z których przebiegi zużyły różną liczbę liczb U
+        'strumienie': {nazwa: (losowania_a.get(nazwa, 0), losowania_b.get(nazwa, 0))
+                       for nazwa in strumienie}
+    }
+
+
+def porownaj_z_wzorcem(naglowek: Dict, wzorzec: Projekt.DziennikZdarzen,
+                       silniki: Sequence[str] = tuple(Projekt.SILNIKI),
+                       tolerancja: float = 0.0) -> Dict:
+    """Odtworzenie wzorca każdym silnikiem; wiersz na silnik i 'zgodne' dla wszystkich."""
+    wiersze = []
+    for silnik in silniki:
+        dziennik, wyczerpany = odtworz(naglowek, wzorzec, silnik)
+        wynik = porownaj(wzorzec, dziennik, tolerancja)
+        wiersze.append({'silnik': silnik, 'zgodne': wynik['zgodne'] and wyczerpany is None,
+                        'wyczerpany': wyczerpany, **{k: wynik[k] for k in
+                                                     ('rozbieznosc', 'zdarzenia', 'strumienie')}})
+    return {'wiersze': wiersze, 'zgodne': all(w['zgodne'] for w in wiersze)}
+
+
+def porownaj_z_zapisem(sciezka: str, silniki: Sequence[str] = tuple(Projekt.SILNIKI),
+                       tolerancja: float = 0.0) -> Dict:
+    return porownaj_z_wzorcem(*wczytaj(sciezka), silniki, tolerancja)
+
+
+def porownaj_silniki(konfiguracja: Dict, seed: Optional[int] = None,
+                     silniki: Sequence[str] = tuple(Projekt.SILNIKI),
+                     sciezka: Optional[str] = None, tolerancja: float = 0.0) -> Dict:
+    """Zapis śladu silnikiem z konfiguracji (opcjonalnie do pliku) i odtworzenie
+    każdym z `silniki` (także tym samym - sprawdzenie powtarzalności)."""
+    naglowek, wzorzec = nagraj(konfiguracja, seed)
+    if sciezka is not None:
+        zapisz(sciezka, naglowek, wzorzec)
+    return porownaj_z_wzorcem(naglowek, wzorzec, silniki, tolerancja)
@@ -0,0 +1,413 @@
+"""
+Wiersz poleceń do uruchamiania symulacji wsadowo, bez edycji kodu.
+
+Tryby:
+    symulacja   - pojedynczy przebieg
+    replikacje  - seria replikacji jednej konfiguracji (średnie i przedziały ufności)
+    przeglad    - replikacje dla każdego punktu siatki parametrów
+    analiza     - przybliżenia analityczne dla punktów siatki (bez symulacji)
+    optymalizacja - najtańsza konfiguracja spełniająca wymaganie czasu realizacji
+    ogon        - prawdopodobieństwa rzadkich, bardzo długich czasów realizacji
+    benchmark   - pomiar wydajności silnika (elementy/s, minuty symulacji/s)
+    slad        - ślad przebiegu odtworzony każdym silnikiem, pierwsza rozbieżność (slad.py);
+                  kod wyjścia 1 przy rozbieżności
+    weryfikacja - testy silnika względem wyników analitycznych (weryfikacja.py);
+                  kod wyjścia 1, gdy któraś metryka jest poza przedziałem
+
+Przykład:
+    python uruchom.py przeglad konfiguracja.toml --workers 8 --seed 42 --output wyniki.csv --format csv
+
+--magazyn KATALOG dopisuje replikacje (tryby symulacja, replikacje, przeglad) do
+binarnego magazynu kolumnowego (magazyn.MagazynWynikow).
+
+--wezly HOST:PORT / --lokalne-wezly N liczą replikacje (tryby replikacje, przeglad, weryfikacja,
+benchmark) na węzłach rozproszone.py zamiast w lokalnej puli; wyniki są identyczne.
+
+Plik konfiguracji (TOML lub JSON):
+    [model]            # klucze jak w replikacje.KLUCZE_KONFIGURACJI
+    czas_symulacji = 10000
+    zakres_lambda = [8, 12]
+    liczba_technikow = 2      # opcjonalnie: wspólna ekipa naprawcza
+    polityka_napraw = "najkrotsza"  # fifo / waskie_gardlo / najkrotsza
+    [model.model_awarii]      # opcjonalnie: replikacje.model_awarii_z_konfiguracji
+    rozklad = "weibull"
+    ksztalt = 2.5
+    skala = 170
+    wedlug_czasu_pracy = true
+    [replikacje]
+    liczba = 30
+    antytetyczne = true       # opcjonalnie: pary antytetyczne (ceil(liczba / 2) par)
+    zmienne_kontrolne = true  # opcjonalnie: korekta średnimi wejść o znanej wartości oczekiwanej
+    [przeglad]         # siatka: iloczyn kartezjański list wartości
+    liczba_maszyn_a = [2, 3]
+    liczba_maszyn_b = [2, 3]
+    [selekcja]         # opcjonalnie: wstępna selekcja punktów (analityka.selekcja_wstepna)
+    prog_rho = 0.98
+    max_czas_realizacji = 60
+    [optymalizacja]    # optymalizacja.optymalizuj; bufor "inf" - nieograniczony
+    sla = 30
+    liczba_maszyn_a = [2, 3, 4]
+    liczba_maszyn_b = [2, 3, 4]
+    pojemnosc_bufora = [2, 5, "inf"]
+    [ogon]             # rzadkie.oszacuj_ogon; --replikacje nadpisuje liczba_replikacji
+    progi = [100, 150, 200]
+    epsilon = 0.05
+    cel_bledu_wzglednego = 0.3
+    [slad]             # slad.py: plik - zapis śladu, wzorzec - porównanie z zapisanym śladem
+    silniki = ["rekordy", "procesy"]
+    plik = "przed.slad"
+    [weryfikacja]      # weryfikacja.weryfikuj; --replikacje nadpisuje liczba_replikacji
+    silniki = ["rekordy", "procesy"]
+    tolerancja = 0.02
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import replikacje
+
+
+def wczytaj_konfiguracje(sciezka: Optional[str]) -> Dict:
+    if sciezka is None:
+        return {}
+    if sciezka.endswith('.toml'):
+        import tomllib
+        with open(sciezka, 'rb') as plik:
+            return tomllib.load(plik)
+    with open(sciezka, encoding='utf-8') as plik:
+        return json.load(plik)
+
+
+def punkty_przegladu(siatka: Dict[str, list]) -> List[Dict]:
+    if not siatka:
+        return [{}]
+    nazwy = list(siatka)
+    return [dict(zip(nazwy, wartosci)) for wartosci in itertools.product(*(siatka[n] for n in nazwy))]
+
+
+def _wykonawca(argumenty):
+    # Rozproszone replikacje (rozproszone.py); wyniki trafiają do magazynu na bieżąco
+    if not (argumenty.wezly or argumenty.lokalne_wezly):
+        return None
+    import rozproszone
+    adres = (rozproszone.adres_z_tekstu(argumenty.wezly) if argumenty.wezly
+             else ('127.0.0.1', 0))
+    magazyn_wynikow = None
+    if argumenty.magazyn:
+        import magazyn
+        magazyn_wynikow = magazyn.MagazynWynikow(argumenty.magazyn)
+    argumenty.magazyn_strumieniowy = magazyn_wynikow is not None
+    return rozproszone.wykonawca_rozproszony(adres, argumenty.lokalne_wezly or 0,
+                                             magazyn=magazyn_wynikow)
+
+
+def _wiersze_replikacji(model: Dict, punkty: List[Dict], seedy: List[int],
+                        liczba_procesow: Optional[int], wykonawca=None) -> List[Dict]:
+    # Te same seedy w każdym punkcie siatki (wspólne liczby losowe)
+    zadania = [({**model, **punkt}, seed) for punkt in punkty for seed in seedy]
+    wyniki = replikacje.uruchom_replikacje_rownolegle(zadania, liczba_procesow, wykonawca)
+
+    wiersze = []
+    for (konfiguracja, seed), wynik in zip(zadania, wyniki):
+        punkt = {klucz: konfiguracja[klucz] for klucz in punkty[0]}
+        wiersze.append({**punkt, 'seed': seed, **replikacje.splaszcz_wyniki(wynik)})
+    return wiersze
+
+
+def tryb_symulacja(konfiguracja: Dict, argumenty) -> Dict:
+    seed = argumenty.seed
+    wynik = replikacje.uruchom_replikacje(konfiguracja.get('model', {}), seed)
+    return {'wiersze': [{'seed': seed, **replikacje.splaszcz_wyniki(wynik)}], 'wyniki': wynik}
+
+
+def tryb_replikacje(konfiguracja: Dict, argumenty) -> Dict:
+    ustawienia = konfiguracja.get('replikacje', {})
+    liczba = argumenty.replikacje or ustawienia.get('liczba', 10)
+    seria = replikacje.uruchom_serie(konfiguracja.get('model', {}), liczba, argumenty.seed,
+                                     argumenty.workers, ustawienia.get('antytetyczne', False),
+                                     ustawienia.get('zmienne_kontrolne', False),
+                                     wykonawca=_wykonawca(argumenty))
+    return {'wiersze': seria['wiersze'], 'podsumowanie': [seria['podsumowanie']]}
+
+
+def _selekcja(konfiguracja: Dict) -> Dict:
+    import analityka
+    punkty = punkty_przegladu(konfiguracja.get('przeglad', {}))
+    return analityka.selekcja_wstepna(konfiguracja.get('model', {}), punkty,
+                                      **konfiguracja.get('selekcja', {}))
+
+
+def _opis_odrzuconych(odrzucone: List[Dict]) -> List[Dict]:
+    return [{'punkt': o['punkt'], 'powod': o['powod'],
+             **({'przez': o['przez']} if 'przez' in o else {}),
+             **({k: o['oszacowanie'][k] for k in ('rho_max', 'czas_realizacji')}
+                if o['oszacowanie'] else {})}
+            for o in odrzucone]
+
+
+def tryb_przeglad(konfiguracja: Dict, argumenty) -> Dict:
+    liczba = argumenty.replikacje or konfiguracja.get('replikacje', {}).get('liczba', 10)
+    seedy = replikacje.seedy_replikacji(argumenty.seed, liczba)
+    punkty = punkty_przegladu(konfiguracja.get('przeglad', {}))
+    model = konfiguracja.get('model', {})
+    odrzucone = []
+    if 'selekcja' in konfiguracja:
+        # Przegląd z selekcją: punkty niestabilne przerywane wcześnie (chyba że model
+        # mówi inaczej); ich podsumowanie to tylko udział stabilnych replikacji
+        model = {'wykrywanie_przeciazenia': True, **model}
+        # Symulacja tylko punktów, które przeszły selekcję, od najbardziej informatywnych
+        selekcja = _selekcja(konfiguracja)
+        punkty = [ocena['punkt'] for ocena in selekcja['do_symulacji']]
+        odrzucone = _opis_odrzuconych(selekcja['odrzucone'])
+    wiersze = (_wiersze_replikacji(model, punkty, seedy, argumenty.workers,
+                                   _wykonawca(argumenty))
+               if punkty else [])
+
+    podsumowanie = []
+    for punkt in punkty:
+        wiersze_punktu = [w for w in wiersze if all(w[k] == v for k, v in punkt.items())]
+        podsumowanie.append({'punkt': punkt, **replikacje.podsumuj_replikacje(
+            wiersze_punktu, pomin=('seed', *punkt))})
+    wynik = {'wiersze': wiersze, 'podsumowanie': podsumowanie}
+    if 'selekcja' in konfiguracja:
+        wynik['odrzucone'] = odrzucone
+    return wynik
+
+
+def tryb_analiza(konfiguracja: Dict, argumenty) -> Dict:
+    selekcja = _selekcja(konfiguracja)
+    wiersze = []
+    for ocena in selekcja['do_symulacji'] + selekcja['odrzucone']:
+        oszacowanie = ocena['oszacowanie'] or {}
+        wiersze.append({
+            **ocena['punkt'],
+            'koszt': ocena['koszt'],
+            **{k: oszacowanie[k] for k in ('rho_max', 'czas_realizacji', 'przepustowosc', 'wip')
+               if k in oszacowanie},
+            'decyzja': ocena.get('powod', 'symulacja')
+        })
+    return {'wiersze': wiersze}
+
+
+def tryb_optymalizacja(konfiguracja: Dict, argumenty) -> Dict:
+    import optymalizacja
+    parametry = dict(konfiguracja.get('optymalizacja', {}))
+    if 'pojemnosc_bufora' in parametry:
+        parametry['pojemnosc_bufora'] = [None if b in (None, 'inf') else b
+                                         for b in parametry['pojemnosc_bufora']]
+    if argumenty.replikacje:
+        parametry['max_replikacji'] = argumenty.replikacje
+    wynik = optymalizacja.optymalizuj(konfiguracja.get('model', {}), seed=argumenty.seed,
+                                      liczba_procesow=argumenty.workers,
+                                      wykonawca=_wykonawca(argumenty), **parametry)
+
+    wiersze = [{**k['punkt'], **{pole: k[pole] for pole in
+                                 ('koszt', 'status', 'n', 'alarmy', 'srednia', 'polowa_przedzialu')}}
+               for k in wynik['kandydaci']]
+    return {'wiersze': wiersze,
+            'najlepszy': wynik['najlepszy'] and wynik['najlepszy']['punkt'],
+            'replikacje': wynik['replikacje'], 'minuty_symulacji': wynik['minuty_symulacji']}
+
+
+def tryb_ogon(konfiguracja: Dict, argumenty) -> Dict:
+    import rzadkie
+    parametry = dict(konfiguracja.get('ogon', {}))
+    if argumenty.replikacje:
+        parametry['liczba_replikacji'] = argumenty.replikacje
+    wynik = rzadkie.oszacuj_ogon(konfiguracja.get('model', {}), seed=argumenty.seed,
+                                 liczba_procesow=argumenty.workers, **parametry)
+    return {'wiersze': wynik['progi'],
+            **{klucz: wynik[klucz] for klucz in ('progi_napraw', 'replikacje', 'dlugie_naprawy',
+                                                  'minuty_symulacji', 'stabilne')}}
+
+
+def tryb_benchmark(konfiguracja: Dict, argumenty) -> Dict:
+    liczba = argumenty.replikacje or konfiguracja.get('benchmark', {}).get('powtorzenia', 3)
+    model = replikacje.pelna_konfiguracja(konfiguracja.get('model', {}))
+    seedy = replikacje.seedy_replikacji(argumenty.seed, liczba)
+
+    start = time.perf_counter()
+    wyniki = replikacje.uruchom_replikacje_rownolegle([(model, s) for s in seedy], argumenty.workers,
+                                                      _wykonawca(argumenty))
+    czas = time.perf_counter() - start
+
+    elementy = sum(w['Liczba ukończonych elementów'] for w in wyniki)
+    wiersz = {
+        'replikacje': liczba,
+        'czas_s': czas,
+        'elementy_na_s': elementy / czas,
+        'minuty_symulacji_na_s': liczba * model['czas_symulacji'] / czas,
+        'replikacje_na_s': liczba / czas
+    }
+    return {'wiersze': [wiersz]}
+
+
+def tryb_slad(konfiguracja: Dict, argumenty) -> Dict:
+    import slad
+    parametry = dict(konfiguracja.get('slad', {}))
+    opcje = {klucz: parametry[klucz] for klucz in ('silniki', 'tolerancja') if klucz in parametry}
+    if 'wzorzec' in parametry:
+        return slad.porownaj_z_zapisem(parametry['wzorzec'], **opcje)
+    return slad.porownaj_silniki(konfiguracja.get('model', {}), argumenty.seed,
+                                 sciezka=parametry.get('plik'), **opcje)
+
+
+def tryb_weryfikacja(konfiguracja: Dict, argumenty) -> Dict:
+    import weryfikacja
+    parametry = dict(konfiguracja.get('weryfikacja', {}))
+    if argumenty.replikacje:
+        parametry['liczba_replikacji'] = argumenty.replikacje
+    return weryfikacja.weryfikuj(seed=argumenty.seed, liczba_procesow=argumenty.workers,
+                                 wykonawca=_wykonawca(argumenty), **parametry)
+
+
+TRYBY = {
+    'symulacja': tryb_symulacja,
+    'replikacje': tryb_replikacje,
+    'przeglad': tryb_przeglad,
+    'analiza': tryb_analiza,
+    'optymalizacja': tryb_optymalizacja,
+    'ogon': tryb_ogon,
+    'benchmark': tryb_benchmark,
+    'slad': tryb_slad,
+    'weryfikacja': tryb_weryfikacja
+}
+
+
+def formatuj(wynik: Dict, format_wyjscia: str) -> str:
+    if format_wyjscia == 'json':
+        return json.dumps(wynik, ensure_ascii=False, indent=2, default=str)
+
+    if format_wyjscia == 'csv':
+        bufor = io.StringIO()
+        kolumny = list(dict.fromkeys(k for wiersz in wynik['wiersze'] for k in wiersz))
+        pisarz = csv.DictWriter(bufor, fieldnames=kolumny)
+        pisarz.writeheader()
+        pisarz.writerows(wynik['wiersze'])
+        return bufor.getvalue()
+
+    # Tekst: podsumowanie głównych metryk (albo wiersze, gdy brak podsumowania)
+    linie = []
+    glowne = ('Przepustowość (elem/min)', 'Średni Czas Realizacji (min)',
+              'Średnia Liczba Elementów w Systemie (WIP)', 'Stabilny')
+    for podsumowanie in wynik.get('podsumowanie', []):
+        if 'punkt' in podsumowanie:
+            linie.append(f"Punkt: {podsumowanie['punkt']}")
+        for klucz in glowne:
+            if klucz in podsumowanie:
+                dane = podsumowanie[klucz]
+                linie.append(f"  {klucz}: {dane['srednia']:.4f} ± {dane['polowa_przedzialu']:.4f} "
+                             f"(n={dane['n']})")
+        if 'Stabilny' in podsumowanie and podsumowanie['Stabilny']['srednia'] < 1:
+            przerwane = 1 - podsumowanie['Stabilny']['srednia']
+            linie.append(f"  UWAGA: niestabilna - przerwano {przerwane:.0%} replikacji, "
+                         f"metryki pominięte")
+    for odrzucony in wynik.get('odrzucone', []):
+        linie.append(f"Pominięty: {odrzucony['punkt']} ({odrzucony['powod']})")
+    if 'najlepszy' in wynik:
+        for wiersz in wynik['wiersze']:
+            srednia = '-' if wiersz['srednia'] is None else f"{wiersz['srednia']:.4f}"
+            linie.append(f"Kandydat: K_A={wiersz['liczba_maszyn_a']} K_B={wiersz['liczba_maszyn_b']} "
+                         f"bufor={wiersz['pojemnosc_bufora']} koszt={wiersz['koszt']} "
+                         f"{wiersz['status']} (n={wiersz['n']}, średnia {srednia})")
+        linie.append(f"Najlepszy: {wynik['najlepszy']} - {wynik['replikacje']} replikacji, "
+                     f"{wynik['minuty_symulacji']:.0f} minut symulacji")
+    if 'zaliczone' in wynik:
+        for wiersz in wynik['wiersze']:
+            oczekiwane = (f"{wiersz['dolna']:.4f}" if wiersz['dolna'] == wiersz['gorna']
+                          else f"{wiersz['dolna']:.4f}..{wiersz['gorna']:.4f}")
+            zmierzone = ('brak' if 'srednia' not in wiersz else
+                         f"{wiersz['srednia']:.4f} ± {wiersz['polowa_przedzialu']:.4f}")
+            linie.append(f"{'OK' if wiersz['zaliczona'] else 'BŁĄD'} {wiersz['przypadek']} "
+                         f"[{wiersz['silnik']}] {wiersz['metryka']}: {zmierzone} "
+                         f"(oczekiwane {oczekiwane})")
+        linie.append("Weryfikacja zaliczona" if wynik['zaliczone'] else "Weryfikacja NIEZALICZONA")
+    if 'zgodne' in wynik:
+        for wiersz in wynik['wiersze']:
+            zdarzenia = f"{wiersz['zdarzenia'][0]}/{wiersz['zdarzenia'][1]} zdarzeń"
+            if wiersz['zgodne']:
+                linie.append(f"{wiersz['silnik']}: zgodny ({zdarzenia})")
+                continue
+            linie.append(f"{wiersz['silnik']}: ROZBIEŻNY ({zdarzenia})")
+            rozbieznosc = wiersz['rozbieznosc']
+            if rozbieznosc is not None:
+                gdzie = (f"element {rozbieznosc['element']}" if 'element' in rozbieznosc
+                         else f"maszyna {rozbieznosc['maszyna']}")
+                linie.append(f"  pierwsza rozbieżność w {rozbieznosc['czas']:.6f} min, {gdzie}, "
+                             f"zdarzenie {rozbieznosc['indeks']}: oczekiwane "
+                             f"{rozbieznosc['oczekiwane']}, otrzymane {rozbieznosc['otrzymane']}")
+            for nazwa, (oczekiwane, otrzymane) in wiersz['strumienie'].items():
+                linie.append(f"  strumień {nazwa}: zużyto {otrzymane} liczb U zamiast {oczekiwane}")
+            if wiersz['wyczerpany']:
+                linie.append(f"  {wiersz['wyczerpany']}")
+    if not linie:
+        for wiersz in wynik['wiersze']:
+            for klucz, wartosc in wiersz.items():
+                if '.' not in klucz:
+                    linie.append(f"{klucz}: {wartosc}")
+    return "\n".join(linie) + "\n"
+
+
+def zapisz_do_magazynu(katalog: str, konfiguracja: Dict, wynik: Dict) -> int:
+    """Dopisuje wiersze replikacji (z seedem) do magazynu; zwraca ich liczbę."""
+    import magazyn
+    model = konfiguracja.get('model', {})
+    liczba = 0
+    with magazyn.MagazynWynikow(katalog) as magazyn_wynikow:
+        for wiersz in wynik['wiersze']:
+            if wiersz.get('seed') is None:
+                continue
+            punkt = {k: v for k, v in wiersz.items() if k in replikacje.KLUCZE_KONFIGURACJI}
+            metryki = {k: v for k, v in wiersz.items() if k not in punkt and k != 'seed'}
+            magazyn_wynikow.dopisz({**model, **punkt}, wiersz['seed'], metryki)
+            liczba += 1
+    return liczba
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Symulacja dwuetapowej linii produkcyjnej")
+    parser.add_argument('tryb', choices=sorted(TRYBY))
+    parser.add_argument('konfiguracja', nargs='?', help="plik konfiguracji .toml lub .json")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="liczba procesów roboczych (domyślnie liczba rdzeni)")
+    parser.add_argument('--seed', type=int, default=None, help="seed główny")
+    parser.add_argument('--replikacje', type=int, default=None,
+                        help="liczba replikacji (nadpisuje plik konfiguracji)")
+    parser.add_argument('--output', default=None, help="plik wyjściowy (domyślnie stdout)")
+    parser.add_argument('--format', choices=('tekst', 'json', 'csv'), default='tekst')
+    parser.add_argument('--magazyn', default=None,
+                        help="katalog magazynu wyników, do którego dopisywane są replikacje")
+    parser.add_argument('--wezly', default=None,
+                        help="adres HOST:PORT, na którym koordynator czeka na węzły")
+    parser.add_argument('--lokalne-wezly', type=int, default=None,
+                        help="liczba lokalnych procesów węzłów (zastępstwo klastra)")
+    argumenty = parser.parse_args(argv)
+
+    konfiguracja = wczytaj_konfiguracje(argumenty.konfiguracja)
+    wynik = TRYBY[argumenty.tryb](konfiguracja, argumenty)
+    tekst = formatuj(wynik, argumenty.format)
+    if (argumenty.magazyn and argumenty.tryb in ('symulacja', 'replikacje', 'przeglad')
+            and not getattr(argumenty, 'magazyn_strumieniowy', False)):
+        zapisz_do_magazynu(argumenty.magazyn, konfiguracja, wynik)
+
+    if argumenty.output:
+        katalog = os.path.dirname(argumenty.output)
+        if katalog:
+            os.makedirs(katalog, exist_ok=True)
+        with open(argumenty.output, 'w', encoding='utf-8', newline='') as plik:
+            plik.write(tekst)
+    else:
+        sys.stdout.write(tekst)
+    if wynik.get('zaliczone') is False or wynik.get('zgodne') is False:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
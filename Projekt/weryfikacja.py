@@ -0,0 +1,250 @@
+"""
+Szybka weryfikacja silnika względem wyników analitycznych (wyrocznie).
+
+Każdy przypadek to konfiguracja, dla której wynik jest znany w postaci zamkniętej,
+oraz oczekiwane wartości metryk (klucze jak w replikacje.splaszcz_wyniki):
+    mg1_jednostajny, mg1_deterministyczny - jedna maszyna A, etap B bez czasu:
+        wzór Pollaczka-Chinczyna (M/G/1) na czas realizacji, wykorzystanie, WIP,
+    tandem_deterministyczny - stałe odstępy i czasy bez kolejek: czas realizacji a + b,
+        przepustowość i wykorzystanie dokładnie dla skończonego horyzontu,
+    round_robin - c maszyn A przydzielanych po kolei (każda to E_c/D/1): wykorzystanie
+        dokładnie, czas realizacji między 0 a min(Kingman, M/G/1) - brak wzoru zamkniętego,
+    dostepnosc - awarie bez wspólnej ekipy: MTBF / (MTBF + MTTR),
+    ekipa_naprawcza - jeden technik dla N maszyn: model naprawiacza M/M/1//N.
+
+Krótkie replikacje liczone są równolegle (replikacje.uruchom_replikacje_rownolegle).
+Metryka przechodzi, gdy przedział ufności średniej sięga wartości oczekiwanej
+(albo przedziału ograniczeń) z zapasem `tolerancja` (względnym) na obciążenie
+startem z pustego systemu. Przypadki deterministyczne (przedział zerowej szerokości)
+mają wyrocznię dokładną, więc zapas TOLERANCJA_DOKLADNA obejmuje tylko zaokrąglenia:
+
+    wynik = weryfikuj(liczba_replikacji=20)
+    wynik['zaliczone']   # False - któraś metryka poza przedziałem
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence
+
+import replikacje
+
+
+SEED = 2024
+
+# Praktycznie bez awarii / bez przybyć (średnie rzędu wieku Wszechświata w minutach)
+BEZ_AWARII = {'zakres_mtbf': [1e15, 1e15], 'zakres_mttr': [0, 0]}
+BEZ_PRZYBYC = [1e15, 1e15]
+
+# Względny zapas dla wyroczni dokładnych (błąd zaokrągleń zmiennoprzecinkowych)
+TOLERANCJA_DOKLADNA = 1e-9
+
+CZAS_REALIZACJI = 'Średni Czas Realizacji (min)'
+PRZEPUSTOWOSC = 'Przepustowość (elem/min)'
+WIP = 'Średnia Liczba Elementów w Systemie (WIP)'
+
+
+def _wykorzystanie(maszyna: str) -> str:
+    return f'Wykorzystanie Maszyn.{maszyna}.wykorzystanie_procent'
+
+
+def _dostepnosc(maszyna: str) -> str:
+    return f'Wykorzystanie Maszyn.{maszyna}.dostepnosc_procent'
+
+
+def _momenty_jednostajnego(a: float, b: float):
+    return (a + b) / 2, (a * a + a * b + b * b) / 3
+
+
+def _zajetosc(starty: Sequence[float], czas_obslugi: float, horyzont: float) -> float:
+    # Czas pracy maszyny do chwili `horyzont` (ostatnia obsługa może być ucięta)
+    return sum(min(czas_obslugi, horyzont - start) for start in starty if start < horyzont)
+
+
+def _mg1(odstep: float, a: float, b: float) -> Dict[str, float]:
+    # M/G/1 ze średnim odstępem przybyć `odstep` i obsługą U(a, b)
+    intensywnosc = 1 / odstep
+    m1, m2 = _momenty_jednostajnego(a, b)
+    rho = intensywnosc * m1
+    czas_realizacji = intensywnosc * m2 / (2 * (1 - rho)) + m1
+    return {
+        CZAS_REALIZACJI: czas_realizacji,
+        WIP: intensywnosc * czas_realizacji,
+        PRZEPUSTOWOSC: intensywnosc,
+        _wykorzystanie('A_0'): rho * 100
+    }
+
+
+def przypadek_mg1(odstep: float = 5.0, zakres_czasu_a=(1.0, 5.0), czas: float = 5000) -> Dict:
+    return {
+        'konfiguracja': {
+            'czas_symulacji': czas, 'liczba_maszyn_a': 1, 'liczba_maszyn_b': 1,
+            'zakres_lambda': [odstep, odstep], 'zakres_czasu_a': list(zakres_czasu_a),
+            'zakres_czasu_b': [0, 0], **BEZ_AWARII
+        },
+        'oczekiwane': _mg1(odstep, *zakres_czasu_a)
+    }
+
+
+def przypadek_tandem_deterministyczny(odstep: float = 5.0, czas_a: float = 8.0,
+                                      czas_b: float = 4.0, czas: float = 5000) -> Dict:
+    # Dwie maszyny A na zmianę (każda co 2·odstep) i jedna B - nikt nie czeka. Wartości
+    # dokładne dla horyzontu `czas`: przybycie k w chwili k·odstep (k ≥ 1) trafia na A_(k mod 2)
+    przybycia = {k: k * odstep for k in range(1, math.ceil(czas / odstep))}
+    starty_a = [[t for k, t in przybycia.items() if k % 2 == i] for i in range(2)]
+    ukonczone = sum(1 for t in przybycia.values() if t + czas_a + czas_b <= czas)
+    return {
+        'konfiguracja': {
+            'czas_symulacji': czas, 'liczba_maszyn_a': 2, 'liczba_maszyn_b': 1,
+            'typy_produktow': [{'nazwa': 'standard',
+                                'profil': {'rodzaj': 'deterministyczny', 'odstep': odstep}}],
+            'zakres_czasu_a': [czas_a, czas_a], 'zakres_czasu_b': [czas_b, czas_b],
+            **BEZ_AWARII
+        },
+        'oczekiwane': {
+            CZAS_REALIZACJI: czas_a + czas_b,
+            PRZEPUSTOWOSC: ukonczone / czas,
+            **{_wykorzystanie(f'A_{i}'): _zajetosc(starty, czas_a, czas) / czas * 100
+               for i, starty in enumerate(starty_a)},
+            _wykorzystanie('B_0'): _zajetosc([t + czas_a for t in przybycia.values()],
+                                             czas_b, czas) / czas * 100
+        },
+        'tolerancja': TOLERANCJA_DOKLADNA
+    }
+
+
+def przypadek_round_robin(odstep: float = 1.0, czas_a: float = 2.4, liczba_maszyn: int = 3,
+                          czas: float = 5000) -> Dict:
+    # Maszyna dostaje co c-te przybycie: odstępy Erlanga(c), obsługa stała (E_c/D/1).
+    # Górne ograniczenie: Kingman dla GI/G/1 i M/G/1 (Erlang jest mniej zmienny)
+    intensywnosc = 1 / (odstep * liczba_maszyn)
+    rho = intensywnosc * czas_a
+    wariancja_odstepu = liczba_maszyn * odstep ** 2
+    kingman = intensywnosc * wariancja_odstepu / (2 * (1 - rho))
+    mg1 = intensywnosc * czas_a ** 2 / (2 * (1 - rho))
+    return {
+        'konfiguracja': {
+            'czas_symulacji': czas, 'liczba_maszyn_a': liczba_maszyn, 'liczba_maszyn_b': 1,
+            'zakres_lambda': [odstep, odstep], 'zakres_czasu_a': [czas_a, czas_a],
+            'zakres_czasu_b': [0, 0], **BEZ_AWARII
+        },
+        'oczekiwane': {
+            PRZEPUSTOWOSC: 1 / odstep,
+            **{_wykorzystanie(f'A_{i}'): rho * 100 for i in range(liczba_maszyn)}
+        },
+        'ograniczenia': {CZAS_REALIZACJI: (czas_a, czas_a + min(kingman, mg1))}
+    }
+
+
+def przypadek_dostepnosc(mtbf: float = 100.0, mttr: float = 20.0, czas: float = 20000) -> Dict:
+    # Naprawa zaczyna się od razu, zegar awarii rusza po naprawie - proces odnowy
+    a = mtbf / (mtbf + mttr) * 100
+    return {
+        'konfiguracja': {
+            'czas_symulacji': czas, 'liczba_maszyn_a': 1, 'liczba_maszyn_b': 1,
+            'zakres_lambda': BEZ_PRZYBYC, 'zakres_mtbf': [mtbf, mtbf], 'zakres_mttr': [mttr, mttr]
+        },
+        'oczekiwane': {_dostepnosc('A_0'): a, _dostepnosc('B_0'): a}
+    }
+
+
+def przypadek_ekipa_naprawcza(mtbf: float = 100.0, mttr: float = 20.0, liczba_maszyn_a: int = 2,
+                              liczba_maszyn_b: int = 2, czas: float = 20000) -> Dict:
+    # Model naprawiacza: N maszyn, awarie i naprawy wykładnicze, jeden technik
+    n = liczba_maszyn_a + liczba_maszyn_b
+    r = mttr / mtbf
+    wagi = [math.factorial(n) / math.factorial(n - k) * r ** k for k in range(n + 1)]
+    p = [w / sum(wagi) for w in wagi]
+    zepsute = sum(k * pk for k, pk in enumerate(p))
+    w_kolejce = sum((k - 1) * pk for k, pk in enumerate(p) if k)
+    return {
+        'konfiguracja': {
+            'czas_symulacji': czas, 'liczba_maszyn_a': liczba_maszyn_a,
+            'liczba_maszyn_b': liczba_maszyn_b, 'zakres_lambda': BEZ_PRZYBYC,
+            'zakres_mtbf': [mtbf, mtbf], 'zakres_mttr': [mttr, mttr], 'liczba_technikow': 1
+        },
+        'oczekiwane': {
+            'Ekipa Naprawcza.wykorzystanie_procent': (1 - p[0]) * 100,
+            'Ekipa Naprawcza.srednia_dlugosc_kolejki': w_kolejce,
+            # Little: oczekiwanie = kolejka / intensywność awarii sprawnych maszyn
+            'Ekipa Naprawcza.sredni_czas_oczekiwania': w_kolejce / ((n - zepsute) / mtbf)
+        }
+    }
+
+
+def przypadki() -> Dict[str, Dict]:
+    return {
+        'mg1_jednostajny': przypadek_mg1(),
+        'mg1_deterministyczny': przypadek_mg1(zakres_czasu_a=(3.0, 3.0)),
+        'tandem_deterministyczny': przypadek_tandem_deterministyczny(),
+        'round_robin': przypadek_round_robin(),
+        'dostepnosc': przypadek_dostepnosc(),
+        'ekipa_naprawcza': przypadek_ekipa_naprawcza()
+    }
+
+
+def ocen(nazwa: str, przypadek: Dict, podsumowanie: Dict[str, Dict],
+         tolerancja: float) -> List[Dict]:
+    """Wiersz na metrykę przypadku: średnia, przedział i czy zgadza się z wyrocznią
+    (z zapasem przypadku, jeśli go określa - wyrocznie dokładne)."""
+    tolerancja = przypadek.get('tolerancja', tolerancja)
+    wiersze = []
+    granice = {metryka: (wartosc, wartosc) for metryka, wartosc in przypadek['oczekiwane'].items()}
+    granice.update(przypadek.get('ograniczenia', {}))
+    for metryka, (dolna, gorna) in granice.items():
+        dane = podsumowanie.get(metryka)
+        wiersz = {'przypadek': nazwa, 'metryka': metryka, 'dolna': dolna, 'gorna': gorna}
+        if dane is None:
+            wiersze.append({**wiersz, 'zaliczona': False})
+            continue
+        srednia, polowa = dane['srednia'], dane['polowa_przedzialu']
+        zaliczona = (srednia + polowa >= dolna - tolerancja * abs(dolna)
+                     and srednia - polowa <= gorna + tolerancja * abs(gorna))
+        wiersze.append({**wiersz, 'srednia': srednia, 'polowa_przedzialu': polowa,
+                        'n': dane['n'], 'zaliczona': zaliczona})
+    return wiersze
+
+
+def weryfikuj(liczba_replikacji: int = 20, seed: Optional[int] = None,
+              liczba_procesow: Optional[int] = None,
+              silniki: Sequence[str] = ('rekordy', 'procesy'),
+              poziom: float = 0.99, tolerancja: float = 0.02,
+              wybrane: Optional[Sequence[str]] = None, wykonawca=None) -> Dict:
+    """Wszystkie (albo wybrane) przypadki dla każdego silnika w jednej puli replikacji.
+
+    Zwraca 'wiersze' (przypadek, silnik, metryka, granice, średnia, przedział,
+    zaliczona) i 'zaliczone' - czy przeszły wszystkie metryki.
+    """
+    wszystkie = przypadki()
+    if wybrane is not None:
+        nieznane = set(wybrane) - set(wszystkie)
+        if nieznane:
+            raise ValueError(f"Nieznane przypadki weryfikacji: {', '.join(sorted(nieznane))}")
+        wszystkie = {nazwa: wszystkie[nazwa] for nazwa in wybrane}
+
+    seedy = replikacje.seedy_replikacji(SEED if seed is None else seed, liczba_replikacji)
+    uruchomienia = [(nazwa, silnik) for nazwa in wszystkie for silnik in silniki]
+    zadania = [({**wszystkie[nazwa]['konfiguracja'], 'silnik': silnik,
+                 'strumienie_losowe': True}, s)
+               for nazwa, silnik in uruchomienia for s in seedy]
+    wyniki = replikacje.uruchom_replikacje_rownolegle(zadania, liczba_procesow, wykonawca)
+
+    wiersze = []
+    for i, (nazwa, silnik) in enumerate(uruchomienia):
+        obserwacje = [replikacje.splaszcz_wyniki(wynik)
+                      for wynik in wyniki[i * len(seedy):(i + 1) * len(seedy)]]
+        podsumowanie = replikacje.podsumuj_replikacje(obserwacje, poziom)
+        wiersze.extend({**wiersz, 'silnik': silnik}
+                       for wiersz in ocen(nazwa, wszystkie[nazwa], podsumowanie, tolerancja))
+    return {'wiersze': wiersze, 'zaliczone': all(w['zaliczona'] for w in wiersze)}
+
+
+if __name__ == "__main__":
+    import sys
+    wynik = weryfikuj()
+    for wiersz in wynik['wiersze']:
+        srednia = wiersz.get('srednia', math.nan)
+        print(f"{'OK ' if wiersz['zaliczona'] else 'BŁĄD'} {wiersz['przypadek']:<24} "
+              f"{wiersz['silnik']:<8} {wiersz['metryka']}: {srednia:.4f} "
+              f"± {wiersz.get('polowa_przedzialu', math.nan):.4f} "
+              f"(oczekiwane {wiersz['dolna']:.4f}"
+              + (f"..{wiersz['gorna']:.4f})" if wiersz['gorna'] != wiersz['dolna'] else ")"))
+    sys.exit(0 if wynik['zaliczone'] else 1)
@@ -0,0 +1,73 @@
+"""
+Wykresy wyników badań renderowane bez okna (backend Agg) do plików PNG.
+
+Renderowanie działa na zapisanych wynikach (plik JSON), więc można je uruchomić:
+- w tle, w osobnym procesie (renderuj_w_tle) - badania nie czekają na wykresy,
+- jako krok końcowy: python wykresy.py wyniki_etap3.json [katalog_wyjsciowy]
+matplotlib jest importowany dopiero w procesie, który rysuje.
+"""
+
+import json
+import os
+import statistics
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List
+
+
+def zapisz_wyniki(sciezka: str, dane: Dict):
+    with open(sciezka, 'w', encoding='utf-8') as plik:
+        json.dump(dane, plik, ensure_ascii=False, indent=2)
+
+
+def renderuj_wykresy_etapu3(sciezka_wynikow: str, katalog: str = '.') -> List[str]:
+    """Wykres pudełkowy i wykres różnic CRN; zwraca ścieżki zapisanych plików."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    with open(sciezka_wynikow, encoding='utf-8') as plik:
+        dane = json.load(plik)
+    wyniki_s1, wyniki_s2 = dane['wyniki_s1'], dane['wyniki_s2']
+    etykiety = dane.get('etykiety', ['S1', 'S2'])
+    n = len(wyniki_s1)
+    os.makedirs(katalog, exist_ok=True)
+    pliki = []
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.boxplot([wyniki_s1, wyniki_s2], tick_labels=etykiety)
+    ax.set_title(f'Porównanie czasu realizacji (Metoda CRN, N={n})')
+    ax.set_ylabel('Średni czas realizacji zlecenia [min]')
+    pliki.append(os.path.join(katalog, 'wykres_pudelkowy.png'))
+    fig.savefig(pliki[-1], dpi=100)
+    plt.close(fig)
+
+    roznice = [s1 - s2 for s1, s2 in zip(wyniki_s1, wyniki_s2)]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.bar(range(n), roznice, color='green', alpha=0.7)
+    ax.set_title('Zysk czasowy w każdej replikacji (S1 - S2)')
+    ax.set_xlabel('Numer replikacji (Seed)')
+    ax.axhline(y=statistics.mean(roznice), color='r', linestyle='--', label='Średnia redukcja')
+    ax.legend()
+    pliki.append(os.path.join(katalog, 'wykres_roznic.png'))
+    fig.savefig(pliki[-1], dpi=100)
+    plt.close(fig)
+
+    return pliki
+
+
+def renderuj_w_tle(sciezka_wynikow: str, katalog: str = '.') -> Future:
+    """Renderowanie w osobnym procesie; wynik (lista plików) przez Future."""
+    pula = ProcessPoolExecutor(max_workers=1)
+    przyszlosc = pula.submit(renderuj_wykresy_etapu3, sciezka_wynikow, katalog)
+    # Proces roboczy kończy się po wykonaniu zadania, nie blokując wywołującego
+    pula.shutdown(wait=False)
+    return przyszlosc
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Użycie: python wykresy.py wyniki.json [katalog_wyjsciowy]")
+        sys.exit(2)
+    for sciezka in renderuj_wykresy_etapu3(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else '.'):
+        print(f"Zapisano {sciezka}")